@@ -2,94 +2,64 @@
 AI utility functions using Hugging Face transformers.
 These models run locally without requiring API keys.
 """
-from transformers import pipeline
+from django.conf import settings
+from transformers import TextIteratorStreamer
 import logging
-import re
-from collections import Counter
+import random
+import threading
+import time
+
+from .batching import MicroBatcher
+from .cache import cached_inference, get_result_cache, make_key, normalize_text
+from .document import as_document
+from .inference_client import is_remote, remote_call
+from .long_document import TokenChunker, condense_document, iter_sentences, summarize_long_text
+from .metrics import count_tokens, instrumented, observe, record_error
+from .qa import answer_batch, answer_long_context
+from .registry import model_registry
+from .textrank import rank_sentences
 
 logger = logging.getLogger(__name__)
 
-# Cache for loaded models
-_summarization_model = None
-_text_generation_model = None
-_question_answering_model = None
-_sentiment_model = None
+MODEL_UNAVAILABLE_MESSAGE = "AI model not available. Please try again later."
+
+# Ways extract_key_points can pick sentences
+KEY_POINT_METHODS = ('heuristic', 'textrank')
+
+
+class ModelUnavailableError(RuntimeError):
+    """Raised when a model could not be loaded."""
+
+    def __init__(self, message=MODEL_UNAVAILABLE_MESSAGE):
+        super().__init__(message)
+
+
+# Batches concurrent summarization requests
+_summarization_batcher = None
+_summarization_batcher_lock = threading.Lock()
 
 
 def get_summarization_model():
     """Get or initialize the summarization model."""
-    global _summarization_model
-    if _summarization_model is None:
-        try:
-            logger.info("Loading summarization model...")
-            # Using a smaller, efficient model for summarization
-            _summarization_model = pipeline(
-                "summarization",
-                model="facebook/bart-large-cnn",
-                device=-1  # Use CPU
-            )
-            logger.info("Summarization model loaded successfully")
-        except Exception as e:
-            logger.error(f"Failed to load summarization model: {e}")
-            _summarization_model = None
-    return _summarization_model
+    return model_registry.get('summarization')
 
 
 def get_text_generation_model():
     """Get or initialize the text generation model."""
-    global _text_generation_model
-    if _text_generation_model is None:
-        try:
-            logger.info("Loading text generation model...")
-            # Using a smaller model for generation
-            _text_generation_model = pipeline(
-                "text-generation",
-                model="gpt2",
-                device=-1  # Use CPU
-            )
-            logger.info("Text generation model loaded successfully")
-        except Exception as e:
-            logger.error(f"Failed to load text generation model: {e}")
-            _text_generation_model = None
-    return _text_generation_model
+    return model_registry.get('text-generation')
 
 
 def get_question_answering_model():
     """Get or initialize the question answering model."""
-    global _question_answering_model
-    if _question_answering_model is None:
-        try:
-            logger.info("Loading question answering model...")
-            _question_answering_model = pipeline(
-                "question-answering",
-                model="distilbert-base-cased-distilled-squad",
-                device=-1
-            )
-            logger.info("Question answering model loaded successfully")
-        except Exception as e:
-            logger.error(f"Failed to load question answering model: {e}")
-            _question_answering_model = None
-    return _question_answering_model
+    return model_registry.get('question-answering')
 
 
 def get_sentiment_model():
     """Get or initialize the sentiment analysis model."""
-    global _sentiment_model
-    if _sentiment_model is None:
-        try:
-            logger.info("Loading sentiment analysis model...")
-            _sentiment_model = pipeline(
-                "sentiment-analysis",
-                model="distilbert-base-uncased-finetuned-sst-2-english",
-                device=-1
-            )
-            logger.info("Sentiment model loaded successfully")
-        except Exception as e:
-            logger.error(f"Failed to load sentiment model: {e}")
-            _sentiment_model = None
-    return _sentiment_model
+    return model_registry.get('sentiment-analysis')
 
 
+@instrumented('summarize_text')
 def summarize_text(content, max_length=150, min_length=50):
     """
     Summarize the given content using AI.
@@ -103,35 +73,386 @@ def summarize_text(content, max_length=150, min_length=50):
         str: Summarized text or error message
     """
     try:
-        model = get_summarization_model()
-        if model is None:
-            return "AI model not available. Please try again later."
-        
-        # Ensure content is not too short
-        if len(content.split()) < 50:
-            return content  # Return original if too short
-        
-        # Truncate if too long (BART has max input length)
-        max_input_length = 1024
-        words = content.split()
-        if len(words) > max_input_length:
-            content = ' '.join(words[:max_input_length])
-        
-        # Generate summary
-        summary = model(
-            content,
-            max_length=max_length,
-            min_length=min_length,
-            do_sample=False
-        )
-        
-        return summary[0]['summary_text']
+        return _summarize_text(content, max_length=max_length, min_length=min_length)
+    
+    except ModelUnavailableError:
+        record_error('summarize_text')
+        return MODEL_UNAVAILABLE_MESSAGE
     
     except Exception as e:
         logger.error(f"Summarization error: {e}")
+        record_error('summarize_text')
         return f"Error generating summary: {str(e)}"
 
 
+@cached_inference('summarize_text', normalize=('content',))
+def _summarize_text(content, max_length=150, min_length=50):
+    """Summarize content, raising on failure so errors are never cached."""
+    if is_remote():
+        return remote_call('_summarize_text', content, max_length=max_length, min_length=min_length)
+    
+    model = get_summarization_model()
+    if model is None:
+        raise ModelUnavailableError()
+    
+    # Ensure content is not too short
+    if len(content.split()) < 50:
+        return content  # Return original if too short
+    
+    # BART's input limit is in tokens, so measure with its own tokenizer
+    chunker = get_summarization_chunker(model)
+    chunks = chunker.iter_chunks(iter_sentences(content))
+    first_chunk = next(chunks, ('', 0))[0]
+    if next(chunks, None) is not None:
+        if getattr(settings, 'AI_SUMMARY_LONG_DOCUMENTS', True):
+            return summarize_long_text(
+                content,
+                chunker,
+                _summarize_chunks,
+                max_length=max_length,
+                min_length=min_length,
+                batch_size=getattr(settings, 'AI_SUMMARY_CHUNK_BATCH_SIZE', 4)
+            )
+        # Long-document mode disabled: keep only what fits in one pass
+        content = first_chunk
+    
+    # Generate summary
+    if getattr(settings, 'AI_SUMMARY_BATCHING', True):
+        return get_summarization_batcher().submit((content, max_length, min_length))
+    
+    summary = model(
+        content,
+        max_length=max_length,
+        min_length=min_length,
+        do_sample=False
+    )
+    
+    return summary[0]['summary_text']
+
+
+@instrumented('summarize_texts')
+def summarize_texts(contents, max_length=150, min_length=50):
+    """
+    Summarize several texts, passing them to the model as one batch.
+    
+    Args:
+        contents (list): Texts to summarize
+        max_length (int): Maximum length of each summary
+        min_length (int): Minimum length of each summary
+    
+    Returns:
+        list: Summary text, or the exception raised, for each text in order
+    """
+    try:
+        return _summarize_texts(list(contents), max_length=max_length, min_length=min_length)
+    
+    except Exception as e:
+        logger.error(f"Batch summarization error: {e}")
+        record_error('summarize_texts')
+        return [e for _ in contents]
+
+
+def _summarize_texts(contents, max_length=150, min_length=50):
+    """
+    Summarize texts in batched model calls, reusing cached single summaries.
+    
+    Results share cache keys with _summarize_text. Texts that fit in one
+    model input are summarized together; longer ones go through the
+    long-document path one by one.
+    """
+    if is_remote():
+        return remote_call('_summarize_texts', contents, max_length=max_length, min_length=min_length)
+    
+    cache = get_result_cache()
+    use_cache = getattr(settings, 'AI_RESULT_CACHE_ENABLED', True)
+    keys = [
+        make_key('summarize_text', {
+            'content': normalize_text(content),
+            'max_length': max_length,
+            'min_length': min_length
+        })
+        for content in contents
+    ]
+    
+    results = [None] * len(contents)
+    missing = []
+    for index, key in enumerate(keys):
+        hit, value = cache.get('summarize_text', key) if use_cache else (False, None)
+        if hit:
+            results[index] = value
+        else:
+            missing.append(index)
+    
+    if not missing:
+        return results
+    
+    model = get_summarization_model()
+    if model is None:
+        raise ModelUnavailableError()
+    
+    chunker = get_summarization_chunker(model)
+    single = []  # (index, model input) pairs summarized in one batch
+    for index in missing:
+        content = contents[index]
+        if len(content.split()) < 50:
+            results[index] = content
+            continue
+        chunks = chunker.iter_chunks(iter_sentences(content))
+        first_chunk = next(chunks, ('', 0))[0]
+        if next(chunks, None) is None:
+            single.append((index, content))
+        elif getattr(settings, 'AI_SUMMARY_LONG_DOCUMENTS', True):
+            try:
+                results[index] = summarize_long_text(
+                    content,
+                    chunker,
+                    _summarize_chunks,
+                    max_length=max_length,
+                    min_length=min_length,
+                    batch_size=getattr(settings, 'AI_SUMMARY_CHUNK_BATCH_SIZE', 4)
+                )
+            except Exception as e:
+                results[index] = e
+        else:
+            single.append((index, first_chunk))
+    
+    batch_size = getattr(settings, 'AI_SUMMARY_MAX_BATCH_SIZE', 8)
+    for start in range(0, len(single), batch_size):
+        group = single[start:start + batch_size]
+        summaries = _summarize_batch([(content, max_length, min_length) for _, content in group])
+        for (index, _), summary in zip(group, summaries):
+            results[index] = summary
+    
+    if use_cache:
+        for index in missing:
+            if not isinstance(results[index], Exception):
+                cache.set(keys[index], results[index])
+    
+    return results
+
+
+@instrumented('stream_summary')
+def stream_summary(content, max_length=150, min_length=50):
+    """
+    Generate a summary and yield its text as tokens are produced.
+    
+    Streaming uses greedy decoding (the streamer cannot follow beam search),
+    so the text can differ slightly from summarize_text. A cached summary,
+    short content and remote mode yield the whole text at once.
+    
+    Args:
+        content (str): Text to summarize
+        max_length (int): Maximum length of summary
+        min_length (int): Minimum length of summary
+    
+    Yields:
+        str: Pieces of the summary in order
+    """
+    cache_key = make_key('summarize_text', {
+        'content': normalize_text(content),
+        'max_length': max_length,
+        'min_length': min_length
+    })
+    hit, cached = get_result_cache().get('summarize_text', cache_key)
+    if hit:
+        yield cached
+        return
+    
+    if is_remote():
+        yield _summarize_text(content, max_length=max_length, min_length=min_length)
+        return
+    
+    model = get_summarization_model()
+    if model is None:
+        raise ModelUnavailableError()
+    
+    if len(content.split()) < 50:
+        yield content
+        return
+    
+    # Reduce long documents to one model input; only the final pass streams
+    chunker = get_summarization_chunker(model)
+    chunks = chunker.iter_chunks(iter_sentences(content))
+    first_chunk = next(chunks, ('', 0))[0]
+    if next(chunks, None) is not None:
+        if getattr(settings, 'AI_SUMMARY_LONG_DOCUMENTS', True):
+            content, tokens = condense_document(
+                content,
+                chunker,
+                _summarize_chunks,
+                max_length=max_length,
+                min_length=min_length,
+                batch_size=getattr(settings, 'AI_SUMMARY_CHUNK_BATCH_SIZE', 4)
+            )
+            if tokens <= min_length:
+                yield content
+                return
+        else:
+            content = first_chunk
+    
+    tokenizer = model.tokenizer
+    streamer = TextIteratorStreamer(
+        tokenizer,
+        skip_prompt=True,
+        skip_special_tokens=True,
+        timeout=getattr(settings, 'AI_INFERENCE_TIMEOUT', 120)
+    )
+    start = time.perf_counter()
+    inputs = tokenizer(
+        content,
+        return_tensors='pt',
+        truncation=True,
+        max_length=chunker.max_tokens + tokenizer.num_special_tokens_to_add()
+    )
+    observe('ai_tokenize_seconds', time.perf_counter() - start, model='summarization')
+    observe('ai_input_tokens', count_tokens(inputs['input_ids']), model='summarization')
+    errors = []
+    
+    def generate():
+        try:
+            start = time.perf_counter()
+            output_ids = model.model.generate(
+                **inputs,
+                streamer=streamer,
+                max_length=max_length,
+                min_length=min_length,
+                num_beams=1,
+                do_sample=False
+            )
+            observe('ai_forward_seconds', time.perf_counter() - start, model='summarization')
+            observe('ai_output_tokens', count_tokens(output_ids), model='summarization')
+        except Exception as e:
+            errors.append(e)
+            streamer.end()
+    
+    thread = threading.Thread(target=generate, name='summary-stream', daemon=True)
+    thread.start()
+    for text in streamer:
+        if text:
+            yield text
+    thread.join()
+    if errors:
+        raise errors[0]
+
+
+def _summarize_batch(items):
+    """
+    Run a batch of summarization requests through the model.
+    
+    Args:
+        items (list): (content, max_length, min_length) tuples
+    
+    Returns:
+        list: Summary text (or the exception raised) for each item
+    """
+    model = get_summarization_model()
+    if model is None:
+        raise ModelUnavailableError()
+    
+    # Generation parameters apply to the whole call, so group by them
+    groups = {}
+    for index, (content, max_length, min_length) in enumerate(items):
+        groups.setdefault((max_length, min_length), []).append((index, content))
+    
+    results = [None] * len(items)
+    for (max_length, min_length), group in groups.items():
+        try:
+            summaries = model(
+                [content for _, content in group],
+                max_length=max_length,
+                min_length=min_length,
+                do_sample=False,
+                batch_size=len(group),
+                truncation=True
+            )
+            for (index, _), summary in zip(group, summaries):
+                # A single input comes back as a dict inside a list
+                if isinstance(summary, list):
+                    summary = summary[0]
+                results[index] = summary['summary_text']
+        except Exception as e:
+            for index, _ in group:
+                results[index] = e
+    
+    return results
+
+
+def get_summarization_chunker(model):
+    """
+    Build a chunker that measures text with the summarization tokenizer.
+    
+    Args:
+        model: Loaded summarization pipeline
+    
+    Returns:
+        TokenChunker: Chunker whose budget leaves room for special tokens
+    """
+    max_input_tokens = getattr(settings, 'AI_SUMMARY_MAX_INPUT_TOKENS', 1024)
+    model_limit = getattr(model.tokenizer, 'model_max_length', max_input_tokens)
+    special_tokens = model.tokenizer.num_special_tokens_to_add()
+    return TokenChunker(model.tokenizer, min(max_input_tokens, model_limit) - special_tokens)
+
+
+def _summarize_chunks(chunks, max_length, min_length):
+    """
+    Summarize document chunks as one batch, reusing cached chunk summaries.
+    
+    Args:
+        chunks (list): Chunk texts that each fit the model input
+        max_length (int): Maximum length of each summary
+        min_length (int): Minimum length of each summary
+    
+    Returns:
+        list: Summary for each chunk
+    """
+    cache = get_result_cache()
+    use_cache = getattr(settings, 'AI_RESULT_CACHE_ENABLED', True)
+    keys = [
+        make_key('summarize_chunk', {
+            'content': normalize_text(chunk),
+            'max_length': max_length,
+            'min_length': min_length
+        })
+        for chunk in chunks
+    ]
+    
+    results = [None] * len(chunks)
+    missing = []
+    for index, key in enumerate(keys):
+        hit, value = cache.get('summarize_chunk', key) if use_cache else (False, None)
+        if hit:
+            results[index] = value
+        else:
+            missing.append(index)
+    
+    if missing:
+        summaries = _summarize_batch([(chunks[index], max_length, min_length) for index in missing])
+        for index, summary in zip(missing, summaries):
+            if isinstance(summary, Exception):
+                raise summary
+            results[index] = summary
+            if use_cache:
+                cache.set(keys[index], summary)
+    
+    return results
+
+
+def get_summarization_batcher():
+    """Get or initialize the batcher in front of the summarization model."""
+    global _summarization_batcher
+    if _summarization_batcher is None:
+        with _summarization_batcher_lock:
+            if _summarization_batcher is None:
+                _summarization_batcher = MicroBatcher(
+                    _summarize_batch,
+                    max_batch_size=getattr(settings, 'AI_SUMMARY_MAX_BATCH_SIZE', 8),
+                    max_wait_ms=getattr(settings, 'AI_SUMMARY_BATCH_WINDOW_MS', 10),
+                    name='summarization'
+                )
+    return _summarization_batcher
+
+
+@instrumented('generate_study_plan_text')
 def generate_study_plan_text(topic, duration_days, difficulty):
     """
     Generate study plan suggestions using structured templates.
@@ -197,29 +518,36 @@ def generate_study_plan_text(topic, duration_days, difficulty):
     
     except Exception as e:
         logger.error(f"Study plan generation error: {e}")
+        record_error('generate_study_plan_text')
         return f"Error generating study plan: {str(e)}"
 
 
+@instrumented('generate_flashcard_questions')
 def generate_flashcard_questions(content, num_cards=5):
     """
     Generate flashcard questions from content.
     
     Args:
-        content (str): Source content
+        content (str or Document): Source content
         num_cards (int): Number of flashcards to generate
     
     Returns:
         list: List of question-answer pairs
     """
     try:
+        document = as_document(content)
+        
         # For flashcards, we'll use a simpler extraction approach
-        # Split content into sentences
-        sentences = [s.strip() for s in content.split('.') if len(s.strip()) > 20]
+        # Use sentences long enough to hold a question
+        sentences = [
+            (sentence, words)
+            for sentence, words in zip(document.sentences, document.sentence_words)
+            if len(sentence) > 20
+        ]
         
         flashcards = []
-        for i, sentence in enumerate(sentences[:num_cards]):
+        for i, (sentence, words) in enumerate(sentences[:num_cards]):
             # Create questions from sentences
-            words = sentence.split()
             if len(words) > 5:
                 # Simple question generation: blank out key words
                 key_word_index = len(words) // 2
@@ -239,9 +567,11 @@ def generate_flashcard_questions(content, num_cards=5):
     
     except Exception as e:
         logger.error(f"Flashcard generation error: {e}")
+        record_error('generate_flashcard_questions')
         return []
 
 
+@instrumented('generate_study_advice')
 def generate_study_advice(topic, struggles):
     """
     Generate study advice using knowledge-based templates.
@@ -295,33 +625,46 @@ def generate_study_advice(topic, struggles):
     
     except Exception as e:
         logger.error(f"Advice generation error: {e}")
+        record_error('generate_study_advice')
         return f"Error generating advice: {str(e)}"
 
 
-def extract_key_points(content, num_points=3):
+@instrumented('extract_key_points')
+def extract_key_points(content, num_points=3, method=None):
     """
     Extract key points from content.
     
     Args:
-        content (str): Source content
+        content (str or Document): Source content
         num_points (int): Number of key points to extract
+        method (str): One of KEY_POINT_METHODS (default AI_KEY_POINTS_METHOD)
     
     Returns:
         list: List of key points
     """
     try:
-        # Split into sentences and select most informative ones
-        sentences = [s.strip() for s in content.split('.') if len(s.strip()) > 30]
+        document = as_document(content)
+        method = method or getattr(settings, 'AI_KEY_POINTS_METHOD', 'heuristic')
+        
+        if method == 'textrank':
+            # Rank informative sentences by centrality in their similarity graph
+            candidates = [index for index, sentence in enumerate(document.sentences) if len(sentence) > 30]
+            ranked = rank_sentences([document.sentence_terms[index] for index in candidates], num_points)
+            key_points = [document.sentences[candidates[index]] for index in ranked]
+            return key_points if key_points else [document.text[:200]]
         
         # Simple heuristic: longer sentences with specific keywords
         scored_sentences = []
         keywords = ['important', 'key', 'main', 'significant', 'essential', 'critical']
         
-        for sentence in sentences:
-            score = len(sentence.split())
+        for sentence, words, lower in zip(document.sentences, document.sentence_words, document.sentence_lowers):
+            # Only consider sentences long enough to be informative
+            if len(sentence) <= 30:
+                continue
+            score = len(words)
             # Boost score if contains keywords
             for keyword in keywords:
-                if keyword in sentence.lower():
+                if keyword in lower:
                     score += 20
             scored_sentences.append((score, sentence))
         
@@ -329,13 +672,15 @@ def extract_key_points(content, num_points=3):
         scored_sentences.sort(reverse=True)
         key_points = [s[1] for s in scored_sentences[:num_points]]
         
-        return key_points if key_points else [content[:200]]
+        return key_points if key_points else [document.text[:200]]
     
     except Exception as e:
         logger.error(f"Key point extraction error: {e}")
-        return [content[:200]]
+        record_error('extract_key_points')
+        return [str(content)[:200]]
 
 
+@instrumented('answer_question')
 def answer_question(question, context):
     """
     Answer a question based on provided context using AI.
@@ -348,30 +693,145 @@ def answer_question(question, context):
         dict: Answer with confidence score
     """
     try:
-        model = get_question_answering_model()
-        if model is None:
-            return {
-                'answer': 'AI model not available. Please try again later.',
-                'confidence': 0.0
-            }
-        
-        result = model(question=question, context=context)
-        
+        return _answer_question(question, context)
+    
+    except ModelUnavailableError:
+        record_error('answer_question')
         return {
-            'answer': result['answer'],
-            'confidence': round(result['score'] * 100, 2),
-            'start': result['start'],
-            'end': result['end']
+            'answer': MODEL_UNAVAILABLE_MESSAGE,
+            'confidence': 0.0
         }
     
     except Exception as e:
         logger.error(f"Question answering error: {e}")
+        record_error('answer_question')
         return {
             'answer': f"Error answering question: {str(e)}",
             'confidence': 0.0
         }
 
 
+# The context is hashed verbatim because start/end index into it
+@cached_inference('answer_question', normalize=('question',))
+def _answer_question(question, context):
+    """Answer a question, raising on failure so errors are never cached."""
+    if is_remote():
+        return remote_call('_answer_question', question, context)
+    
+    model = get_question_answering_model()
+    if model is None:
+        raise ModelUnavailableError()
+    
+    if getattr(settings, 'AI_QA_SLIDING_WINDOW', True):
+        return answer_long_context(model, question, context, **_qa_options())
+    
+    result = model(question=question, context=context)
+    
+    return {
+        'answer': result['answer'],
+        'confidence': round(result['score'] * 100, 2),
+        'start': result['start'],
+        'end': result['end']
+    }
+
+
+def _qa_options():
+    """Sliding-window options for the QA helpers in qa.py."""
+    return {
+        'max_seq_len': getattr(settings, 'AI_QA_MAX_SEQ_LEN', 384),
+        'stride': getattr(settings, 'AI_QA_DOC_STRIDE', 128),
+        'max_answer_len': getattr(settings, 'AI_QA_MAX_ANSWER_LEN', 30),
+        'batch_size': getattr(settings, 'AI_QA_WINDOW_BATCH_SIZE', 32),
+    }
+
+
+@instrumented('answer_questions')
+def answer_questions(questions, context):
+    """
+    Answer several questions about the same context in one batch.
+    
+    Args:
+        questions (list): Questions to answer
+        context (str): Context containing the answers
+    
+    Returns:
+        list: Answer with confidence score for each question, in order
+    """
+    try:
+        return _answer_questions(list(questions), context)
+    
+    except ModelUnavailableError:
+        record_error('answer_questions')
+        return [{'answer': MODEL_UNAVAILABLE_MESSAGE, 'confidence': 0.0} for _ in questions]
+    
+    except Exception as e:
+        logger.error(f"Question answering error: {e}")
+        record_error('answer_questions')
+        return [
+            {'answer': f"Error answering question: {str(e)}", 'confidence': 0.0}
+            for _ in questions
+        ]
+
+
+def _answer_questions(questions, context):
+    """
+    Answer questions in one forward pass, reusing cached single answers.
+    
+    Results share cache keys with _answer_question, so a question answered
+    here is a cache hit for /api/ai/answer-question/ and vice versa.
+    """
+    if is_remote():
+        return remote_call('_answer_questions', questions, context)
+    
+    cache = get_result_cache()
+    use_cache = getattr(settings, 'AI_RESULT_CACHE_ENABLED', True)
+    keys = [
+        make_key('answer_question', {'question': normalize_text(question), 'context': context})
+        for question in questions
+    ]
+    
+    results = [None] * len(questions)
+    missing = []
+    for index, key in enumerate(keys):
+        hit, value = cache.get('answer_question', key) if use_cache else (False, None)
+        if hit:
+            results[index] = value
+        else:
+            missing.append(index)
+    
+    if not missing:
+        return results
+    
+    model = get_question_answering_model()
+    if model is None:
+        raise ModelUnavailableError()
+    
+    pending = [questions[index] for index in missing]
+    if getattr(settings, 'AI_QA_SLIDING_WINDOW', True):
+        answers = answer_batch(model, pending, context, **_qa_options())
+    else:
+        outputs = model(question=pending, context=[context] * len(pending))
+        if isinstance(outputs, dict):
+            outputs = [outputs]
+        answers = [
+            {
+                'answer': result['answer'],
+                'confidence': round(result['score'] * 100, 2),
+                'start': result['start'],
+                'end': result['end']
+            }
+            for result in outputs
+        ]
+    
+    for index, answer in zip(missing, answers):
+        results[index] = answer
+        if use_cache:
+            cache.set(keys[index], answer)
+    
+    return results
+
+
+@instrumented('analyze_study_sentiment')
 def analyze_study_sentiment(text):
     """
     Analyze the sentiment of study notes or reflections.
@@ -383,24 +843,19 @@ def analyze_study_sentiment(text):
         dict: Sentiment analysis results
     """
     try:
-        model = get_sentiment_model()
-        if model is None:
-            return {
-                'sentiment': 'neutral',
-                'confidence': 0.0,
-                'label': 'NEUTRAL'
-            }
-        
-        result = model(text[:512])[0]  # Limit to 512 tokens
-        
+        return _analyze_study_sentiment(text)
+    
+    except ModelUnavailableError:
+        record_error('analyze_study_sentiment')
         return {
-            'sentiment': result['label'].lower(),
-            'confidence': round(result['score'] * 100, 2),
-            'label': result['label']
+            'sentiment': 'neutral',
+            'confidence': 0.0,
+            'label': 'NEUTRAL'
         }
     
     except Exception as e:
         logger.error(f"Sentiment analysis error: {e}")
+        record_error('analyze_study_sentiment')
         return {
             'sentiment': 'neutral',
             'confidence': 0.0,
@@ -409,38 +864,121 @@ def analyze_study_sentiment(text):
         }
 
 
+@cached_inference('analyze_study_sentiment', normalize=('text',))
+def _analyze_study_sentiment(text):
+    """Classify sentiment, raising on failure so errors are never cached."""
+    if is_remote():
+        return remote_call('_analyze_study_sentiment', text)
+    
+    model = get_sentiment_model()
+    if model is None:
+        raise ModelUnavailableError()
+    
+    result = model(text[:512])[0]  # Limit to 512 tokens
+    
+    return _sentiment_result(result)
+
+
+def _sentiment_result(result):
+    return {
+        'sentiment': result['label'].lower(),
+        'confidence': round(result['score'] * 100, 2),
+        'label': result['label']
+    }
+
+
+@instrumented('analyze_sentiments')
+def analyze_sentiments(texts):
+    """
+    Analyze the sentiment of several texts in one batch.
+    
+    Args:
+        texts (list): Texts to analyze
+    
+    Returns:
+        list: Sentiment analysis results, or the exception raised, for each text in order
+    """
+    try:
+        return _analyze_sentiments(list(texts))
+    
+    except Exception as e:
+        logger.error(f"Batch sentiment analysis error: {e}")
+        record_error('analyze_sentiments')
+        return [e for _ in texts]
+
+
+def _analyze_sentiments(texts):
+    """
+    Classify texts in one pipeline call, reusing cached single results.
+    
+    Results share cache keys with _analyze_study_sentiment. If the batch
+    fails, the texts are retried one at a time so only the failing ones
+    report an error.
+    """
+    if is_remote():
+        return remote_call('_analyze_sentiments', texts)
+    
+    cache = get_result_cache()
+    use_cache = getattr(settings, 'AI_RESULT_CACHE_ENABLED', True)
+    keys = [make_key('analyze_study_sentiment', {'text': normalize_text(text)}) for text in texts]
+    
+    results = [None] * len(texts)
+    missing = []
+    for index, key in enumerate(keys):
+        hit, value = cache.get('analyze_study_sentiment', key) if use_cache else (False, None)
+        if hit:
+            results[index] = value
+        else:
+            missing.append(index)
+    
+    if not missing:
+        return results
+    
+    model = get_sentiment_model()
+    if model is None:
+        raise ModelUnavailableError()
+    
+    inputs = [texts[index][:512] for index in missing]  # Limit to 512 tokens
+    try:
+        outputs = model(inputs, batch_size=getattr(settings, 'AI_SENTIMENT_BATCH_SIZE', 16))
+    except Exception as e:
+        logger.warning(f"Sentiment batch failed, retrying items one by one: {e}")
+        outputs = []
+        for text in inputs:
+            try:
+                outputs.append(model(text)[0])
+            except Exception as item_error:
+                outputs.append(item_error)
+    
+    for index, output in zip(missing, outputs):
+        if isinstance(output, Exception):
+            results[index] = output
+            continue
+        # Some pipelines return a list of labels per input
+        if isinstance(output, list):
+            output = output[0]
+        results[index] = _sentiment_result(output)
+        if use_cache:
+            cache.set(keys[index], results[index])
+    
+    return results
+
+
+@instrumented('extract_keywords')
 def extract_keywords(text, num_keywords=10):
     """
     Extract important keywords from text using frequency analysis.
     
     Args:
-        text (str): Text to analyze
+        text (str or Document): Text to analyze
         num_keywords (int): Number of keywords to extract
     
     Returns:
         list: List of (keyword, frequency) tuples
     """
     try:
-        # Remove punctuation and convert to lowercase
-        text_clean = re.sub(r'[^\w\s]', ' ', text.lower())
-        
-        # Common stop words to exclude
-        stop_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-            'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been',
-            'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
-            'could', 'should', 'may', 'might', 'can', 'this', 'that', 'these',
-            'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'what', 'which',
-            'who', 'when', 'where', 'why', 'how', 'all', 'each', 'every', 'both',
-            'few', 'more', 'most', 'other', 'some', 'such', 'than', 'too', 'very'
-        }
-        
-        # Split into words and filter
-        words = [w for w in text_clean.split() 
-                if len(w) > 3 and w not in stop_words]
-        
-        # Count frequencies
-        word_freq = Counter(words)
+        # Frequencies of lowercase words without punctuation or stop words
+        word_freq = as_document(text).word_frequencies
         
         # Get top keywords
         top_keywords = word_freq.most_common(num_keywords)
@@ -449,30 +987,37 @@ def extract_keywords(text, num_keywords=10):
     
     except Exception as e:
         logger.error(f"Keyword extraction error: {e}")
+        record_error('extract_keywords')
         return []
 
 
+@instrumented('generate_quiz_questions')
 def generate_quiz_questions(content, num_questions=5):
     """
     Generate quiz questions from study content.
     
     Args:
-        content (str): Source content
+        content (str or Document): Source content
         num_questions (int): Number of questions to generate
     
     Returns:
         list: List of quiz questions with multiple choice options
     """
     try:
-        # Split into sentences
-        sentences = [s.strip() for s in content.split('.') if len(s.strip()) > 20]
+        document = as_document(content)
+        
+        # Use sentences long enough to hold a question
+        sentences = [
+            (sentence, words)
+            for sentence, words in zip(document.sentences, document.sentence_words)
+            if len(sentence) > 20
+        ]
         
         if not sentences:
             return []
         
         questions = []
-        for i, sentence in enumerate(sentences[:num_questions]):
-            words = sentence.split()
+        for i, (sentence, words) in enumerate(sentences[:num_questions]):
             if len(words) < 5:
                 continue
             
@@ -491,9 +1036,8 @@ def generate_quiz_questions(content, num_questions=5):
             question_words = words.copy()
             question_words[blank_idx] = "______"
             
-            # Generate distractors (wrong answers)
-            all_words = [w for w in content.split() if len(w) > 4 and w.isalpha()]
-            distractors = [w for w in set(all_words) if w != blank_word][:3]
+            # Generate distractors (wrong answers) that resemble the answer
+            distractors = document.vocabulary.distractors(blank_word, 3)
             
             if len(distractors) < 3:
                 distractors.extend(['option1', 'option2', 'option3'])
@@ -502,7 +1046,6 @@ def generate_quiz_questions(content, num_questions=5):
             options = [blank_word] + distractors
             
             # Shuffle options (deterministic for same input)
-            import random
             random.Random(i).shuffle(options)
             
             questions.append({
@@ -517,5 +1060,6 @@ def generate_quiz_questions(content, num_questions=5):
     
     except Exception as e:
         logger.error(f"Quiz generation error: {e}")
+        record_error('generate_quiz_questions')
         return []
 
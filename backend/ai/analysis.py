@@ -0,0 +1,103 @@
+"""
+Run several AI features over one note concurrently.
+
+The note is parsed once into a Document that every feature shares. Features
+run on a bounded thread pool: the transformer calls release the GIL inside
+the model, and the text heuristics are cheap, so a combined analysis takes
+about as long as its slowest feature.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+import contextvars
+import logging
+import threading
+import time
+
+from .ai_utils import (
+    summarize_text,
+    extract_key_points,
+    analyze_study_sentiment,
+    extract_keywords,
+    generate_flashcard_questions,
+    generate_quiz_questions
+)
+
+logger = logging.getLogger(__name__)
+
+# Analysis name -> function of (document, options)
+ANALYSES = {
+    'summary': lambda document, options: summarize_text(
+        document.text,
+        max_length=options.get('max_length', 150),
+        min_length=options.get('min_length', 50)
+    ),
+    'key_points': lambda document, options: extract_key_points(document, options.get('num_points', 3)),
+    'keywords': lambda document, options: extract_keywords(document, options.get('num_keywords', 10)),
+    'sentiment': lambda document, options: analyze_study_sentiment(document.text),
+    'flashcards': lambda document, options: generate_flashcard_questions(document, options.get('num_cards', 5)),
+    'quiz': lambda document, options: generate_quiz_questions(document, options.get('num_questions', 5)),
+}
+
+# Analyses that read the document's sentences
+SENTENCE_ANALYSES = {'key_points', 'flashcards', 'quiz'}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_analysis_executor():
+    """Get the process-wide pool that runs analyses (AI_ANALYZE_MAX_WORKERS threads)."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'AI_ANALYZE_MAX_WORKERS', 4),
+                    thread_name_prefix='ai-analyze'
+                )
+    return _executor
+
+
+def _timed(function, document, options):
+    start = time.perf_counter()
+    result = function(document, options)
+    return result, round((time.perf_counter() - start) * 1000, 1)
+
+
+def run_analyses(document, names, options=None, functions=None):
+    """
+    Run the requested analyses of one document concurrently.
+
+    Args:
+        document (Document): Parsed note
+        names (list): Keys of ANALYSES
+        options (dict): Per-feature options such as num_cards or num_keywords
+        functions (dict): Functions of (document, options) to run instead of
+            some ANALYSES entries
+
+    Returns:
+        tuple: (results, timings_ms, errors) dicts keyed by analysis name
+    """
+    options = options or {}
+    functions = functions or {}
+    if SENTENCE_ANALYSES.intersection(names):
+        # Split sentences before fanning out so features never race to parse
+        document.sentence_words
+    executor = get_analysis_executor()
+    # Each feature runs in a copy of this request's context so its cache and
+    # model use are recorded against the request
+    futures = {
+        name: executor.submit(
+            contextvars.copy_context().run, _timed, functions.get(name, ANALYSES[name]), document, options
+        )
+        for name in names
+    }
+
+    results, timings, errors = {}, {}, {}
+    for name, future in futures.items():
+        try:
+            results[name], timings[name] = future.result()
+        except Exception as e:
+            logger.error(f"Analysis {name} failed: {e}")
+            errors[name] = str(e)
+    return results, timings, errors
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ai'
+
+    def ready(self):
+        # Keep note artifacts and the semantic search index in step with StudyNote changes
+        from . import artifacts, semantic_search  # noqa: F401
@@ -0,0 +1,240 @@
+"""
+Precomputed AI artifacts of study notes.
+
+When a note is created or edited (and AI_NOTE_ARTIFACTS_ON_SAVE is set), a
+background job (type 'note-artifacts') computes its summary, key points, keywords and sentiment and stores them as
+NoteArtifact rows. Each row records a hash of the text it was
+computed from and the version of the model and settings that produced it.
+Endpoints given a note_id serve a stored value with one indexed lookup while
+both still match, and recompute (and store) only the stale ones.
+
+The embedding itself lives in the user's semantic search index; its artifact
+row records that the indexed vector is current. It is refreshed by the
+semantic search on-save thread (AI_SEMANTIC_INDEX_ON_SAVE) rather than by the
+job, so new notes become searchable even when no job worker is running.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+import hashlib
+import logging
+
+from study.models import StudyNote
+from . import ai_utils
+from .backends import get_backend
+from .document import Document
+from .models import AIJob, NoteArtifact
+from .registry import DEFAULT_MODELS
+
+logger = logging.getLogger(__name__)
+
+# Bump to invalidate every stored artifact after changing how they are computed
+ARTIFACTS_VERSION = 1
+
+# Parameters artifacts are computed with; requests asking for others compute inline
+SUMMARY_MAX_LENGTH = 150
+SUMMARY_MIN_LENGTH = 50
+NUM_KEY_POINTS = 3
+NUM_KEYWORDS = 10
+
+JOB_TYPE = 'note-artifacts'
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _model(name):
+    return f"{DEFAULT_MODELS[name]['model']}@{get_backend(name)}"
+
+
+def _embed(note, document):
+    from .semantic_search import index_notes, note_text
+    index_notes(note.user_id, [(note.id, note_text(note))])
+    return {'indexed': True}
+
+
+def _embedding_input(note):
+    from .semantic_search import note_text
+    return note_text(note)
+
+
+# Kind -> version (model and parameters), input text, and compute function of
+# (note, document). Compute functions raise on failure so errors are never stored.
+ARTIFACTS = {
+    NoteArtifact.SUMMARY: {
+        'version': lambda: f"{_model('summarization')}/{SUMMARY_MAX_LENGTH}-{SUMMARY_MIN_LENGTH}",
+        'input': lambda note: note.content,
+        'compute': lambda note, document: ai_utils._summarize_text(
+            document.text, max_length=SUMMARY_MAX_LENGTH, min_length=SUMMARY_MIN_LENGTH
+        ),
+    },
+    NoteArtifact.KEY_POINTS: {
+        'version': lambda: f"{getattr(settings, 'AI_KEY_POINTS_METHOD', 'heuristic')}/{NUM_KEY_POINTS}",
+        'input': lambda note: note.content,
+        'compute': lambda note, document: ai_utils.extract_key_points(document, NUM_KEY_POINTS),
+    },
+    NoteArtifact.KEYWORDS: {
+        'version': lambda: f"word-frequency/{NUM_KEYWORDS}",
+        'input': lambda note: note.content,
+        'compute': lambda note, document: ai_utils.extract_keywords(document, NUM_KEYWORDS),
+    },
+    NoteArtifact.SENTIMENT: {
+        'version': lambda: _model('sentiment-analysis'),
+        'input': lambda note: note.content,
+        'compute': lambda note, document: ai_utils._analyze_study_sentiment(document.text),
+    },
+    NoteArtifact.EMBEDDING: {
+        'version': lambda: _model('embedding'),
+        'input': _embedding_input,
+        'compute': _embed,
+    },
+}
+
+
+def artifact_kinds():
+    """Kinds computed by the artifact job for every saved note."""
+    return [kind for kind in ARTIFACTS if kind != NoteArtifact.EMBEDDING]
+
+
+def expected_tag(note, kind):
+    """(content_hash, model_version) a current artifact of this kind must carry."""
+    spec = ARTIFACTS[kind]
+    return content_hash(spec['input'](note)), f"v{ARTIFACTS_VERSION}:{spec['version']()}"
+
+
+def fresh_artifacts(note, kinds):
+    """
+    Stored values of a note's artifacts that are still current.
+
+    Returns:
+        dict: Kind -> value, for the requested kinds that need no recomputation
+    """
+    tags = {kind: expected_tag(note, kind) for kind in kinds}
+    stored = NoteArtifact.objects.filter(note=note, kind__in=list(tags)).values(
+        'kind', 'content_hash', 'model_version', 'value'
+    )
+    return {
+        artifact['kind']: artifact['value']
+        for artifact in stored
+        if (artifact['content_hash'], artifact['model_version']) == tags[artifact['kind']]
+    }
+
+
+def stale_kinds(note, kinds=None):
+    """Kinds whose stored artifact is missing or out of date."""
+    kinds = list(kinds or artifact_kinds())
+    fresh = fresh_artifacts(note, kinds)
+    return [kind for kind in kinds if kind not in fresh]
+
+
+def compute_artifacts(note, kinds, document=None):
+    """
+    Compute and store artifacts of a note.
+
+    Args:
+        note (StudyNote): Source note
+        kinds (list): Artifact kinds to compute
+        document (Document): Parsed note content, if already available
+
+    Returns:
+        tuple: (values, errors) dicts keyed by kind
+    """
+    document = document or Document(note.content)
+    values, errors = {}, {}
+    for kind in kinds:
+        try:
+            value = ARTIFACTS[kind]['compute'](note, document)
+        except Exception as e:
+            logger.error(f"Could not compute {kind} of note {note.id}: {e}")
+            errors[kind] = str(e)
+            continue
+        store_artifact(note, kind, value)
+        values[kind] = value
+    return values, errors
+
+
+def store_artifact(note, kind, value):
+    """Store a value computed from the note's current content as its artifact."""
+    digest, version = expected_tag(note, kind)
+    NoteArtifact.objects.update_or_create(
+        note=note,
+        kind=kind,
+        defaults={'content_hash': digest, 'model_version': version, 'value': value}
+    )
+
+
+def artifact_function(note, kind):
+    """
+    The kind's compute function as a function of (document, options), for run_analyses.
+
+    It raises on failure, so errors are reported rather than stored.
+    """
+    return lambda document, options: ARTIFACTS[kind]['compute'](note, document)
+
+
+def get_artifact(note, kind):
+    """
+    Value of one artifact, computing and storing it only if stale.
+
+    Raises:
+        Exception: Whatever computing the artifact raised, if it was stale
+    """
+    fresh = fresh_artifacts(note, [kind])
+    if kind in fresh:
+        return fresh[kind]
+    value = ARTIFACTS[kind]['compute'](note, Document(note.content))
+    store_artifact(note, kind, value)
+    return value
+
+
+def refresh_artifacts(note_id):
+    """
+    Recompute the stale artifacts of a note (the 'note-artifacts' job).
+
+    Returns:
+        dict: Kinds computed; raises if any failed so the job is retried
+    """
+    note = StudyNote.objects.filter(id=note_id).first()
+    if note is None:
+        return {'computed': [], 'note_deleted': True}
+    kinds = stale_kinds(note)
+    values, errors = compute_artifacts(note, kinds)
+    if errors:
+        raise RuntimeError(f"Failed artifacts: {', '.join(f'{kind} ({error})' for kind, error in errors.items())}")
+    return {'computed': list(values)}
+
+
+def refresh_embedding(note_id):
+    """
+    Re-embed a saved note into its owner's semantic index unless its text is unchanged.
+
+    Returns:
+        bool: Whether the note was embedded
+    """
+    note = StudyNote.objects.filter(id=note_id).first()
+    if note is None or not stale_kinds(note, [NoteArtifact.EMBEDDING]):
+        return False
+    store_artifact(note, NoteArtifact.EMBEDDING, _embed(note, None))
+    return True
+
+
+def schedule_refresh(note):
+    """
+    Queue an artifact job for a note unless one is already waiting.
+
+    Off unless AI_NOTE_ARTIFACTS_ON_SAVE is set, since nothing claims the
+    jobs without a job worker.
+    """
+    if not getattr(settings, 'AI_NOTE_ARTIFACTS_ON_SAVE', False):
+        return
+    from .jobs import submit_job
+    pending = AIJob.objects.filter(job_type=JOB_TYPE, status=AIJob.QUEUED, payload__note_id=note.id)
+    if not pending.exists():
+        submit_job(note.user, JOB_TYPE, {'note_id': note.id}, internal=True)
+
+
+@receiver(post_save, sender=StudyNote)
+def refresh_saved_note(sender, instance, **kwargs):
+    transaction.on_commit(lambda: schedule_refresh(instance))
@@ -0,0 +1,151 @@
+"""
+Inference backends for the transformer pipelines.
+
+Each registered model can run as plain PyTorch fp32 ('torch'), PyTorch with
+dynamic int8 quantization of its Linear layers ('torch-int8'), or an
+exported ONNX Runtime graph ('onnx'). Converted models are exported once and
+stored under AI_MODEL_ARTIFACTS_DIR; later loads read them from there.
+
+ONNX export needs the optional `optimum[onnxruntime]` package.
+"""
+from django.conf import settings
+from pathlib import Path
+from transformers import pipeline, AutoTokenizer
+import importlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+TORCH = 'torch'
+TORCH_INT8 = 'torch-int8'
+ONNX = 'onnx'
+BACKENDS = (TORCH, TORCH_INT8, ONNX)
+
+# Pipeline task -> (transformers auto class, optimum ONNX Runtime class)
+TASK_MODEL_CLASSES = {
+    'summarization': ('AutoModelForSeq2SeqLM', 'ORTModelForSeq2SeqLM'),
+    'text-generation': ('AutoModelForCausalLM', 'ORTModelForCausalLM'),
+    'question-answering': ('AutoModelForQuestionAnswering', 'ORTModelForQuestionAnswering'),
+    'sentiment-analysis': ('AutoModelForSequenceClassification', 'ORTModelForSequenceClassification'),
+    'feature-extraction': ('AutoModel', 'ORTModelForFeatureExtraction'),
+}
+
+QUANTIZED_MODEL_FILE = 'quantized_model.pt'
+
+
+def get_backend(name):
+    """
+    Get the configured backend for a registry model.
+
+    Args:
+        name (str): Registry name
+
+    Returns:
+        str: One of BACKENDS
+    """
+    backend = getattr(settings, 'AI_MODEL_BACKENDS', {}).get(name, TORCH)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}' for {name}. Choose from: {', '.join(BACKENDS)}")
+    return backend
+
+
+def artifact_dir(name, backend):
+    """Directory holding the converted artifacts of a model."""
+    return Path(getattr(settings, 'AI_MODEL_ARTIFACTS_DIR', 'model_artifacts')) / f"{name}-{backend}"
+
+
+def _transformers_class(task):
+    return getattr(importlib.import_module('transformers'), TASK_MODEL_CLASSES[task][0])
+
+
+def _onnx_class(task):
+    try:
+        module = importlib.import_module('optimum.onnxruntime')
+    except ImportError:
+        raise ImportError("The onnx backend requires: pip install optimum[onnxruntime]")
+    return getattr(module, TASK_MODEL_CLASSES[task][1])
+
+
+def is_exported(name, backend):
+    """True if the converted artifacts for this backend already exist."""
+    path = artifact_dir(name, backend)
+    if backend == TORCH_INT8:
+        return (path / QUANTIZED_MODEL_FILE).exists()
+    if backend == ONNX:
+        return any(path.glob('*.onnx'))
+    return True
+
+
+def export_model(name, spec, backend, force=False):
+    """
+    Convert a model for a backend and store the result locally.
+
+    Args:
+        name (str): Registry name
+        spec (dict): Registry spec with 'task' and 'model'
+        backend (str): Target backend
+        force (bool): Re-export even if artifacts exist
+
+    Returns:
+        Path: Artifact directory (None for the plain torch backend)
+    """
+    if backend == TORCH:
+        return None
+    path = artifact_dir(name, backend)
+    if is_exported(name, backend) and not force:
+        return path
+
+    task, model_id = spec['task'], spec['model']
+    path.mkdir(parents=True, exist_ok=True)
+    logger.info(f"Exporting {name} ({model_id}) for the {backend} backend to {path}...")
+
+    if backend == TORCH_INT8:
+        import torch
+        model = _transformers_class(task).from_pretrained(model_id)
+        model.eval()
+        quantized = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        # Quantized modules cannot go through save_pretrained, so keep the whole module
+        torch.save(quantized, path / QUANTIZED_MODEL_FILE)
+    elif backend == ONNX:
+        model = _onnx_class(task).from_pretrained(model_id, export=True)
+        model.save_pretrained(path)
+
+    AutoTokenizer.from_pretrained(model_id).save_pretrained(path)
+    logger.info(f"Exported {name} for the {backend} backend")
+    return path
+
+
+def load_pipeline(name, spec, backend=None):
+    """
+    Build a pipeline for a registry model on its configured backend.
+
+    Converted artifacts are exported first if they are missing.
+
+    Args:
+        name (str): Registry name
+        spec (dict): Registry spec with 'task', 'model' and extra pipeline kwargs
+        backend (str): Override for the configured backend
+
+    Returns:
+        Pipeline
+    """
+    spec = dict(spec)
+    task = spec.pop('task')
+    model_id = spec.pop('model')
+    spec.setdefault('device', -1)  # Use CPU
+    backend = backend or get_backend(name)
+
+    if backend == TORCH:
+        return pipeline(task, model=model_id, **spec)
+
+    path = export_model(name, {'task': task, 'model': model_id}, backend)
+    tokenizer = AutoTokenizer.from_pretrained(path)
+    if backend == TORCH_INT8:
+        import torch
+        model = torch.load(path / QUANTIZED_MODEL_FILE, weights_only=False)
+        model.eval()
+    else:
+        model = _onnx_class(task).from_pretrained(path)
+        # ONNX Runtime chooses its own execution provider
+        spec.pop('device', None)
+    return pipeline(task, model=model, tokenizer=tokenizer, **spec)
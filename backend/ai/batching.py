@@ -0,0 +1,106 @@
+"""
+Dynamic micro-batching for transformer pipelines.
+
+Requests that arrive within a short window are grouped together and run
+through the model as a single padded batch by one worker thread.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from .metrics import observe
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Collect items submitted from many threads and process them in batches.
+
+    Args:
+        process_batch (callable): Receives a list of items and returns a list
+            of results in the same order. An ``Exception`` instance in the
+            returned list is raised in the matching caller only.
+        max_batch_size (int): Maximum number of items per batch
+        max_wait_ms (float): How long to wait for more items after the first
+            item of a batch arrives
+        name (str): Name used for the worker thread and log messages
+    """
+
+    def __init__(self, process_batch, max_batch_size=8, max_wait_ms=10, name='batcher'):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def submit(self, item, timeout=None):
+        """
+        Submit an item and block until its result is ready.
+
+        Args:
+            item: Payload passed to ``process_batch``
+            timeout (float): Seconds to wait for the result (None waits forever)
+
+        Returns:
+            The result produced for this item
+        """
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((item, future, time.monotonic()))
+        return future.result(timeout=timeout)
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run,
+                    name=f"{self.name}-worker",
+                    daemon=True
+                )
+                self._worker.start()
+
+    def _collect(self):
+        """Block for the first item, then gather more until the window closes."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.monotonic()
+            for _, _, queued_at in batch:
+                observe('ai_queue_wait_seconds', started - queued_at, queue=self.name)
+            items = [item for item, _, _ in batch]
+            try:
+                results = self.process_batch(items)
+                if len(results) != len(batch):
+                    raise RuntimeError(
+                        f"{self.name} returned {len(results)} results for {len(batch)} items"
+                    )
+            except Exception as e:
+                logger.error(f"{self.name} batch of {len(batch)} failed: {e}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future, _), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
@@ -0,0 +1,253 @@
+"""
+Content-addressed cache for AI inference results.
+
+Results are keyed by a hash of the function name, its normalized input and
+its parameters. A bounded in-memory LRU tier sits in front of an optional
+persistent tier backed by a Django cache (file-based or database).
+"""
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import pickle
+import re
+import threading
+import time
+
+from .metrics import record_cache_lookup
+from .singleflight import coalesce
+
+logger = logging.getLogger(__name__)
+
+# Marks a persistent-tier miss (None is a valid cached result)
+_MISSING = object()
+
+
+def normalize_text(text):
+    """Collapse runs of whitespace so trivially different resubmissions share a key."""
+    return re.sub(r'\s+', ' ', str(text)).strip()
+
+
+def make_key(function_name, arguments):
+    """
+    Build a cache key for a call.
+
+    Args:
+        function_name (str): Name of the cached function
+        arguments (dict): Argument name to (already normalized) value
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    payload = json.dumps([function_name, arguments], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier result cache with LRU, TTL and size-based eviction.
+
+    Args:
+        max_entries (int): Maximum number of in-memory entries
+        max_bytes (int): Maximum pickled size of all in-memory entries
+        ttl (int): Seconds an entry stays valid in either tier
+        persistent_alias (str): Django cache alias for the persistent tier,
+            or empty to keep results in memory only
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl=86400, persistent_alias=''):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.persistent_alias = persistent_alias
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def _count(self, function_name, counter):
+        with self._lock:
+            function_counters = self._counters.setdefault(function_name, {
+                'hits': 0, 'memory_hits': 0, 'persistent_hits': 0, 'misses': 0
+            })
+            function_counters[counter] += 1
+
+    def _persistent(self):
+        if not self.persistent_alias:
+            return None
+        return caches[self.persistent_alias]
+
+    def get(self, function_name, key):
+        """
+        Look up a cached result.
+
+        Returns:
+            tuple: (hit, value)
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, size, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                else:
+                    del self._entries[key]
+                    self._bytes -= size
+                    entry = None
+        if entry is not None:
+            self._count(function_name, 'hits')
+            self._count(function_name, 'memory_hits')
+            record_cache_lookup(True)
+            return True, value
+
+        persistent = self._persistent()
+        if persistent is not None:
+            try:
+                value = persistent.get(key, _MISSING)
+            except Exception as e:
+                logger.warning(f"Persistent AI cache read failed: {e}")
+                value = _MISSING
+            if value is not _MISSING:
+                self._store_in_memory(key, value)
+                self._count(function_name, 'hits')
+                self._count(function_name, 'persistent_hits')
+                record_cache_lookup(True)
+                return True, value
+
+        self._count(function_name, 'misses')
+        record_cache_lookup(False)
+        return False, None
+
+    def set(self, key, value):
+        """Store a result in both tiers."""
+        self._store_in_memory(key, value)
+        persistent = self._persistent()
+        if persistent is not None:
+            try:
+                persistent.set(key, value, timeout=self.ttl)
+            except Exception as e:
+                logger.warning(f"Persistent AI cache write failed: {e}")
+
+    def _store_in_memory(self, key, value):
+        size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def clear(self):
+        """Drop all in-memory entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._counters = {}
+
+    def stats(self):
+        """
+        Report cache effectiveness.
+
+        Returns:
+            dict: Totals, per-function counters and in-memory usage
+        """
+        with self._lock:
+            functions = {name: dict(counters) for name, counters in self._counters.items()}
+            entries = len(self._entries)
+            size = self._bytes
+        hits = sum(c['hits'] for c in functions.values())
+        misses = sum(c['misses'] for c in functions.values())
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses) * 100, 2) if hits + misses else 0.0,
+            'functions': functions,
+            'entries': entries,
+            'bytes': size,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'persistent_tier': self.persistent_alias or None,
+        }
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """Get or initialize the process-wide result cache."""
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache(
+                    max_entries=getattr(settings, 'AI_RESULT_CACHE_MAX_ENTRIES', 1024),
+                    max_bytes=getattr(settings, 'AI_RESULT_CACHE_MAX_BYTES', 64 * 1024 * 1024),
+                    ttl=getattr(settings, 'AI_RESULT_CACHE_TTL', 86400),
+                    persistent_alias=getattr(settings, 'AI_RESULT_CACHE_PERSISTENT_ALIAS', ''),
+                )
+    return _result_cache
+
+
+def cached_inference(function_name, normalize=()):
+    """
+    Cache a function's results by a hash of its arguments.
+
+    Exceptions are never cached, so failed inference is retried next time.
+    Concurrent calls that miss with the same key share one computation
+    (see ai/singleflight.py), also when the result cache is disabled.
+
+    Args:
+        function_name (str): Name used in the key and in the counters
+        normalize (tuple): Argument names whose text is whitespace-normalized
+            before hashing. Leave out arguments the result depends on
+            character-for-character (e.g. a QA context, whose answer offsets
+            index into it).
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_enabled = getattr(settings, 'AI_RESULT_CACHE_ENABLED', True)
+            if not cache_enabled and not getattr(settings, 'AI_SINGLEFLIGHT_ENABLED', True):
+                return func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {
+                name: normalize_text(value) if name in normalize else value
+                for name, value in bound.arguments.items()
+            }
+            key = make_key(function_name, arguments)
+
+            # Identical calls already running are waited for, not repeated
+            if not cache_enabled:
+                return coalesce(function_name, key, lambda: func(*args, **kwargs))
+
+            cache = get_result_cache()
+            hit, value = cache.get(function_name, key)
+            if hit:
+                return value
+
+            def compute():
+                value = func(*args, **kwargs)
+                cache.set(key, value)
+                return value
+
+            # Other processes can only reuse the result through the persistent tier
+            lookup = (lambda: cache.get(function_name, key)) if cache.persistent_alias else None
+            return coalesce(function_name, key, compute, lookup)
+
+        return wrapper
+    return decorator
@@ -0,0 +1,191 @@
+"""
+Parsed study content shared by the text heuristics.
+
+extract_key_points, generate_flashcard_questions, generate_quiz_questions and
+extract_keywords all need the same sentence split, tokens, lowercase forms
+and word frequencies. A Document computes each of these lazily, at most
+once, so running several heuristics over one note costs one parse.
+
+The vocabulary index groups a document's candidate answer words by length,
+frequency and a suffix-based part-of-speech guess, so quiz distractors that
+look like the correct answer can be picked in constant time.
+"""
+from collections import Counter, defaultdict
+from functools import cached_property
+import re
+import zlib
+
+STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been',
+    'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
+    'could', 'should', 'may', 'might', 'can', 'this', 'that', 'these',
+    'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'what', 'which',
+    'who', 'when', 'where', 'why', 'how', 'all', 'each', 'every', 'both',
+    'few', 'more', 'most', 'other', 'some', 'such', 'than', 'too', 'very'
+})
+
+
+# Suffix -> part of speech, checked in order (longer suffixes before their endings)
+POS_SUFFIXES = (
+    ('tion', 'noun'), ('sion', 'noun'), ('ment', 'noun'), ('ness', 'noun'), ('ship', 'noun'),
+    ('ance', 'noun'), ('ence', 'noun'), ('ism', 'noun'), ('ist', 'noun'), ('ity', 'noun'),
+    ('ize', 'verb'), ('ise', 'verb'), ('ate', 'verb'), ('ify', 'verb'), ('ing', 'verb'), ('ed', 'verb'),
+    ('ous', 'adjective'), ('ful', 'adjective'), ('ive', 'adjective'), ('able', 'adjective'),
+    ('ible', 'adjective'), ('less', 'adjective'), ('ical', 'adjective'), ('al', 'adjective'), ('ic', 'adjective'),
+    ('ly', 'adverb'),
+)
+
+
+def guess_part_of_speech(word):
+    """Rough part of speech from capitalization and suffix."""
+    if word[0].isupper():
+        return 'proper'
+    lower = word.lower()
+    for suffix, part_of_speech in POS_SUFFIXES:
+        if lower.endswith(suffix):
+            return part_of_speech
+    return 'other'
+
+
+def length_band(word):
+    length = len(word)
+    return 'short' if length <= 6 else 'medium' if length <= 9 else 'long'
+
+
+def frequency_band(count):
+    return 'rare' if count == 1 else 'common' if count <= 3 else 'frequent'
+
+
+class VocabularyIndex:
+    """
+    Candidate answer words of a document, bucketed for distractor selection.
+
+    Candidates are alphabetic words longer than four characters, kept once in
+    order of first appearance. Each word is filed under progressively coarser
+    keys: (part of speech, length band, frequency band), (part of speech,
+    length band), part of speech, and everything. Lookups go from the most
+    similar bucket to the coarsest until enough distractors are found.
+    """
+
+    def __init__(self, words):
+        counts = Counter(word for word in words if len(word) > 4 and word.isalpha())
+        self.words = list(counts)
+        self.features = {}
+        self.buckets = defaultdict(list)
+        for word in self.words:
+            part_of_speech = guess_part_of_speech(word)
+            features = (part_of_speech, length_band(word), frequency_band(counts[word]))
+            self.features[word] = features
+            for key in (features, features[:2], features[:1], ()):
+                self.buckets[key].append(word)
+
+    def distractors(self, answer, count=3):
+        """
+        Pick wrong answers that resemble the correct one.
+
+        The choice is deterministic: each bucket is read from an offset
+        derived from the answer's checksum. At most a handful of entries are
+        inspected per bucket, so the cost does not grow with the document.
+
+        Args:
+            answer (str): Correct answer
+            count (int): Number of distractors wanted
+
+        Returns:
+            list: Up to `count` distinct words, none equal to the answer
+        """
+        features = self.features.get(answer) or (
+            guess_part_of_speech(answer), length_band(answer), frequency_band(1)
+        )
+        seed = zlib.crc32(answer.encode('utf-8'))
+        chosen = []
+        seen = {answer.lower()}
+        for key in (features, features[:2], features[:1], ()):
+            bucket = self.buckets.get(key)
+            if not bucket:
+                continue
+            start = seed % len(bucket)
+            # Enough probes to skip the answer and its case variants
+            for offset in range(min(len(bucket), count + 3)):
+                word = bucket[(start + offset) % len(bucket)]
+                if word.lower() in seen:
+                    continue
+                seen.add(word.lower())
+                chosen.append(word)
+                if len(chosen) == count:
+                    return chosen
+        return chosen
+
+
+class Document:
+    """
+    Lazily parsed view of a text.
+
+    Every property is computed on first access and then reused.
+    """
+
+    def __init__(self, text):
+        self.text = str(text)
+
+    def __str__(self):
+        return self.text
+
+    def __len__(self):
+        return len(self.text)
+
+    @cached_property
+    def sentences(self):
+        """Non-empty sentences, split on periods and stripped."""
+        return [sentence for sentence in (s.strip() for s in self.text.split('.')) if sentence]
+
+    @cached_property
+    def sentence_words(self):
+        """Whitespace-separated words of each sentence, aligned with sentences."""
+        return [sentence.split() for sentence in self.sentences]
+
+    @cached_property
+    def sentence_lowers(self):
+        """Lowercase form of each sentence, aligned with sentences."""
+        return [sentence.lower() for sentence in self.sentences]
+
+    @cached_property
+    def sentence_terms(self):
+        """Content-word tokens of each sentence (stop words removed), aligned with sentences."""
+        return [
+            [token for token in re.findall(r'\w+', lower) if len(token) > 2 and token not in STOP_WORDS]
+            for lower in self.sentence_lowers
+        ]
+
+    @cached_property
+    def words(self):
+        """Whitespace-separated words of the whole text, punctuation kept."""
+        return self.text.split()
+
+    @cached_property
+    def lower(self):
+        return self.text.lower()
+
+    @cached_property
+    def tokens(self):
+        """Lowercase word tokens with punctuation removed."""
+        return re.sub(r'[^\w\s]', ' ', self.lower).split()
+
+    @cached_property
+    def word_frequencies(self):
+        """Counts of content words (longer than 3 characters, not stop words)."""
+        return Counter(token for token in self.tokens if len(token) > 3 and token not in STOP_WORDS)
+
+    @cached_property
+    def vocabulary(self):
+        """Index of candidate answer words for quiz distractors."""
+        return VocabularyIndex(self.words)
+
+    @property
+    def word_count(self):
+        return len(self.words)
+
+
+def as_document(content):
+    """Return content as a Document, parsing it only if it is not one already."""
+    return content if isinstance(content, Document) else Document(content)
@@ -0,0 +1,119 @@
+"""
+Client side of the shared inference server.
+
+When AI_INFERENCE_MODE is 'remote', ai_utils forwards model-backed calls to a
+separate process started with `manage.py run_inference_server`, so web
+workers do not each hold their own copy of the models.
+"""
+from multiprocessing.connection import Client
+from django.conf import settings
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Models the inference server holds (registry names)
+SERVED_MODELS = ['summarization', 'question-answering', 'sentiment-analysis', 'embedding']
+
+# One connection per thread; connections are not safe to share
+_local = threading.local()
+
+
+def is_remote():
+    """Return True if inference should be delegated to the inference server."""
+    return getattr(settings, 'AI_INFERENCE_MODE', 'local') == 'remote'
+
+
+def parse_address(address):
+    """
+    Convert an address setting into a multiprocessing address.
+
+    Args:
+        address (str): "host:port" for TCP or a filesystem path for a Unix socket
+
+    Returns:
+        tuple or str: (host, port) tuple or socket path
+    """
+    host, sep, port = str(address).rpartition(':')
+    if sep and host and port.isdigit():
+        return (host, int(port))
+    return str(address)
+
+
+def get_authkey():
+    """Get the shared secret used to authenticate server connections."""
+    return str(getattr(settings, 'AI_INFERENCE_AUTHKEY', '')).encode('utf-8')
+
+
+def _get_connection():
+    connection = getattr(_local, 'connection', None)
+    if connection is None or connection.closed:
+        connection = Client(parse_address(settings.AI_INFERENCE_ADDRESS), authkey=get_authkey())
+        _local.connection = connection
+    return connection
+
+
+def _close_connection():
+    connection = getattr(_local, 'connection', None)
+    if connection is not None:
+        try:
+            connection.close()
+        except OSError:
+            pass
+    _local.connection = None
+
+
+def remote_call(function_name, *args, **kwargs):
+    """
+    Call an ai_utils function in the inference server process.
+
+    Args:
+        function_name (str): Name of the ai_utils function
+        *args: Positional arguments for the function
+        **kwargs: Keyword arguments for the function
+
+    Returns:
+        The function's return value
+
+    Raises:
+        ConnectionError: If the server cannot be reached
+        ModelUnavailableError: If the server could not load the model
+        RuntimeError: If the server reports another error
+    """
+    timeout = getattr(settings, 'AI_INFERENCE_TIMEOUT', 120)
+    request = (function_name, args, kwargs)
+
+    # Retry once on a stale connection (e.g. after a server restart)
+    for attempt in range(2):
+        try:
+            connection = _get_connection()
+            connection.send(request)
+            break
+        except (OSError, EOFError) as e:
+            _close_connection()
+            if attempt:
+                logger.error(f"Inference server unavailable: {e}")
+                raise ConnectionError(f"Inference server unavailable: {e}")
+
+    try:
+        if not connection.poll(timeout):
+            raise TimeoutError(f"Inference server did not answer within {timeout}s")
+        ok, payload = connection.recv()
+    except (OSError, EOFError) as e:
+        # The reply may still arrive later, so never reuse this connection
+        _close_connection()
+        raise ConnectionError(f"Inference server request failed: {e}")
+
+    if not ok:
+        raise _remote_error(payload)
+    return payload
+
+
+def _remote_error(payload):
+    """Rebuild the exception the server reported, so callers handle it as in local mode."""
+    from .ai_utils import ModelUnavailableError
+    if not isinstance(payload, dict):
+        return RuntimeError(payload)
+    if payload.get('type') == ModelUnavailableError.__name__:
+        return ModelUnavailableError(payload['error'])
+    return RuntimeError(payload.get('error'))
@@ -0,0 +1,113 @@
+"""
+Shared inference server.
+
+Holds one copy of the transformer models and serves the model-backed
+ai_utils functions to web workers over a Unix socket or localhost TCP.
+Start it with `python manage.py run_inference_server`.
+"""
+from multiprocessing.connection import Listener
+from django.conf import settings
+import logging
+import os
+import threading
+
+from . import ai_utils, semantic_search
+from .inference_client import SERVED_MODELS, parse_address, get_authkey
+from .registry import model_registry
+from .warmup import warm_models
+
+logger = logging.getLogger(__name__)
+
+# Functions that clients are allowed to call. These are the raising
+# variants, so failures reach the client as errors instead of results.
+REMOTE_FUNCTIONS = {
+    '_summarize_text': ai_utils._summarize_text,
+    '_summarize_texts': ai_utils._summarize_texts,
+    '_answer_question': ai_utils._answer_question,
+    '_answer_questions': ai_utils._answer_questions,
+    '_analyze_study_sentiment': ai_utils._analyze_study_sentiment,
+    '_analyze_sentiments': ai_utils._analyze_sentiments,
+    'embed_texts': semantic_search.embed_texts,
+    'model_status': model_registry.status,
+}
+
+
+class InferenceServer:
+    """
+    Accept client connections and run ai_utils calls on their behalf.
+
+    Each connection is served by its own thread, so requests from different
+    workers can share the summarization batcher.
+
+    Args:
+        address (str): "host:port" or Unix socket path
+        authkey (bytes): Shared secret clients must present
+    """
+
+    def __init__(self, address, authkey):
+        self.address = parse_address(address)
+        self.authkey = authkey
+
+    def preload(self):
+        """Load and warm every served model before accepting connections."""
+        warm_models(SERVED_MODELS)
+
+    def serve_forever(self):
+        """Listen for clients until interrupted."""
+        is_unix_socket = isinstance(self.address, str)
+        if is_unix_socket and os.path.exists(self.address):
+            os.unlink(self.address)
+
+        with Listener(self.address, authkey=self.authkey) as listener:
+            if is_unix_socket:
+                os.chmod(self.address, 0o600)
+            logger.info(f"Inference server listening on {self.address}")
+            while True:
+                try:
+                    connection = listener.accept()
+                except Exception as e:
+                    # Failed handshakes (e.g. wrong authkey) must not stop the server
+                    logger.warning(f"Rejected inference client: {e}")
+                    continue
+                threading.Thread(
+                    target=self._serve_connection,
+                    args=(connection,),
+                    daemon=True
+                ).start()
+
+    def _serve_connection(self, connection):
+        with connection:
+            while True:
+                try:
+                    function_name, args, kwargs = connection.recv()
+                except (EOFError, OSError):
+                    break
+                connection.send(self._dispatch(function_name, args, kwargs))
+
+    def _dispatch(self, function_name, args, kwargs):
+        """Run one call; errors are returned as (False, {'type': ..., 'error': ...})."""
+        function = REMOTE_FUNCTIONS.get(function_name)
+        if function is None:
+            return (False, {'type': 'RuntimeError', 'error': f"Unknown inference function: {function_name}"})
+        try:
+            return (True, function(*args, **kwargs))
+        except Exception as e:
+            logger.error(f"Inference server error in {function_name}: {e}")
+            return (False, {'type': type(e).__name__, 'error': str(e)})
+
+
+def run_server(address=None, preload=True):
+    """
+    Run the inference server in the current process.
+
+    Args:
+        address (str): Override for AI_INFERENCE_ADDRESS
+        preload (bool): Load models before accepting connections
+    """
+    # The server always runs models itself
+    settings.AI_INFERENCE_MODE = 'local'
+
+    server = InferenceServer(address or settings.AI_INFERENCE_ADDRESS, get_authkey())
+    if preload:
+        server.preload()
+    server.serve_forever()
@@ -0,0 +1,399 @@
+"""
+Asynchronous AI jobs backed by a database table.
+
+Heavy endpoints can be submitted as jobs instead of running inline on the
+request thread. A job row is created with the job type's priority and picked
+up by a local pool of worker threads (`manage.py run_ai_worker`, or threads
+inside the web process with AI_JOB_EMBEDDED_WORKERS). No external broker is
+needed.
+
+Workers claim the highest-priority runnable job with a compare-and-set
+UPDATE, so several workers and processes can share the table. Failed jobs are
+retried with exponential backoff, and a per-user cap on running jobs stops
+one user's long summaries from starving everyone else's cheap requests.
+"""
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+from datetime import timedelta
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+from . import ai_utils
+from .document import Document
+from .metrics import observe
+from .models import AIJob
+from .request_log import log_ai_request
+
+logger = logging.getLogger(__name__)
+
+# Priorities: higher runs first
+PRIORITY_HIGH = 10
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 0
+
+
+class JobInputError(ValueError):
+    """Raised for job payloads that can never succeed; these are not retried."""
+
+
+def _text(payload, *names):
+    for name in names:
+        value = payload.get(name)
+        if value:
+            return str(value)
+    raise JobInputError(f"{' or '.join(names)} is required")
+
+
+def _int(payload, name, default):
+    try:
+        return int(payload.get(name, default))
+    except (ValueError, TypeError):
+        return default
+
+
+def _run_summary(payload):
+    content = _text(payload, 'content', 'text')
+    summary = ai_utils._summarize_text(
+        content,
+        max_length=_int(payload, 'max_length', 150),
+        min_length=_int(payload, 'min_length', 50)
+    )
+    document = Document(content)
+    return {
+        'summary': summary,
+        'key_points': ai_utils.extract_key_points(document, num_points=3),
+        'word_count': document.word_count,
+        'summary_word_count': len(summary.split()),
+    }
+
+
+def _run_study_plan(payload):
+    topic = _text(payload, 'topic')
+    plan = ai_utils.generate_study_plan_text(
+        topic,
+        _int(payload, 'duration_days', 7),
+        payload.get('difficulty', 'intermediate')
+    )
+    return {'topic': topic, 'study_plan': plan}
+
+
+def _run_flashcards(payload):
+    content = _text(payload, 'content', 'text')
+    num_cards = min(max(_int(payload, 'num_cards', _int(payload, 'count', 5)), 1), 20)
+    return {'flashcards': ai_utils.generate_flashcard_questions(content, num_cards)}
+
+
+def _run_advice(payload):
+    return {'advice': ai_utils.generate_study_advice(
+        payload.get('current_topic', ''),
+        payload.get('struggles', '')
+    )}
+
+
+def _run_answer(payload):
+    return ai_utils._answer_question(_text(payload, 'question'), _text(payload, 'context', 'content'))
+
+
+def _run_answers(payload):
+    questions = payload.get('questions')
+    if not isinstance(questions, list) or not questions:
+        raise JobInputError('questions must be a non-empty list')
+    return {'answers': ai_utils._answer_questions(
+        [str(question) for question in questions],
+        _text(payload, 'context', 'content')
+    )}
+
+
+def _run_sentiment(payload):
+    return ai_utils._analyze_study_sentiment(_text(payload, 'text', 'content'))
+
+
+def _run_keywords(payload):
+    text = _text(payload, 'text', 'content')
+    return {'keywords': ai_utils.extract_keywords(text, _int(payload, 'num_keywords', 10))}
+
+
+def _run_quiz(payload):
+    content = _text(payload, 'content', 'text')
+    num_questions = _int(payload, 'num_questions', _int(payload, 'count', 5))
+    return {'quiz': ai_utils.generate_quiz_questions(content, num_questions)}
+
+
+def _run_note_artifacts(payload):
+    from .artifacts import refresh_artifacts
+    return refresh_artifacts(_int(payload, 'note_id', 0))
+
+
+# Job type -> handler and default priority. Handlers take the JSON payload
+# (the same fields as the matching synchronous endpoint) and return a JSON
+# result; they raise on failure so the job can be retried. Internal types are
+# queued by the server itself and cannot be submitted through the API.
+JOB_TYPES = {
+    'summary': {'handler': _run_summary, 'priority': PRIORITY_LOW},
+    'study-plan': {'handler': _run_study_plan, 'priority': PRIORITY_LOW},
+    'advice': {'handler': _run_advice, 'priority': PRIORITY_LOW},
+    'flashcards': {'handler': _run_flashcards, 'priority': PRIORITY_NORMAL},
+    'answer': {'handler': _run_answer, 'priority': PRIORITY_NORMAL},
+    'answers': {'handler': _run_answers, 'priority': PRIORITY_NORMAL},
+    'sentiment': {'handler': _run_sentiment, 'priority': PRIORITY_HIGH},
+    'keywords': {'handler': _run_keywords, 'priority': PRIORITY_HIGH},
+    'quiz': {'handler': _run_quiz, 'priority': PRIORITY_HIGH},
+    'note-artifacts': {'handler': _run_note_artifacts, 'priority': PRIORITY_LOW, 'internal': True},
+}
+
+
+def submit_job(user, job_type, payload, internal=False):
+    """
+    Queue an AI job.
+
+    Args:
+        user: Owner of the job
+        job_type (str): One of JOB_TYPES
+        payload (dict): Input fields for the job
+        internal (bool): Allow internal job types
+
+    Returns:
+        AIJob
+    """
+    if job_type not in JOB_TYPES or (JOB_TYPES[job_type].get('internal') and not internal):
+        public = [name for name, spec in JOB_TYPES.items() if not spec.get('internal')]
+        raise JobInputError(f"Unknown job type '{job_type}'. Choose from: {', '.join(public)}")
+    if not isinstance(payload, dict):
+        raise JobInputError('payload must be an object')
+    return AIJob.objects.create(
+        user=user,
+        job_type=job_type,
+        payload=payload,
+        priority=JOB_TYPES[job_type]['priority'],
+        max_attempts=getattr(settings, 'AI_JOB_MAX_ATTEMPTS', 3),
+        run_after=timezone.now()
+    )
+
+
+def claim_job(worker_id):
+    """
+    Claim the next runnable job for a worker.
+
+    Candidates are tried in priority order. A job is claimed by an UPDATE
+    that only matches while it is still queued, so two workers can never
+    claim the same job. If the claim pushes its user over
+    AI_JOB_USER_CONCURRENCY, it is released again and the next candidate
+    is tried.
+
+    Returns:
+        AIJob or None
+    """
+    user_cap = getattr(settings, 'AI_JOB_USER_CONCURRENCY', 2)
+    now = timezone.now()
+    candidates = (
+        AIJob.objects
+        .filter(status=AIJob.QUEUED, run_after__lte=now)
+        .order_by('-priority', 'run_after', 'id')
+        .values_list('id', 'user_id')[:20]
+    )
+
+    busy_users = set()
+    for job_id, user_id in candidates:
+        if user_id in busy_users:
+            continue
+        claimed = AIJob.objects.filter(id=job_id, status=AIJob.QUEUED).update(
+            status=AIJob.RUNNING,
+            worker=worker_id,
+            started_at=now,
+            attempts=F('attempts') + 1
+        )
+        if not claimed:
+            continue
+
+        if user_cap and user_id is not None:
+            running = AIJob.objects.filter(user_id=user_id, status=AIJob.RUNNING).count()
+            if running > user_cap:
+                AIJob.objects.filter(id=job_id, worker=worker_id, status=AIJob.RUNNING).update(
+                    status=AIJob.QUEUED,
+                    worker='',
+                    started_at=None,
+                    attempts=F('attempts') - 1
+                )
+                busy_users.add(user_id)
+                continue
+
+        job = AIJob.objects.get(id=job_id)
+        observe('ai_queue_wait_seconds', max((now - job.run_after).total_seconds(), 0), queue='jobs')
+        return job
+    return None
+
+
+def run_job(job):
+    """
+    Run a claimed job and record its result, retry or failure.
+
+    Args:
+        job (AIJob): A job in the running state
+    """
+    handler = JOB_TYPES[job.job_type]['handler'] if job.job_type in JOB_TYPES else None
+    try:
+        if handler is None:
+            raise JobInputError(f"Unknown job type '{job.job_type}'")
+        result = handler(job.payload)
+    except Exception as e:
+        retry = not isinstance(e, JobInputError) and job.attempts < job.max_attempts
+        logger.error(f"AI job {job.id} ({job.job_type}) attempt {job.attempts} failed: {e}")
+        if retry:
+            delay = getattr(settings, 'AI_JOB_RETRY_DELAY', 2) * 2 ** (job.attempts - 1)
+            AIJob.objects.filter(id=job.id).update(
+                status=AIJob.QUEUED,
+                worker='',
+                error=str(e),
+                run_after=timezone.now() + timedelta(seconds=delay)
+            )
+        else:
+            AIJob.objects.filter(id=job.id).update(
+                status=AIJob.FAILED,
+                error=str(e),
+                finished_at=timezone.now()
+            )
+        return
+
+    AIJob.objects.filter(id=job.id).update(
+        status=AIJob.SUCCEEDED,
+        result=result,
+        error='',
+        finished_at=timezone.now()
+    )
+
+    if JOB_TYPES[job.job_type].get('internal'):
+        return
+
+    # Log the AI request like the synchronous endpoints do
+    log_ai_request(
+        user=job.user_id,
+        endpoint=f"job:{job.job_type}",
+        prompt=f"Job {job.id} ({job.job_type}): {str(job.payload)[:200]}...",
+        response=result,
+        latency_ms=round((timezone.now() - job.started_at).total_seconds() * 1000, 1) if job.started_at else None,
+        input_size=len(json.dumps(job.payload, default=str))
+    )
+
+
+def requeue_stale_jobs():
+    """
+    Return jobs stuck in the running state (e.g. after a worker crash) to the queue.
+
+    Jobs that have used all their attempts are marked failed instead, so a
+    job that crashes its worker is not retried forever.
+
+    Returns:
+        int: Number of jobs requeued
+    """
+    timeout = getattr(settings, 'AI_JOB_TIMEOUT', 600)
+    now = timezone.now()
+    stale = AIJob.objects.filter(status=AIJob.RUNNING, started_at__lt=now - timedelta(seconds=timeout))
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=AIJob.FAILED,
+        error='Worker timed out',
+        finished_at=now
+    )
+    return stale.filter(attempts__lt=F('max_attempts')).update(
+        status=AIJob.QUEUED,
+        worker='',
+        error='Worker timed out',
+        run_after=now
+    )
+
+
+class WorkerPool:
+    """
+    Threads that claim and run AI jobs until stopped.
+
+    Threads share this process's model registry, so models are loaded once
+    per pool rather than once per worker thread.
+    """
+
+    def __init__(self, concurrency=1, poll_interval=0.5, name=None):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        requeue_stale_jobs()
+        for index in range(self.concurrency):
+            thread = threading.Thread(
+                target=self._work,
+                args=(f"{self.name}-{index}",),
+                name=f'ai-job-worker-{index}',
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Started {self.concurrency} AI job worker(s) as {self.name}")
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def run_forever(self):
+        self.start()
+        try:
+            while any(thread.is_alive() for thread in self._threads):
+                self._stop.wait(60)
+                if not self._stop.is_set():
+                    requeue_stale_jobs()
+        finally:
+            self.stop()
+
+    def _work(self, worker_id):
+        while not self._stop.is_set():
+            close_old_connections()
+            try:
+                job = claim_job(worker_id)
+                if job is not None:
+                    run_job(job)
+            except Exception as e:
+                logger.error(f"AI job worker {worker_id} error: {e}")
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_interval)
+        close_old_connections()
+
+
+def start_embedded_workers():
+    """
+    Start job workers inside the web process when AI_JOB_EMBEDDED_WORKERS is set.
+
+    Called from core/wsgi.py and core/asgi.py. Returns the pool, or None.
+    """
+    concurrency = getattr(settings, 'AI_JOB_EMBEDDED_WORKERS', 0)
+    if not concurrency:
+        return None
+    pool = WorkerPool(concurrency=concurrency, poll_interval=getattr(settings, 'AI_JOB_POLL_INTERVAL', 0.5))
+    pool.start()
+    return pool
+
+
+def wait_for_job(job, timeout):
+    """
+    Long-poll a job until it finishes or the timeout passes.
+
+    Args:
+        job (AIJob): Job to watch
+        timeout (float): Seconds to wait at most
+
+    Returns:
+        AIJob: The job, refreshed from the database
+    """
+    deadline = time.monotonic() + timeout
+    interval = 0.1
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(min(interval, max(0, deadline - time.monotonic())))
+        interval = min(interval * 2, 1.0)
+        job.refresh_from_db()
+    return job
@@ -0,0 +1,167 @@
+"""
+Token-aware map-reduce summarization for documents longer than the model's
+input limit.
+
+The document is streamed sentence by sentence into chunks that fit the model
+exactly (measured with its tokenizer). Chunks are summarized in small
+batches and the partial summaries are reduced level by level, so memory
+stays bounded by a few chunks per level regardless of input length.
+"""
+import itertools
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# A sentence is a run of text ending in ., ! or ? (or the end of the text)
+SENTENCE_PATTERN = re.compile(r'[^.!?]+(?:[.!?]+|$)')
+
+
+def iter_sentences(text):
+    """Yield stripped sentences from text without building a list of them."""
+    for match in SENTENCE_PATTERN.finditer(text):
+        sentence = match.group(0).strip()
+        if sentence:
+            yield sentence
+
+
+class TokenChunker:
+    """
+    Pack sentences into chunks of at most max_tokens model tokens.
+
+    Args:
+        tokenizer: Hugging Face tokenizer of the summarization model
+        max_tokens (int): Token budget per chunk, excluding special tokens
+    """
+
+    def __init__(self, tokenizer, max_tokens):
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+
+    def count(self, text):
+        """Count model tokens in text."""
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def _split_long_sentence(self, sentence):
+        """Cut a sentence longer than the budget on token boundaries."""
+        ids = self.tokenizer.encode(sentence, add_special_tokens=False)
+        for start in range(0, len(ids), self.max_tokens):
+            window = ids[start:start + self.max_tokens]
+            yield self.tokenizer.decode(window, skip_special_tokens=True).strip(), len(window)
+
+    def iter_chunks(self, pieces):
+        """
+        Pack text pieces into chunks.
+
+        Args:
+            pieces (iterable): Sentences (or partial summaries) in document order
+
+        Yields:
+            tuple: (chunk_text, token_count)
+        """
+        current, current_tokens = [], 0
+        for piece in pieces:
+            tokens = self.count(piece)
+            parts = self._split_long_sentence(piece) if tokens > self.max_tokens else [(piece, tokens)]
+            for part, part_tokens in parts:
+                if current and current_tokens + part_tokens > self.max_tokens:
+                    yield ' '.join(current), current_tokens
+                    current, current_tokens = [], 0
+                current.append(part)
+                current_tokens += part_tokens
+        if current:
+            yield ' '.join(current), current_tokens
+
+
+def condense_document(content, chunker, summarize_many, max_length=150, min_length=50, batch_size=4):
+    """
+    Reduce content of any length to a single chunk of partial summaries.
+
+    Args:
+        content (str): Text to summarize
+        chunker (TokenChunker): Chunker built from the model's tokenizer
+        summarize_many (callable): Takes a list of texts plus max_length and
+            min_length keyword arguments and returns their summaries
+        max_length (int): Maximum length of the final summary
+        min_length (int): Minimum length of the final summary
+        batch_size (int): Chunks summarized per model call in the map stage
+
+    Returns:
+        tuple: (text, token_count) that fits in one model input, in document order
+    """
+    # levels[n] holds partial summaries that have been reduced n times. The
+    # highest level covers the earliest part of the document.
+    levels = []
+
+    # Partial summaries are kept short enough that several fit in one chunk,
+    # which guarantees every reduce round shrinks the text
+    partial_length = max(1, min(max_length, chunker.max_tokens // 4))
+    partial_min_length = min(min_length, partial_length)
+
+    def condense(texts):
+        """Summarize chunks, keeping ones already shorter than a summary."""
+        results = [None] * len(texts)
+        to_summarize = []
+        for index, (text, tokens) in enumerate(texts):
+            if tokens <= partial_length:
+                results[index] = text
+            else:
+                to_summarize.append(index)
+        if to_summarize:
+            summaries = summarize_many(
+                [texts[index][0] for index in to_summarize],
+                max_length=partial_length,
+                min_length=partial_min_length
+            )
+            for index, summary in zip(to_summarize, summaries):
+                results[index] = summary
+        return results
+
+    def push(level, summary):
+        """Add a partial summary, reducing the level once it fills a chunk."""
+        if level == len(levels):
+            levels.append([])
+        buffer = levels[level]
+        tokens = chunker.count(summary)
+        if buffer and sum(t for _, t in buffer) + tokens > chunker.max_tokens:
+            merged = ' '.join(text for text, _ in buffer)
+            levels[level] = []
+            push(level + 1, condense([(merged, chunker.max_tokens)])[0])
+        levels[level].append((summary, tokens))
+
+    # Map: summarize the chunks a few at a time
+    chunks = chunker.iter_chunks(iter_sentences(content))
+    while True:
+        batch = list(itertools.islice(chunks, batch_size))
+        if not batch:
+            break
+        for summary in condense(batch):
+            push(0, summary)
+
+    # Reduce whatever is left, earliest content first
+    pieces = [text for buffer in reversed(levels) for text, _ in buffer]
+    while True:
+        packed = list(chunker.iter_chunks(pieces))
+        if len(packed) <= 1:
+            break
+        pieces = condense(packed)
+
+    return packed[0] if packed else ('', 0)
+
+
+def summarize_long_text(content, chunker, summarize_many, max_length=150, min_length=50, batch_size=4):
+    """
+    Summarize content of any length with map-reduce.
+
+    Takes the same arguments as condense_document.
+
+    Returns:
+        str: Summary of the whole document
+    """
+    final_text, final_tokens = condense_document(
+        content, chunker, summarize_many,
+        max_length=max_length, min_length=min_length, batch_size=batch_size
+    )
+    if final_tokens <= min_length:
+        return final_text
+    return summarize_many([final_text], max_length=max_length, min_length=min_length)[0]
@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from datetime import timedelta
+from pathlib import Path
+import gzip
+import json
+import os
+
+from analytics.rollups import update_ai_usage_rollups
+from study.models import AIRequestLog
+
+ARCHIVED_FIELDS = (
+    'id', 'user_id', 'endpoint', 'model', 'prompt', 'response', 'status', 'latency_ms',
+    'input_size', 'output_size', 'cache_hit', 'created_at',
+)
+
+
+class Command(BaseCommand):
+    help = 'Move AI request logs older than the retention period to compressed JSONL files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help='Keep logs newer than this many days (default AI_LOG_RETENTION_DAYS)'
+        )
+        parser.add_argument('--output-dir', default=None, help='Archive directory (default AI_LOG_ARCHIVE_DIR)')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows archived and deleted per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be archived')
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else getattr(settings, 'AI_LOG_RETENTION_DAYS', 90)
+        cutoff = timezone.now() - timedelta(days=days)
+        old_logs = AIRequestLog.objects.filter(created_at__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f"{old_logs.count()} logs older than {cutoff:%Y-%m-%d %H:%M} would be archived")
+            return
+
+        # Count the logs in the usage rollups before they leave the table
+        while update_ai_usage_rollups():
+            pass
+
+        directory = Path(options['output_dir'] or getattr(settings, 'AI_LOG_ARCHIVE_DIR', 'ai_log_archive'))
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"ai_logs_{timezone.now():%Y%m%dT%H%M%S}.jsonl.gz"
+
+        total = 0
+        with gzip.open(path, 'at', encoding='utf-8') as archive:
+            while True:
+                rows = list(old_logs.order_by('id').values(*ARCHIVED_FIELDS)[:options['chunk_size']])
+                if not rows:
+                    break
+                for row in rows:
+                    archive.write(json.dumps(row, default=str, ensure_ascii=False) + '\n')
+                # Rows are only deleted once they are safely on disk
+                archive.flush()
+                os.fsync(archive.fileno())
+                with transaction.atomic():
+                    AIRequestLog.objects.filter(id__in=[row['id'] for row in rows]).delete()
+                total += len(rows)
+                self.stdout.write(f"archived {total} logs")
+
+        if not total:
+            path.unlink()
+            self.stdout.write('No logs to archive')
+            return
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} logs older than {cutoff:%Y-%m-%d} to {path}"))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ai.semantic_search import index_notes, note_text
+from ai.vector_index import get_user_index
+from study.models import StudyNote
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the semantic search indexes of study notes from the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', help='Only rebuild this user id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=64, help='Notes embedded per call')
+
+    def handle(self, *args, **options):
+        notes = StudyNote.objects.order_by('user_id', 'id')
+        if options['user']:
+            notes = notes.filter(user_id__in=options['user'])
+        user_ids = options['user'] or list(notes.order_by('user_id').values_list('user_id', flat=True).distinct())
+
+        for user_id in user_ids:
+            get_user_index(user_id).clear()
+            batch, total = [], 0
+            for note in notes.filter(user_id=user_id).iterator():
+                batch.append((note.id, note_text(note)))
+                if len(batch) >= options['batch_size']:
+                    total += self._index(user_id, batch)
+                    batch = []
+            total += self._index(user_id, batch)
+            self.stdout.write(self.style.SUCCESS(f"user {user_id}: indexed {total} notes"))
+
+    def _index(self, user_id, batch):
+        try:
+            index_notes(user_id, batch)
+        except Exception as e:
+            raise CommandError(f"Failed to index notes of user {user_id}: {e}")
+        return len(batch)
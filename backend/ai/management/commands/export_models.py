@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ai.backends import BACKENDS, TORCH, get_backend, export_model
+from ai.registry import DEFAULT_MODELS
+
+
+class Command(BaseCommand):
+    help = 'Convert AI models for their configured inference backend and store the artifacts locally'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models',
+            nargs='*',
+            help=f"Models to export (defaults to all). Choices: {', '.join(DEFAULT_MODELS)}"
+        )
+        parser.add_argument(
+            '--backend',
+            choices=BACKENDS,
+            help='Export for this backend instead of the one configured in AI_MODEL_BACKENDS'
+        )
+        parser.add_argument('--force', action='store_true', help='Re-export existing artifacts')
+
+    def handle(self, *args, **options):
+        names = options['models'] or list(DEFAULT_MODELS)
+        unknown = [name for name in names if name not in DEFAULT_MODELS]
+        if unknown:
+            raise CommandError(f"Unknown models: {', '.join(unknown)}")
+
+        for name in names:
+            backend = options['backend'] or get_backend(name)
+            if backend == TORCH:
+                self.stdout.write(f"{name}: torch backend needs no export")
+                continue
+            try:
+                path = export_model(name, DEFAULT_MODELS[name], backend, force=options['force'])
+            except Exception as e:
+                raise CommandError(f"Failed to export {name} for {backend}: {e}")
+            self.stdout.write(self.style.SUCCESS(f"{name}: {backend} artifacts in {path}"))
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ai.jobs import WorkerPool
+
+
+class Command(BaseCommand):
+    help = 'Run a pool of worker threads that process queued AI jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=getattr(settings, 'AI_JOB_WORKER_CONCURRENCY', 2),
+            help='Number of worker threads (defaults to AI_JOB_WORKER_CONCURRENCY)'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=getattr(settings, 'AI_JOB_POLL_INTERVAL', 0.5),
+            help='Seconds to wait between polls when the queue is empty'
+        )
+
+    def handle(self, *args, **options):
+        pool = WorkerPool(concurrency=options['concurrency'], poll_interval=options['poll_interval'])
+        self.stdout.write(f"Starting {options['concurrency']} AI job worker(s)...")
+        try:
+            pool.run_forever()
+        except KeyboardInterrupt:
+            pool.stop(timeout=5)
+            self.stdout.write(self.style.SUCCESS('AI job workers stopped'))
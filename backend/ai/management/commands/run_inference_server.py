@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ai.inference_server import run_server
+
+
+class Command(BaseCommand):
+    help = 'Run the shared inference server that holds the AI models for all web workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--address',
+            help='"host:port" or Unix socket path (defaults to AI_INFERENCE_ADDRESS)'
+        )
+        parser.add_argument(
+            '--no-preload',
+            action='store_true',
+            help='Load models on first use instead of at startup'
+        )
+
+    def handle(self, *args, **options):
+        address = options['address'] or settings.AI_INFERENCE_ADDRESS
+        self.stdout.write(f"Starting inference server on {address}...")
+        try:
+            run_server(address=address, preload=not options['no_preload'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS('Inference server stopped'))
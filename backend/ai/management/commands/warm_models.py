@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ai.registry import model_registry
+from ai.warmup import warm_models, get_preload_models
+
+
+class Command(BaseCommand):
+    help = 'Load the AI models and run a warm-up inference through each one'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models',
+            nargs='*',
+            help=f"Models to warm (defaults to AI_PRELOAD_MODELS). Choices: {', '.join(model_registry.names())}"
+        )
+
+    def handle(self, *args, **options):
+        names = options['models'] or get_preload_models()
+        unknown = [name for name in names if name not in model_registry.names()]
+        if unknown:
+            raise CommandError(f"Unknown models: {', '.join(unknown)}")
+
+        failed = []
+        for name, result in warm_models(names).items():
+            if result['status'] == 'ready':
+                self.stdout.write(self.style.SUCCESS(
+                    f"{name}: ready (load {result['load_seconds']}s, warm-up {result['warmup_seconds']}s)"
+                ))
+            else:
+                failed.append(name)
+                self.stdout.write(self.style.ERROR(f"{name}: failed - {result['error']}"))
+
+        if failed:
+            raise CommandError(f"Failed to warm: {', '.join(failed)}")
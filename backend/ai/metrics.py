@@ -0,0 +1,429 @@
+"""
+Latency and throughput metrics for the AI features.
+
+Counters and histograms are kept in memory per process. With AI_METRICS_DIR
+set, each process also writes its values to its own JSON file in that
+directory every few seconds, and `/metrics` sums the files of all processes,
+so the numbers cover every web and job worker on the host. A process removes
+its file when it exits, and files of processes that are no longer running
+(e.g. after a crash) are skipped and removed when collecting, so a reused
+pid never inherits a dead worker's values. The output is the Prometheus
+text exposition format.
+
+Recorded:
+- ai_utils function latency and errors
+- AI endpoint latency and responses by status
+- model load time
+- queue wait (summary batcher, background jobs)
+- tokenization and forward-pass time per model
+- input and output tokens per model call
+- calls coalesced into an identical in-flight call
+"""
+from django.conf import settings
+from pathlib import Path
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+COUNTER = 'counter'
+HISTOGRAM = 'histogram'
+
+# Metric name -> (type, help text, histogram buckets)
+METRICS = {
+    'ai_function_seconds': (HISTOGRAM, 'Latency of ai_utils functions', LATENCY_BUCKETS),
+    'ai_function_errors_total': (COUNTER, 'ai_utils calls that failed', None),
+    'ai_request_seconds': (HISTOGRAM, 'Latency of AI endpoints', LATENCY_BUCKETS),
+    'ai_requests_total': (COUNTER, 'AI endpoint responses by status code', None),
+    'ai_model_load_seconds': (HISTOGRAM, 'Time to load a model', LATENCY_BUCKETS),
+    'ai_queue_wait_seconds': (HISTOGRAM, 'Time work waited in a queue before running', LATENCY_BUCKETS),
+    'ai_tokenize_seconds': (HISTOGRAM, 'Time spent tokenizing model inputs', LATENCY_BUCKETS),
+    'ai_forward_seconds': (HISTOGRAM, 'Time spent in model forward passes', LATENCY_BUCKETS),
+    'ai_input_tokens': (HISTOGRAM, 'Input tokens per model call', TOKEN_BUCKETS),
+    'ai_output_tokens': (HISTOGRAM, 'Output tokens per model call', TOKEN_BUCKETS),
+    'ai_coalesced_total': (COUNTER, 'Calls that shared an identical call already in flight', None),
+    'ai_log_dropped_total': (COUNTER, 'AI request log records dropped instead of written', None),
+}
+
+
+class MetricsRegistry:
+    """Thread-safe in-process counters and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        self._last_flush = time.monotonic()
+
+    def inc(self, name, amount=1, **labels):
+        """Add to a counter."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        self._maybe_flush()
+
+    def observe(self, name, value, **labels):
+        """Record one observation in a histogram."""
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    state['buckets'][index] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+        self._maybe_flush()
+
+    def snapshot(self):
+        """Values of this process as a JSON-serializable list."""
+        with self._lock:
+            return [
+                {
+                    'name': name,
+                    'labels': dict(labels),
+                    'value': value if not isinstance(value, dict) else {
+                        'buckets': list(value['buckets']), 'sum': value['sum'], 'count': value['count']
+                    },
+                }
+                for (name, labels), value in self._values.items()
+            ]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def _file(self):
+        directory = getattr(settings, 'AI_METRICS_DIR', '')
+        return Path(directory) / f"ai-metrics-{os.getpid()}.json" if directory else None
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= getattr(settings, 'AI_METRICS_FLUSH_INTERVAL', 5):
+            self.flush()
+
+    def flush(self):
+        """Write this process's values to AI_METRICS_DIR (no-op if unset)."""
+        self._last_flush = time.monotonic()
+        path = self._file()
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = path.with_suffix('.tmp')
+            temporary.write_text(json.dumps(self.snapshot()))
+            os.replace(temporary, path)
+        except OSError as e:
+            logger.error(f"Could not write AI metrics to {path}: {e}")
+
+    def close(self):
+        """Remove this process's file at exit, so its values are no longer reported."""
+        path = self._file()
+        if path is None:
+            return
+        try:
+            path.unlink(missing_ok=True)
+        except OSError as e:
+            logger.error(f"Could not remove AI metrics file {path}: {e}")
+
+    def collect(self):
+        """
+        Merge the values of all running processes.
+
+        Returns:
+            dict: (name, labels) -> counter value or histogram state
+        """
+        snapshots = [self.snapshot()]
+        own_file = self._file()
+        if own_file is not None and own_file.parent.exists():
+            for path in own_file.parent.glob('ai-metrics-*.json'):
+                if path == own_file:
+                    continue
+                if not _process_running(path.stem.rsplit('-', 1)[-1]):
+                    path.unlink(missing_ok=True)
+                    continue
+                try:
+                    snapshots.append(json.loads(path.read_text()))
+                except (OSError, ValueError):
+                    continue  # being replaced or removed
+
+        merged = {}
+        for snapshot in snapshots:
+            for item in snapshot:
+                if item['name'] not in METRICS:
+                    continue
+                key = (item['name'], tuple(sorted(item['labels'].items())))
+                value = item['value']
+                if not isinstance(value, dict):
+                    merged[key] = merged.get(key, 0) + value
+                    continue
+                state = merged.setdefault(
+                    key, {'buckets': [0] * len(value['buckets']), 'sum': 0.0, 'count': 0}
+                )
+                state['buckets'] = [a + b for a, b in zip(state['buckets'], value['buckets'])]
+                state['sum'] += value['sum']
+                state['count'] += value['count']
+        return merged
+
+
+def _process_running(pid):
+    """True if a process with this pid exists on this host."""
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True  # running as another user
+    return True
+
+
+metrics_registry = MetricsRegistry()
+atexit.register(metrics_registry.close)
+
+inc = metrics_registry.inc
+observe = metrics_registry.observe
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def render_prometheus():
+    """
+    Render the merged metrics of all processes in Prometheus text format.
+
+    Returns:
+        str
+    """
+    merged = metrics_registry.collect()
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        series = sorted(
+            ((labels, value) for (metric, labels), value in merged.items() if metric == name),
+            key=lambda item: item[0]
+        )
+        if not series:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in series:
+            if kind == COUNTER:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, value['buckets']):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {value['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {value['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+    return '\n'.join(lines) + '\n'
+
+
+def record_error(function_name):
+    """Count a failed ai_utils call (for functions that return a fallback instead of raising)."""
+    inc('ai_function_errors_total', function=function_name)
+
+
+def instrumented(function_name):
+    """
+    Time an ai_utils function and count the exceptions it raises.
+
+    Generator functions are timed until they are exhausted.
+    """
+    def decorator(func):
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    yield from func(*args, **kwargs)
+                except Exception:
+                    record_error(function_name)
+                    raise
+                finally:
+                    observe('ai_function_seconds', time.perf_counter() - start, function=function_name)
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                record_error(function_name)
+                raise
+            finally:
+                observe('ai_function_seconds', time.perf_counter() - start, function=function_name)
+        return wrapper
+    return decorator
+
+
+# Measurements of the AI endpoint request being handled (see instrument_view)
+_request_context = contextvars.ContextVar('ai_request_context', default=None)
+
+
+class RequestContext:
+    """What one AI endpoint request did, for its AIRequestLog row."""
+
+    def __init__(self, endpoint, input_size=None):
+        self.endpoint = endpoint
+        self.input_size = input_size
+        self.start = time.perf_counter()
+        self.models = set()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.logged = False
+
+    @property
+    def latency_ms(self):
+        return round((time.perf_counter() - self.start) * 1000, 1)
+
+    @property
+    def cache_hit(self):
+        """True if every cache lookup hit, False if any missed, None without lookups."""
+        if not self.cache_hits + self.cache_misses:
+            return None
+        return not self.cache_misses
+
+
+def request_context():
+    """The RequestContext of the AI request being handled, or None."""
+    return _request_context.get()
+
+
+def record_cache_lookup(hit):
+    context = _request_context.get()
+    if context is not None:
+        if hit:
+            context.cache_hits += 1
+        else:
+            context.cache_misses += 1
+
+
+def record_model_use(model_id):
+    context = _request_context.get()
+    if context is not None:
+        context.models.add(model_id)
+
+
+def instrument_view(endpoint):
+    """
+    Record latency and response status of an AI endpoint.
+
+    Error responses the view did not log itself are logged to AIRequestLog.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            try:
+                input_size = int(request.META.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                input_size = None
+            context = RequestContext(endpoint, input_size)
+            token = _request_context.set(context)
+            status_code = 500
+            response = None
+            try:
+                response = view(request, *args, **kwargs)
+                status_code = response.status_code
+                return response
+            finally:
+                observe('ai_request_seconds', time.perf_counter() - context.start, endpoint=endpoint)
+                inc('ai_requests_total', endpoint=endpoint, status=str(status_code))
+                if status_code >= 400 and not context.logged:
+                    from .request_log import log_failed_request
+                    log_failed_request(request, response, status_code)
+                _request_context.reset(token)
+        return wrapper
+    return decorator
+
+
+def count_tokens(ids):
+    """Number of token ids in a list, nested list or tensor."""
+    shape = getattr(ids, 'shape', None)
+    if shape is not None:
+        total = 1
+        for size in shape:
+            total *= int(size)
+        return total
+    if ids and isinstance(ids[0], (list, tuple)):
+        return sum(len(row) for row in ids)
+    return len(ids)
+
+
+def _record_tokens(metric, model_name, output, keys):
+    if isinstance(output, dict):
+        for key in keys:
+            if key in output:
+                observe(metric, count_tokens(output[key]), model=model_name)
+                return
+
+
+def _timed_stage(method, metric, model_name, token_metric, token_keys):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        output = method(*args, **kwargs)
+        if inspect.isgenerator(output):
+            # Chunked pipelines (question answering) yield one input per chunk
+            return _timed_generator(output, metric, model_name, token_metric, token_keys, start)
+        observe(metric, time.perf_counter() - start, model=model_name)
+        _record_tokens(token_metric, model_name, output, token_keys)
+        return output
+    return wrapper
+
+
+def _timed_generator(generator, metric, model_name, token_metric, token_keys, start):
+    elapsed = 0.0
+    try:
+        while True:
+            try:
+                item = next(generator)
+            except StopIteration:
+                return
+            elapsed += time.perf_counter() - start
+            _record_tokens(token_metric, model_name, item, token_keys)
+            yield item
+            start = time.perf_counter()
+    finally:
+        observe(metric, elapsed, model=model_name)
+
+
+def instrument_pipeline(model_name, pipe):
+    """
+    Time tokenization and forward passes of a transformers pipeline.
+
+    Wraps the pipeline's preprocess (tokenization) and _forward (model)
+    stages on the instance and records token counts from their outputs.
+
+    Returns:
+        The same pipeline
+    """
+    stages = (
+        ('preprocess', 'ai_tokenize_seconds', 'ai_input_tokens', ('input_ids',)),
+        ('_forward', 'ai_forward_seconds', 'ai_output_tokens', ('output_ids', 'generated_sequence')),
+    )
+    for method_name, metric, token_metric, token_keys in stages:
+        method = getattr(pipe, method_name, None)
+        if method is not None:
+            setattr(pipe, method_name, _timed_stage(method, metric, model_name, token_metric, token_keys))
+    return pipe
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0001_initial'),
+        ('study', '0002_note_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteArtifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('summary', 'Summary'), ('key_points', 'Key points'), ('keywords', 'Keywords'), ('sentiment', 'Sentiment'), ('embedding', 'Embedding')], max_length=20)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('model_version', models.CharField(max_length=255)),
+                ('value', models.JSONField()),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('note', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ai_artifacts', to='study.studynote')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('note', 'kind'), name='ai_artifact_note_kind_unique')],
+            },
+        ),
+    ]
@@ -1,3 +1,80 @@
 from django.db import models
+from django.conf import settings
 
-# Create your models here.
+
+class AIJob(models.Model):
+    """An AI request queued for the local worker pool (see ai/jobs.py)."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='ai_jobs', null=True)
+    job_type = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True, default='')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    priority = models.SmallIntegerField(default=0)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    worker = models.CharField(max_length=100, blank=True, default='')
+    run_after = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', '-priority', 'run_after'], name='ai_job_claim_idx'),
+            models.Index(fields=['user', 'status'], name='ai_job_user_status_idx'),
+        ]
+
+    @property
+    def finished(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    def __str__(self):
+        return f"AIJob {self.id} {self.job_type} ({self.status})"
+
+
+class NoteArtifact(models.Model):
+    """
+    An AI result derived from a study note (see ai/artifacts.py).
+
+    content_hash and model_version record what the value was computed from;
+    it is served only while both still match the note and the current model.
+    """
+    SUMMARY = 'summary'
+    KEY_POINTS = 'key_points'
+    KEYWORDS = 'keywords'
+    SENTIMENT = 'sentiment'
+    EMBEDDING = 'embedding'
+    KIND_CHOICES = [
+        (SUMMARY, 'Summary'),
+        (KEY_POINTS, 'Key points'),
+        (KEYWORDS, 'Keywords'),
+        (SENTIMENT, 'Sentiment'),
+        (EMBEDDING, 'Embedding'),
+    ]
+
+    note = models.ForeignKey('study.StudyNote', on_delete=models.CASCADE, related_name='ai_artifacts')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    content_hash = models.CharField(max_length=64)
+    model_version = models.CharField(max_length=255)
+    value = models.JSONField()
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['note', 'kind'], name='ai_artifact_note_kind_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} of note {self.note_id}"
@@ -0,0 +1,267 @@
+"""
+Sliding-window extractive question answering over long contexts.
+
+The context is tokenized once. Overlapping windows of it are paired with the
+question, run through the QA model as one padded batch, and the best-scoring
+answer span across all windows is returned together with the window it came
+from. Work grows linearly with the context length.
+
+Several questions about the same context share one tokenization and one
+batch, and tokenized contexts are kept in a small LRU cache keyed by a hash
+of the text, so follow-up questions skip tokenization.
+"""
+from collections import OrderedDict
+from django.conf import settings
+import hashlib
+import logging
+import threading
+import time
+
+import numpy as np
+
+from .metrics import observe
+
+logger = logging.getLogger(__name__)
+
+# Placeholder used to locate where the context starts inside a model input
+_CONTEXT_MARKER = -1
+
+
+def encode_context(tokenizer, context):
+    """
+    Tokenize a context once, keeping character offsets for each token.
+
+    Returns:
+        dict: 'input_ids' and 'offsets' lists
+    """
+    start = time.perf_counter()
+    encoding = tokenizer(context, add_special_tokens=False, return_offsets_mapping=True)
+    observe('ai_tokenize_seconds', time.perf_counter() - start, model='question-answering')
+    return {'input_ids': encoding['input_ids'], 'offsets': encoding['offset_mapping']}
+
+
+class EncodedContextCache:
+    """
+    LRU cache of tokenized contexts.
+
+    Keys combine the tokenizer's name with a SHA-256 of the context, so a
+    model swap never reuses another vocabulary's ids.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, tokenizer, context):
+        """Return the encoding of a context, tokenizing it on a miss."""
+        key = (
+            getattr(tokenizer, 'name_or_path', ''),
+            hashlib.sha256(context.encode('utf-8')).hexdigest()
+        )
+        with self._lock:
+            encoded = self._entries.get(key)
+            if encoded is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return encoded
+            self.misses += 1
+
+        encoded = encode_context(tokenizer, context)
+        with self._lock:
+            self._entries[key] = encoded
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return encoded
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_context_cache = None
+_context_cache_lock = threading.Lock()
+
+
+def get_context_cache():
+    """Get the process-wide encoded context cache."""
+    global _context_cache
+    if _context_cache is None:
+        with _context_cache_lock:
+            if _context_cache is None:
+                _context_cache = EncodedContextCache(
+                    max_entries=getattr(settings, 'AI_QA_CONTEXT_CACHE_SIZE', 64)
+                )
+    return _context_cache
+
+
+def context_windows(num_tokens, window_size, stride):
+    """
+    Split token positions into overlapping windows.
+
+    Args:
+        num_tokens (int): Number of context tokens
+        window_size (int): Context tokens per window
+        stride (int): Tokens shared by consecutive windows
+
+    Returns:
+        list: (start, end) token ranges covering every token
+    """
+    step = max(1, window_size - stride)
+    windows = []
+    start = 0
+    while True:
+        end = min(start + window_size, num_tokens)
+        windows.append((start, end))
+        if end >= num_tokens:
+            return windows
+        start += step
+
+
+def best_span(start_logits, end_logits, max_answer_len):
+    """
+    Find the highest scoring answer span in one window.
+
+    Args:
+        start_logits (ndarray): Start logits over the window's context tokens
+        end_logits (ndarray): End logits over the same tokens
+        max_answer_len (int): Longest answer in tokens
+
+    Returns:
+        tuple: (score, start, end) with inclusive token indices
+    """
+    start_probs = np.exp(start_logits - start_logits.max())
+    start_probs /= start_probs.sum()
+    end_probs = np.exp(end_logits - end_logits.max())
+    end_probs /= end_probs.sum()
+
+    # scores[i, j] = P(start=i) * P(end=j) for i <= j < i + max_answer_len
+    scores = np.triu(np.outer(start_probs, end_probs))
+    scores = np.tril(scores, max_answer_len - 1)
+    start, end = np.unravel_index(np.argmax(scores), scores.shape)
+    return float(scores[start, end]), int(start), int(end)
+
+
+def _run_model(model, input_ids, batch_size):
+    """Run padded inputs through the QA network and return start/end logits."""
+    import torch
+
+    pad_id = model.tokenizer.pad_token_id or 0
+    # Every batch is padded to the same length so their logits can be stacked
+    length = max(len(ids) for ids in input_ids)
+    starts, ends = [], []
+    for offset in range(0, len(input_ids), batch_size):
+        batch = input_ids[offset:offset + batch_size]
+        ids = torch.tensor([list(ids) + [pad_id] * (length - len(ids)) for ids in batch])
+        mask = torch.tensor([[1] * len(ids) + [0] * (length - len(ids)) for ids in batch])
+        start = time.perf_counter()
+        with torch.no_grad():
+            output = model.model(input_ids=ids, attention_mask=mask)
+        observe('ai_forward_seconds', time.perf_counter() - start, model='question-answering')
+        observe('ai_input_tokens', int(mask.sum()), model='question-answering')
+        starts.append(output.start_logits.detach().cpu().numpy())
+        ends.append(output.end_logits.detach().cpu().numpy())
+    return np.concatenate(starts), np.concatenate(ends)
+
+
+def _window_info(windows, offsets, index):
+    start, end = windows[index]
+    return {
+        'index': index,
+        'total': len(windows),
+        'start': offsets[start][0] if end > start else 0,
+        'end': offsets[end - 1][1] if end > start else 0,
+    }
+
+
+def answer_batch(model, questions, context, max_seq_len=384, stride=128,
+                 max_answer_len=30, batch_size=32):
+    """
+    Answer several questions about one context of any length.
+
+    The context is tokenized once (or taken from the encoded context cache)
+    and every (question, window) pair runs in the same batched forward pass.
+
+    Args:
+        model: Loaded question-answering pipeline
+        questions (list): Questions to answer
+        context (str): Context containing the answers
+        max_seq_len (int): Model input length per window, including the question
+        stride (int): Context tokens shared by consecutive windows
+        max_answer_len (int): Longest answer in tokens
+        batch_size (int): Windows per forward pass (bounds memory)
+
+    Returns:
+        list: One dict per question with answer, confidence, start, end and
+        the window it came from
+    """
+    tokenizer = model.tokenizer
+    encoded = get_context_cache().get(tokenizer, context)
+    context_ids, offsets = encoded['input_ids'], encoded['offsets']
+
+    # Window every question over the context; rows are (question, window)
+    plans, input_ids = [], []
+    for question in questions:
+        question_ids = tokenizer(question, add_special_tokens=False)['input_ids']
+        # Find where the context sits inside [CLS] question [SEP] context [SEP]
+        template = tokenizer.build_inputs_with_special_tokens(question_ids, [_CONTEXT_MARKER])
+        window_size = max_seq_len - (len(template) - 1)
+        if window_size <= stride:
+            raise ValueError("Question is too long for the configured max_seq_len and stride")
+
+        windows = context_windows(len(context_ids), window_size, stride)
+        plans.append((template.index(_CONTEXT_MARKER), windows, len(input_ids)))
+        input_ids.extend(
+            tokenizer.build_inputs_with_special_tokens(question_ids, context_ids[start:end])
+            for start, end in windows
+        )
+
+    start_logits, end_logits = _run_model(model, input_ids, batch_size)
+
+    results = []
+    for context_start, windows, first_row in plans:
+        best = None
+        for index, (start, end) in enumerate(windows):
+            length = end - start
+            if length == 0:
+                continue
+            row = first_row + index
+            span = best_span(
+                start_logits[row, context_start:context_start + length],
+                end_logits[row, context_start:context_start + length],
+                max_answer_len
+            )
+            if best is None or span[0] > best[0]:
+                best = (span[0], index, start + span[1], start + span[2])
+
+        if best is None:
+            results.append({'answer': '', 'confidence': 0.0, 'start': 0, 'end': 0})
+            continue
+
+        score, window_index, token_start, token_end = best
+        char_start, char_end = offsets[token_start][0], offsets[token_end][1]
+        results.append({
+            'answer': context[char_start:char_end],
+            'confidence': round(score * 100, 2),
+            'start': char_start,
+            'end': char_end,
+            'window': _window_info(windows, offsets, window_index)
+        })
+    return results
+
+
+def answer_long_context(model, question, context, **options):
+    """
+    Answer one question over a context of any length.
+
+    Takes the same options as answer_batch.
+
+    Returns:
+        dict: answer, confidence, start, end and the window it came from
+    """
+    return answer_batch(model, [question], context, **options)[0]
@@ -0,0 +1,268 @@
+"""
+Thread-safe registry for the transformer pipelines used by ai_utils.
+
+Each model is loaded at most once under its own lock. The registry records
+load time and resident memory per model and frees models that have been idle
+the longest when the configured memory budget is exceeded.
+"""
+from django.conf import settings
+import gc
+import logging
+import os
+import threading
+import time
+
+from .backends import get_backend, load_pipeline
+from .metrics import instrument_pipeline, observe, record_model_use
+
+logger = logging.getLogger(__name__)
+
+# Registry name -> pipeline arguments
+DEFAULT_MODELS = {
+    'summarization': {
+        'task': 'summarization',
+        'model': 'facebook/bart-large-cnn',
+    },
+    'text-generation': {
+        'task': 'text-generation',
+        'model': 'gpt2',
+    },
+    'question-answering': {
+        'task': 'question-answering',
+        'model': 'distilbert-base-cased-distilled-squad',
+    },
+    'sentiment-analysis': {
+        'task': 'sentiment-analysis',
+        'model': 'distilbert-base-uncased-finetuned-sst-2-english',
+    },
+    'embedding': {
+        'task': 'feature-extraction',
+        'model': 'sentence-transformers/all-MiniLM-L6-v2',
+    },
+}
+
+NOT_LOADED = 'not_loaded'
+LOADING = 'loading'
+LOADED = 'loaded'
+FAILED = 'failed'
+
+
+def _current_rss():
+    """Resident set size of this process in bytes, or None if unknown."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def estimate_model_memory(model, rss_delta=None):
+    """
+    Estimate the memory held by a loaded pipeline.
+
+    Args:
+        model: Loaded pipeline
+        rss_delta (int): Process RSS growth observed while loading, used when
+            the weights cannot be inspected
+
+    Returns:
+        int: Estimated size in bytes
+    """
+    network = getattr(model, 'model', None)
+    if network is not None and hasattr(network, 'parameters'):
+        try:
+            size = sum(p.numel() * p.element_size() for p in network.parameters())
+            size += sum(b.numel() * b.element_size() for b in network.buffers())
+            return size
+        except Exception as e:
+            logger.debug(f"Could not inspect model weights: {e}")
+    return max(rss_delta or 0, 0)
+
+
+class _Entry:
+    """Load state of one registered model."""
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.spec = spec
+        self.lock = threading.Lock()
+        self.model = None
+        self.status = NOT_LOADED
+        self.error = None
+        self.load_seconds = None
+        self.memory_bytes = 0
+        self.loaded_at = None
+        self.last_used = None
+        self.warmup_seconds = None
+
+
+class ModelRegistry:
+    """
+    Load, track and evict transformer pipelines.
+
+    Args:
+        specs (dict): Registry name -> {'task': ..., 'model': ..., extra pipeline kwargs}
+    """
+
+    def __init__(self, specs):
+        self._entries = {name: _Entry(name, dict(spec)) for name, spec in specs.items()}
+        self._lock = threading.Lock()
+
+    def names(self):
+        """Names of all registered models."""
+        return list(self._entries)
+
+    def _entry(self, name):
+        try:
+            return self._entries[name]
+        except KeyError:
+            raise KeyError(f"Unknown model: {name}")
+
+    def _load_pipeline(self, name, spec):
+        return load_pipeline(name, spec)
+
+    def get(self, name):
+        """
+        Get a loaded model, loading it on first use.
+
+        Args:
+            name (str): Registry name
+
+        Returns:
+            Pipeline, or None if the model failed to load
+        """
+        entry = self._entry(name)
+        model = entry.model
+        if model is None:
+            with entry.lock:
+                # Another thread may have finished loading while we waited
+                if entry.model is None:
+                    self._load(entry)
+                model = entry.model
+        entry.last_used = time.monotonic()
+        if model is not None:
+            self._enforce_limits(keep=name)
+            record_model_use(entry.spec.get('model', name))
+        return model
+
+    def _load(self, entry):
+        logger.info(f"Loading {entry.name} model...")
+        entry.status = LOADING
+        entry.error = None
+        rss_before = _current_rss()
+        start = time.perf_counter()
+        try:
+            model = self._load_pipeline(entry.name, entry.spec)
+        except Exception as e:
+            logger.error(f"Failed to load {entry.name} model: {e}")
+            entry.status = FAILED
+            entry.error = str(e)
+            return
+        entry.load_seconds = time.perf_counter() - start
+        observe('ai_model_load_seconds', entry.load_seconds, model=entry.name)
+        model = instrument_pipeline(entry.name, model)
+        rss_after = _current_rss()
+        rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+        self._install(entry, model, estimate_model_memory(model, rss_delta))
+        logger.info(
+            f"{entry.name} model loaded in {entry.load_seconds:.1f}s "
+            f"({entry.memory_bytes / (1024 * 1024):.0f} MB)"
+        )
+
+    def _install(self, entry, model, memory_bytes):
+        entry.model = model
+        entry.memory_bytes = memory_bytes
+        entry.warmup_seconds = None
+        entry.status = LOADED
+        entry.loaded_at = time.time()
+        entry.last_used = time.monotonic()
+
+    def set(self, name, model, memory_bytes=0):
+        """Install an already-built model (e.g. a fake in benchmarks)."""
+        entry = self._entry(name)
+        with entry.lock:
+            entry.load_seconds = 0.0
+            self._install(entry, model, memory_bytes)
+
+    def evict(self, name):
+        """Unload a model so its memory can be reclaimed."""
+        entry = self._entry(name)
+        with entry.lock:
+            if entry.model is None:
+                return False
+            entry.model = None
+            entry.memory_bytes = 0
+            entry.status = NOT_LOADED
+            entry.warmup_seconds = None
+        logger.info(f"Evicted {name} model")
+        gc.collect()
+        return True
+
+    def _enforce_limits(self, keep=None):
+        """Evict idle models and, if over budget, the least recently used ones."""
+        idle_timeout = getattr(settings, 'AI_MODEL_IDLE_TIMEOUT', 0)
+        budget = getattr(settings, 'AI_MODEL_MEMORY_BUDGET_MB', 0) * 1024 * 1024
+        if not idle_timeout and not budget:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            loaded = sorted(
+                (e for e in self._entries.values() if e.model is not None and e.name != keep),
+                key=lambda e: e.last_used or 0
+            )
+            to_evict = []
+            if idle_timeout:
+                to_evict = [e for e in loaded if now - (e.last_used or 0) > idle_timeout]
+            if budget:
+                resident = sum(e.memory_bytes for e in self._entries.values() if e.model is not None)
+                resident -= sum(e.memory_bytes for e in to_evict)
+                for entry in loaded:
+                    if resident <= budget:
+                        break
+                    if entry not in to_evict:
+                        to_evict.append(entry)
+                        resident -= entry.memory_bytes
+
+        for entry in to_evict:
+            self.evict(entry.name)
+
+    def record_warmup(self, name, seconds):
+        """Record that a warm-up inference ran through a loaded model."""
+        self._entry(name).warmup_seconds = seconds
+
+    def is_warm(self, name):
+        """True if the model is loaded and has served its warm-up inference."""
+        entry = self._entry(name)
+        return entry.model is not None and entry.warmup_seconds is not None
+
+    def status(self):
+        """
+        Report load state and residency of every model.
+
+        Returns:
+            dict: Registry name -> status details
+        """
+        now = time.monotonic()
+        report = {}
+        for name, entry in self._entries.items():
+            report[name] = {
+                'model': entry.spec.get('model'),
+                'backend': get_backend(name),
+                'status': entry.status,
+                'load_seconds': round(entry.load_seconds, 3) if entry.load_seconds is not None else None,
+                'memory_mb': round(entry.memory_bytes / (1024 * 1024), 1),
+                'warm': entry.model is not None and entry.warmup_seconds is not None,
+                'warmup_seconds': round(entry.warmup_seconds, 3) if entry.warmup_seconds is not None else None,
+                'idle_seconds': round(now - entry.last_used, 1) if entry.last_used else None,
+                'error': entry.error,
+            }
+        return report
+
+    def resident_memory_mb(self):
+        """Total estimated memory of loaded models in MB."""
+        total = sum(e.memory_bytes for e in self._entries.values() if e.model is not None)
+        return round(total / (1024 * 1024), 1)
+
+
+model_registry = ModelRegistry(DEFAULT_MODELS)
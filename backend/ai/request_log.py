@@ -0,0 +1,236 @@
+"""
+Buffered writer for AIRequestLog rows.
+
+AI views used to insert their log row on the request thread, adding a
+database write (and on SQLite, the global write lock) to every AI call.
+log_ai_request() now only appends the record to a bounded in-memory queue.
+A background thread turns queued records into rows with bulk_create once
+AI_LOG_BATCH_SIZE records are waiting or AI_LOG_FLUSH_INTERVAL seconds
+have passed, and flushes whatever is left when the process exits.
+
+When the queue is full, records are dropped and counted rather than
+blocking the request; so are records whose batch could not be written.
+
+Inside an AI endpoint, the endpoint name, latency, request size, models used
+and whether the result cache served it are filled in from the request's
+RequestContext (see metrics.instrument_view). Responses are serialized and
+compressed on the writer thread.
+"""
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+import zlib
+
+from analytics.rollups import update_ai_usage_rollups
+from study.models import AIRequestLog
+from .metrics import inc, request_context
+
+logger = logging.getLogger(__name__)
+
+
+class RequestLogWriter:
+    """
+    Queue AI request records and insert them in batches from one thread.
+
+    Args:
+        max_queue (int): Records held in memory before new ones are dropped
+        batch_size (int): Records per bulk_create, and the size that triggers a flush
+        flush_interval (float): Seconds a record waits at most before being written
+    """
+
+    def __init__(self, max_queue=10000, batch_size=100, flush_interval=2.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._counters = {'queued': 0, 'written': 0, 'dropped': 0, 'failed': 0}
+        self._counters_lock = threading.Lock()
+        self._last_rollup = time.monotonic()
+
+    def _count(self, counter, amount=1):
+        with self._counters_lock:
+            self._counters[counter] += amount
+
+    def log(self, **fields):
+        """
+        Queue one record; returns False if it was dropped because the queue is full.
+
+        Fields are AIRequestLog fields; `response` may be any JSON-like value.
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(fields)
+        except queue.Full:
+            self._count('dropped')
+            inc('ai_log_dropped_total', reason='queue_full')
+            return False
+        self._count('queued')
+        if self._queue.qsize() >= self.batch_size:
+            self._wake.set()
+        return True
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='ai-request-log', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+                self._roll_up()
+            except Exception as e:
+                logger.error(f"AI request log writer error: {e}")
+            finally:
+                close_old_connections()
+
+    def _roll_up(self):
+        """Fold written logs into the usage rollups every AI_USAGE_ROLLUP_INTERVAL seconds."""
+        if not getattr(settings, 'AI_USAGE_ROLLUP_ON_FLUSH', True):
+            return
+        if time.monotonic() - self._last_rollup < getattr(settings, 'AI_USAGE_ROLLUP_INTERVAL', 30):
+            return
+        self._last_rollup = time.monotonic()
+        update_ai_usage_rollups()
+
+    def _drain(self):
+        records = []
+        while len(records) < self.batch_size:
+            try:
+                records.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return records
+
+    def flush(self):
+        """
+        Write every queued record now.
+
+        Returns:
+            int: Rows written
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                records = self._drain()
+                if not records:
+                    return written
+                rows = [AIRequestLog(**self._row_fields(record)) for record in records]
+                try:
+                    AIRequestLog.objects.bulk_create(rows)
+                except Exception as e:
+                    logger.error(f"Could not write {len(rows)} AI request log rows: {e}")
+                    self._count('failed', len(rows))
+                    inc('ai_log_dropped_total', len(rows), reason='write_failed')
+                    continue
+                self._count('written', len(rows))
+                written += len(rows)
+
+    @staticmethod
+    def _row_fields(record):
+        """Serialize and compress the response, recording its size."""
+        if record.get('response') is not None:
+            data = json.dumps(record['response'], separators=(',', ':'), ensure_ascii=False, default=str)
+            data = data.encode('utf-8')
+            record.setdefault('output_size', len(data))
+            limit = getattr(settings, 'AI_LOG_RESPONSE_MAX_BYTES', 64 * 1024)
+            if len(data) > limit:
+                preview = data[:limit].decode('utf-8', errors='ignore')
+                data = json.dumps({'truncated': True, 'json': preview}).encode('utf-8')
+            # Stored as is by CompressedJSONField
+            record['response'] = zlib.compress(data)
+        return record
+
+    def close(self):
+        """Stop the writer thread and write what is still queued."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Could not flush AI request logs at exit: {e}")
+
+    def stats(self):
+        with self._counters_lock:
+            counters = dict(self._counters)
+        counters['pending'] = self._queue.qsize()
+        return counters
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_request_log_writer():
+    """Get the process-wide AI request log writer."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = RequestLogWriter(
+                    max_queue=getattr(settings, 'AI_LOG_QUEUE_SIZE', 10000),
+                    batch_size=getattr(settings, 'AI_LOG_BATCH_SIZE', 100),
+                    flush_interval=getattr(settings, 'AI_LOG_FLUSH_INTERVAL', 2.0),
+                )
+                atexit.register(_writer.close)
+    return _writer
+
+
+def log_ai_request(user=None, context=None, **fields):
+    """
+    Record an AI request in AIRequestLog without waiting for the database.
+
+    Args:
+        user: Requesting user or user id, or None
+        context (RequestContext): Request to take measurements from; defaults
+            to the AI endpoint request being handled
+        **fields: Other AIRequestLog fields (prompt, response, status, ...);
+            these override measured values
+    """
+    fields['user_id'] = getattr(user, 'pk', user)
+    fields.setdefault('created_at', timezone.now())
+    context = context or request_context()
+    if context is not None:
+        context.logged = True
+        fields.setdefault('endpoint', context.endpoint)
+        fields.setdefault('latency_ms', context.latency_ms)
+        fields.setdefault('input_size', context.input_size)
+        fields.setdefault('cache_hit', context.cache_hit)
+        fields.setdefault('model', ','.join(sorted(context.models)))
+    if not getattr(settings, 'AI_LOG_BUFFERED', True):
+        AIRequestLog.objects.create(**RequestLogWriter._row_fields(fields))
+        return
+    get_request_log_writer().log(**fields)
+
+
+def log_failed_request(request, response, status_code):
+    """
+    Log an AI endpoint error response that the view did not log itself.
+
+    Throttled and unauthenticated requests are not logged.
+    """
+    user = getattr(request, 'user', None)
+    if status_code == 429 or user is None or not user.is_authenticated:
+        return
+    log_ai_request(
+        user=user,
+        prompt='',
+        response=getattr(response, 'data', None),
+        status=status_code
+    )
@@ -0,0 +1,153 @@
+"""
+Semantic search over study notes.
+
+Notes are embedded with a local sentence-embedding model (mean-pooled token
+states, L2-normalized) and stored in one memory-mapped VectorIndex per user.
+Signal receivers keep the index current: with AI_SEMANTIC_INDEX_ON_SAVE,
+saved notes are re-embedded on a background thread after the transaction
+commits (skipped when their embedding artifact shows the text is unchanged,
+see ai/artifacts.py), and deleted notes are dropped immediately. `manage.py build_semantic_index`
+rebuilds indexes from the database.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+import logging
+import threading
+import time
+
+import numpy as np
+
+from study.models import StudyNote
+from .ai_utils import ModelUnavailableError
+from .inference_client import is_remote, remote_call
+from .metrics import observe
+from .registry import model_registry
+from .vector_index import get_user_index
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = 'embedding'
+
+
+def note_text(note):
+    """Text embedded for a note: title, topic and content."""
+    return '\n'.join(part for part in (note.title, note.related_topic, note.content) if part)
+
+
+def embed_texts(texts):
+    """
+    Embed texts with the sentence-embedding model.
+
+    Args:
+        texts (list): Texts to embed
+
+    Returns:
+        numpy.ndarray: One L2-normalized float32 vector per text
+    """
+    if is_remote():
+        return remote_call('embed_texts', list(texts))
+
+    model = model_registry.get(EMBEDDING_MODEL)
+    if model is None:
+        raise ModelUnavailableError()
+
+    import torch
+
+    tokenizer = model.tokenizer
+    batch_size = getattr(settings, 'AI_EMBEDDING_BATCH_SIZE', 32)
+    max_length = min(getattr(tokenizer, 'model_max_length', 512), 512)
+    vectors = []
+    for offset in range(0, len(texts), batch_size):
+        batch = list(texts[offset:offset + batch_size])
+        start = time.perf_counter()
+        inputs = tokenizer(batch, padding=True, truncation=True, max_length=max_length, return_tensors='pt')
+        observe('ai_tokenize_seconds', time.perf_counter() - start, model=EMBEDDING_MODEL)
+        start = time.perf_counter()
+        with torch.no_grad():
+            output = model.model(**inputs)
+        observe('ai_forward_seconds', time.perf_counter() - start, model=EMBEDDING_MODEL)
+        observe('ai_input_tokens', int(inputs['attention_mask'].sum()), model=EMBEDDING_MODEL)
+        # Mean of the token states, ignoring padding
+        mask = inputs['attention_mask'].unsqueeze(-1).to(output.last_hidden_state.dtype)
+        pooled = (output.last_hidden_state * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        vectors.append(pooled.cpu().numpy())
+
+    vectors = np.concatenate(vectors).astype(np.float32) if vectors else np.zeros((0, 0), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+def index_notes(user_id, notes):
+    """
+    Embed notes of one user and add or replace them in the user's index.
+
+    Args:
+        user_id (int): Owner of the notes
+        notes (list): (note_id, text) pairs
+    """
+    if not notes:
+        return
+    vectors = embed_texts([text for _, text in notes])
+    get_user_index(user_id).upsert([note_id for note_id, _ in notes], vectors)
+
+
+def search_notes(user_id, query, top_k=10):
+    """
+    Find a user's notes most similar in meaning to a query.
+
+    Args:
+        user_id (int): Owner of the notes
+        query (str): Search text
+        top_k (int): Number of results
+
+    Returns:
+        list: (note_id, score) pairs, best first
+    """
+    index = get_user_index(user_id)
+    if not len(index):
+        return []
+    return index.search(embed_texts([query])[0], top_k)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_index_executor():
+    """Get the single background thread that embeds saved notes in order."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='semantic-index')
+    return _executor
+
+
+def _index_in_background(note_id):
+    from .artifacts import refresh_embedding
+    try:
+        refresh_embedding(note_id)
+    except Exception as e:
+        logger.error(f"Could not index note {note_id} for semantic search: {e}")
+    finally:
+        close_old_connections()
+
+
+@receiver(post_save, sender=StudyNote)
+def index_saved_note(sender, instance, **kwargs):
+    if not getattr(settings, 'AI_SEMANTIC_INDEX_ON_SAVE', False):
+        return
+    note_id = instance.id
+    transaction.on_commit(lambda: get_index_executor().submit(_index_in_background, note_id))
+
+
+@receiver(post_delete, sender=StudyNote)
+def remove_deleted_note(sender, instance, **kwargs):
+    try:
+        get_user_index(instance.user_id).remove([instance.id])
+    except Exception as e:
+        logger.error(f"Could not remove note {instance.id} from the semantic index: {e}")
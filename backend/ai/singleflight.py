@@ -0,0 +1,177 @@
+"""
+Single-flight coalescing of identical AI calls.
+
+When many users submit the same input at once (a whole class summarizing
+the same reading), only the first call runs the model. Later calls with the
+same key wait for it and share its result, or its exception.
+
+Within a process, waiters block on the running call and receive its value
+directly. With AI_SINGLEFLIGHT_LOCK_DIR set, the running call also holds an
+advisory lock file for its key, so calls in other processes wait for it and
+then read its result from the persistent tier of the result cache. Without
+that tier they would only recompute after waiting, so calls without a shared
+lookup skip the lock file.
+"""
+from django.conf import settings
+from pathlib import Path
+import fcntl
+import logging
+import threading
+import time
+
+from .metrics import inc
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """A computation in flight and its outcome."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run at most one computation per key at a time within this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._coalesced = 0
+
+    def do(self, key, func):
+        """
+        Run func() for a key, or wait for the call already running for it.
+
+        Returns:
+            tuple: (value, shared), where shared is True if another call computed it
+
+        Raises:
+            Exception: Whatever the computing call raised
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = func()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value, False
+
+    def stats(self):
+        with self._lock:
+            return {'in_flight': len(self._calls), 'coalesced': self._coalesced}
+
+
+class KeyLock:
+    """
+    Advisory lock file for one key, shared by every process on the host.
+
+    Acquiring waits up to `timeout` seconds; `waited` tells whether another
+    process held the lock first.
+    """
+
+    def __init__(self, directory, key, timeout):
+        self.path = Path(directory) / f"{key}.lock"
+        self.timeout = timeout
+        self.acquired = False
+        self.waited = False
+        self._file = None
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a')
+        deadline = time.monotonic() + self.timeout
+        interval = 0.01
+        while True:
+            try:
+                fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self.acquired = True
+                break
+            except BlockingIOError:
+                self.waited = True
+                if time.monotonic() >= deadline:
+                    # Give up waiting and compute anyway rather than fail the request
+                    logger.warning(f"Timed out waiting for AI call lock {self.path.name}")
+                    break
+                time.sleep(interval)
+                interval = min(interval * 2, 0.25)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.acquired:
+            # Removing the file while holding the lock could let two processes
+            # lock different inodes, so lock files are left in place
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+
+_single_flight = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight():
+    """Get the process-wide single-flight group."""
+    global _single_flight
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight()
+    return _single_flight
+
+
+def coalesce(function_name, key, compute, lookup=None):
+    """
+    Run compute() once for concurrent identical calls.
+
+    Args:
+        function_name (str): Name used in the metrics
+        key (str): Hash identifying the input
+        compute (callable): Computes (and caches) the result
+        lookup (callable): Returns (hit, value) from a cache shared between
+            processes; tried after waiting for another process's call to
+            finish. Without one, only threads of this process are coalesced.
+
+    Returns:
+        The result of compute(), or of the identical call it waited for
+    """
+    if not getattr(settings, 'AI_SINGLEFLIGHT_ENABLED', True):
+        return compute()
+
+    lock_dir = getattr(settings, 'AI_SINGLEFLIGHT_LOCK_DIR', '')
+
+    def run():
+        if not lock_dir or lookup is None:
+            return compute()
+        timeout = getattr(settings, 'AI_SINGLEFLIGHT_WAIT_TIMEOUT', 120)
+        with KeyLock(lock_dir, key, timeout) as lock:
+            if lock.waited:
+                hit, value = lookup()
+                if hit:
+                    inc('ai_coalesced_total', function=function_name, scope='process')
+                    return value
+            return compute()
+
+    value, shared = get_single_flight().do(key, run)
+    if shared:
+        inc('ai_coalesced_total', function=function_name, scope='thread')
+    return value
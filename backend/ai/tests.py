@@ -1,3 +1,79 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .jobs import claim_job, requeue_stale_jobs, submit_job
+from .models import AIJob
+
+
+class ClaimJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pass')
+        self.other = User.objects.create_user(username='bob', password='pass')
+
+    def test_job_is_claimed_once(self):
+        job = submit_job(self.user, 'sentiment', {'text': 'Hello'})
+
+        claimed = claim_job('worker-1')
+        self.assertEqual(claimed.id, job.id)
+        self.assertEqual(claimed.status, AIJob.RUNNING)
+        self.assertEqual(claimed.worker, 'worker-1')
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(claim_job('worker-2'))
+
+    @override_settings(AI_JOB_USER_CONCURRENCY=1)
+    def test_user_cap_skips_to_other_users(self):
+        first = submit_job(self.user, 'sentiment', {'text': 'One'})
+        second = submit_job(self.user, 'sentiment', {'text': 'Two'})
+        other = submit_job(self.other, 'sentiment', {'text': 'Three'})
+
+        self.assertEqual(claim_job('worker-1').id, first.id)
+        self.assertEqual(claim_job('worker-2').id, other.id)
+        self.assertIsNone(claim_job('worker-3'))
+
+        # The skipped job was released untouched
+        second.refresh_from_db()
+        self.assertEqual(second.status, AIJob.QUEUED)
+        self.assertEqual(second.worker, '')
+        self.assertEqual(second.attempts, 0)
+
+
+@override_settings(AI_JOB_TIMEOUT=60)
+class RequeueStaleJobsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pass')
+
+    def running_job(self, attempts, started_ago=120):
+        return AIJob.objects.create(
+            user=self.user,
+            job_type='sentiment',
+            payload={'text': 'Hello'},
+            status=AIJob.RUNNING,
+            worker='worker-1',
+            attempts=attempts,
+            max_attempts=3,
+            run_after=timezone.now(),
+            started_at=timezone.now() - timedelta(seconds=started_ago)
+        )
+
+    def test_stale_jobs_are_requeued_until_out_of_attempts(self):
+        retry = self.running_job(attempts=1)
+        exhausted = self.running_job(attempts=3)
+        recent = self.running_job(attempts=1, started_ago=5)
+
+        self.assertEqual(requeue_stale_jobs(), 1)
+
+        retry.refresh_from_db()
+        self.assertEqual(retry.status, AIJob.QUEUED)
+        self.assertEqual(retry.worker, '')
+        self.assertEqual(retry.error, 'Worker timed out')
+
+        exhausted.refresh_from_db()
+        self.assertEqual(exhausted.status, AIJob.FAILED)
+        self.assertEqual(exhausted.error, 'Worker timed out')
+        self.assertIsNotNone(exhausted.finished_at)
+
+        recent.refresh_from_db()
+        self.assertEqual(recent.status, AIJob.RUNNING)
@@ -0,0 +1,131 @@
+"""
+TextRank key-point extraction.
+
+Sentences are ranked by how central they are to the document rather than by
+their length. Each sentence becomes a row of a sparse TF-IDF matrix; cosine
+similarities between sentences define a weighted graph (continuous
+LexRank), and PageRank scores of that graph are found by power iteration.
+Every step is a NumPy/SciPy operation and the graph is never built as a dense
+matrix, so documents with thousands of sentences are ranked in milliseconds.
+"""
+import numpy as np
+from scipy import sparse
+
+
+def tfidf_matrix(sentence_terms):
+    """
+    Build an L2-normalized TF-IDF matrix with one row per sentence.
+
+    Term frequencies are log-scaled and IDF is smoothed, so a term that
+    appears in every sentence still has a small positive weight.
+
+    Args:
+        sentence_terms (list): Tokens of each sentence
+
+    Returns:
+        scipy.sparse.csr_matrix: Sentences x terms
+    """
+    vocabulary = {}
+    columns = [
+        vocabulary.setdefault(term, len(vocabulary))
+        for terms in sentence_terms
+        for term in terms
+    ]
+    rows = np.repeat(
+        np.arange(len(sentence_terms), dtype=np.int32),
+        [len(terms) for terms in sentence_terms]
+    )
+    counts = sparse.csr_matrix(
+        (np.ones(len(columns), dtype=np.float32), (rows, np.asarray(columns, dtype=np.int32))),
+        shape=(len(sentence_terms), max(len(vocabulary), 1))
+    )
+    counts.sum_duplicates()
+
+    num_sentences = counts.shape[0]
+    document_frequency = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = np.log((1 + num_sentences) / (1 + document_frequency)).astype(np.float32) + 1
+    counts.data = (1 + np.log(counts.data)) * idf[counts.indices]
+
+    norms = np.sqrt(np.asarray(counts.multiply(counts).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms) @ counts
+
+
+def textrank_scores(matrix, damping=0.85, max_iterations=100, tolerance=1e-6):
+    """
+    Score sentences by PageRank over their cosine-similarity graph.
+
+    The graph's weights are S = X·Xᵀ without the diagonal. S is kept in that
+    factored form, so each power-iteration step costs two sparse
+    matrix-vector products instead of materializing a sentences x sentences
+    matrix.
+
+    Args:
+        matrix (scipy.sparse matrix): L2-normalized sentence vectors (X)
+        damping (float): PageRank damping factor
+        max_iterations (int): Power-iteration limit
+        tolerance (float): Stop once scores change less than this (L1)
+
+    Returns:
+        numpy.ndarray: One score per sentence, summing to 1
+    """
+    num_sentences = matrix.shape[0]
+    if num_sentences == 0:
+        return np.zeros(0)
+
+    matrix = matrix.tocsr().astype(np.float64)
+    matrix_t = matrix.T.tocsr()
+    # Self-similarity: 1 for sentences with terms, 0 for empty ones
+    self_similarity = np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel()
+
+    def similarity_dot(vector):
+        return matrix @ (matrix_t @ vector) - self_similarity * vector
+
+    # Sentences with no similar neighbour jump anywhere
+    degree = similarity_dot(np.ones(num_sentences))
+    dangling = degree <= 1e-12
+    degree[dangling] = 1
+
+    scores = np.full(num_sentences, 1 / num_sentences)
+    for _ in range(max_iterations):
+        # S is symmetric, so the transposed transition step is S·(scores / degree)
+        updated = (1 - damping) / num_sentences + damping * (
+            similarity_dot(np.where(dangling, 0, scores / degree)) + scores[dangling].sum() / num_sentences
+        )
+        converged = np.abs(updated - scores).sum() < tolerance
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def rank_sentences(sentence_terms, count, redundancy=0.8, **options):
+    """
+    Indexes of the `count` most central sentences, best first.
+
+    A sentence whose cosine similarity to one already picked exceeds
+    `redundancy` is skipped, so repeated sentences are returned once.
+
+    Args:
+        sentence_terms (list): Tokens of each sentence
+        count (int): Number of sentences wanted
+        redundancy (float): Similarity above which a sentence counts as a repeat
+        **options: Passed to textrank_scores
+
+    Returns:
+        list: Sentence indexes
+    """
+    if not sentence_terms or count <= 0:
+        return []
+    matrix = tfidf_matrix(sentence_terms)
+    scores = textrank_scores(matrix, **options)
+
+    chosen = []
+    available = np.ones(len(scores), dtype=bool)
+    while len(chosen) < count and available.any():
+        index = int(np.argmax(np.where(available, scores, -1)))
+        chosen.append(index)
+        similar = np.asarray((matrix @ matrix[index].T).todense()).ravel() > redundancy
+        available &= ~similar
+        available[index] = False
+    return chosen
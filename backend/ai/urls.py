@@ -4,10 +4,20 @@ from . import views
 urlpatterns = [
     path('generate/study-plan/', views.generate_study_plan, name='generate_study_plan'),
     path('generate/summary/', views.generate_summary, name='generate_summary'),
+    path('generate/summary/stream/', views.generate_summary_stream, name='generate_summary_stream'),
     path('generate/flashcards/', views.generate_flashcards, name='generate_flashcards'),
     path('generate/advice/', views.get_study_advice, name='get_study_advice'),
     path('answer-question/', views.answer_study_question, name='answer_study_question'),
+    path('answer-questions/', views.answer_study_questions, name='answer_study_questions'),
     path('analyze-sentiment/', views.analyze_sentiment, name='analyze_sentiment'),
     path('extract-keywords/', views.extract_study_keywords, name='extract_study_keywords'),
     path('generate/quiz/', views.generate_quiz, name='generate_quiz'),
+    path('analyze/', views.analyze_note, name='analyze_note'),
+    path('batch/<str:feature>/', views.batch_generate, name='batch_generate'),
+    path('semantic-search/', views.semantic_search, name='semantic_search'),
+    path('jobs/', views.submit_ai_job, name='submit_ai_job'),
+    path('jobs/<int:job_id>/', views.ai_job_detail, name='ai_job_detail'),
+    path('cache/stats/', views.cache_stats, name='ai_cache_stats'),
+    path('models/', views.model_status, name='ai_model_status'),
+    path('health/', views.health, name='ai_health'),
 ]
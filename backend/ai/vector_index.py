@@ -0,0 +1,321 @@
+"""
+Memory-mapped vector index for note embeddings.
+
+Each index is a directory holding:
+- vectors.f16: float16 matrix (capacity x dim), memory-mapped
+- ids.npy: int64 note id of each row (-1 for an empty or deleted row)
+- lists.npy: int32 IVF cluster of each row (only once the index is large)
+- centroids.npy: float32 IVF cluster centres
+- meta.json: dimension, rows in use, IVF state
+
+Vectors are L2-normalized, so the dot product is the cosine similarity.
+Small indexes are searched exhaustively with one vectorized product. Once an
+index reaches AI_SEMANTIC_IVF_THRESHOLD rows, its vectors are clustered with
+k-means and a query only scans the clusters whose centres are nearest
+(an inverted file index). Clusters are retrained when the index has doubled.
+
+Writes take an exclusive file lock, so web and worker processes can update
+the same index. Readers map the files without locking.
+"""
+from django.conf import settings
+from pathlib import Path
+import fcntl
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+# Rows converted to float32 at a time while scanning
+SCAN_CHUNK_ROWS = 65536
+
+# Rows used to train IVF centroids
+IVF_SAMPLE_ROWS = 50000
+
+
+def normalize(vectors):
+    """L2-normalize rows (zero rows stay zero)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+def kmeans(vectors, num_clusters, iterations=10, seed=0):
+    """
+    Spherical k-means (cosine similarity) over normalized vectors.
+
+    Returns:
+        numpy.ndarray: num_clusters x dim normalized centroids
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), num_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        members = sparse.csr_matrix(
+            (np.ones(len(vectors), dtype=np.float32), (assignments, np.arange(len(vectors)))),
+            shape=(num_clusters, len(vectors))
+        )
+        sums = np.asarray(members @ vectors)
+        empty = np.bincount(assignments, minlength=num_clusters) == 0
+        # Reseed empty clusters with random vectors
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        centroids = normalize(sums)
+    return centroids
+
+
+class VectorIndex:
+    """
+    One index directory (e.g. one user's notes).
+
+    Args:
+        path (Path): Index directory, created on first write
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    # Storage
+
+    def _meta(self):
+        try:
+            return json.loads((self.path / 'meta.json').read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, meta):
+        temporary = self.path / 'meta.json.tmp'
+        temporary.write_text(json.dumps(meta))
+        os.replace(temporary, self.path / 'meta.json')
+
+    def _open(self, meta, mode='r'):
+        capacity = meta['capacity']
+        vectors = np.memmap(self.path / 'vectors.f16', dtype=np.float16, mode=mode, shape=(capacity, meta['dim']))
+        ids = np.load(self.path / 'ids.npy', mmap_mode=mode)
+        lists = np.load(self.path / 'lists.npy', mmap_mode=mode) if meta.get('ivf_size') else None
+        return vectors, ids, lists
+
+    def _create(self, dim, capacity):
+        self.path.mkdir(parents=True, exist_ok=True)
+        np.memmap(self.path / 'vectors.f16', dtype=np.float16, mode='w+', shape=(capacity, dim)).flush()
+        ids = np.lib.format.open_memmap(self.path / 'ids.npy', mode='w+', dtype=np.int64, shape=(capacity,))
+        ids[:] = -1
+        ids.flush()
+        meta = {'dim': dim, 'capacity': capacity, 'size': 0, 'ivf_size': 0}
+        self._write_meta(meta)
+        return meta
+
+    def _grow(self, meta, capacity):
+        """Copy the index into larger files and swap them in."""
+        vectors, ids, lists = self._open(meta)
+        size = meta['size']
+        new_vectors = np.memmap(self.path / 'vectors.f16.tmp', dtype=np.float16, mode='w+', shape=(capacity, meta['dim']))
+        new_vectors[:size] = vectors[:size]
+        new_vectors.flush()
+        new_ids = np.lib.format.open_memmap(self.path / 'ids.npy.tmp', mode='w+', dtype=np.int64, shape=(capacity,))
+        new_ids[:] = -1
+        new_ids[:size] = ids[:size]
+        new_ids.flush()
+        os.replace(self.path / 'vectors.f16.tmp', self.path / 'vectors.f16')
+        os.replace(self.path / 'ids.npy.tmp', self.path / 'ids.npy')
+        if lists is not None:
+            new_lists = np.lib.format.open_memmap(self.path / 'lists.npy.tmp', mode='w+', dtype=np.int32, shape=(capacity,))
+            new_lists[:size] = lists[:size]
+            new_lists.flush()
+            os.replace(self.path / 'lists.npy.tmp', self.path / 'lists.npy')
+        meta['capacity'] = capacity
+        return meta
+
+    def _locked(self):
+        """Exclusive lock held across processes while writing."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        return _FileLock(self.path / 'lock')
+
+    # Writes
+
+    def upsert(self, ids, vectors):
+        """
+        Insert or replace vectors by note id.
+
+        Args:
+            ids (list): Note ids
+            vectors (array): One vector per id
+        """
+        if len(ids) == 0:
+            return
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = normalize(vectors)
+        if len(ids) != len(vectors):
+            raise ValueError(f"Got {len(ids)} ids for {len(vectors)} vectors")
+        # Keep the last vector of an id given twice
+        ids, last = np.unique(ids[::-1], return_index=True)
+        vectors = vectors[::-1][last]
+
+        with self._lock, self._locked():
+            meta = self._meta() or self._create(vectors.shape[1], max(64, len(ids)))
+            if meta['dim'] != vectors.shape[1]:
+                raise ValueError(f"Index dimension is {meta['dim']}, got vectors of dimension {vectors.shape[1]}")
+
+            # Existing rows of the ids, then free rows, then new rows at the end
+            _, row_ids, _ = self._open(meta)
+            existing = np.array(row_ids[:meta['size']])
+            del row_ids
+            live = np.flatnonzero(existing >= 0)
+            order = np.argsort(existing[live])
+            sorted_ids = existing[live][order]
+            positions = np.minimum(np.searchsorted(sorted_ids, ids), max(len(sorted_ids) - 1, 0))
+            found = (sorted_ids[positions] == ids) if len(sorted_ids) else np.zeros(len(ids), dtype=bool)
+            rows = np.empty(len(ids), dtype=np.int64)
+            rows[found] = live[order[positions[found]]]
+            new = int((~found).sum())
+            free = np.flatnonzero(existing < 0)[:new]
+            appended = np.arange(meta['size'], meta['size'] + new - len(free))
+            rows[~found] = np.concatenate([free, appended])
+            size = meta['size'] + len(appended)
+            if size > meta['capacity']:
+                meta = self._grow(meta, max(size, meta['capacity'] * 2))
+            meta['size'] = size
+
+            stored_vectors, stored_ids, lists = self._open(meta, mode='r+')
+            stored_vectors[rows] = vectors.astype(np.float16)
+            stored_ids[rows] = ids
+            stored_vectors.flush()
+            stored_ids.flush()
+            if lists is not None:
+                lists[rows] = np.argmax(vectors @ self._centroids().T, axis=1)
+                lists.flush()
+            live_count = int((stored_ids[:meta['size']] >= 0).sum())
+            del stored_vectors, stored_ids, lists
+
+            threshold = getattr(settings, 'AI_SEMANTIC_IVF_THRESHOLD', 20000)
+            if threshold and live_count >= threshold and live_count >= 2 * meta.get('ivf_size', 0):
+                meta = self._train(meta, live_count)
+            self._write_meta(meta)
+
+    def remove(self, ids):
+        """Delete vectors by note id. Their rows are reused by later inserts."""
+        with self._lock, self._locked():
+            meta = self._meta()
+            if meta is None:
+                return
+            vectors, row_ids, _ = self._open(meta, mode='r+')
+            rows = np.flatnonzero(np.isin(row_ids[:meta['size']], np.asarray(ids, dtype=np.int64)))
+            row_ids[rows] = -1
+            vectors[rows] = 0
+            row_ids.flush()
+            vectors.flush()
+
+    def clear(self):
+        """Delete every vector."""
+        with self._lock, self._locked():
+            for name in ('meta.json', 'vectors.f16', 'ids.npy', 'lists.npy', 'centroids.npy'):
+                try:
+                    (self.path / name).unlink()
+                except FileNotFoundError:
+                    pass
+
+    # IVF
+
+    def _centroids(self):
+        return np.load(self.path / 'centroids.npy')
+
+    def _train(self, meta, live):
+        """Cluster the vectors and record each row's cluster."""
+        vectors, row_ids, _ = self._open(meta)
+        size = meta['size']
+        rows = np.flatnonzero(row_ids[:size] >= 0)
+        rng = np.random.default_rng(0)
+        sample = rows if len(rows) <= IVF_SAMPLE_ROWS else rng.choice(rows, IVF_SAMPLE_ROWS, replace=False)
+        num_clusters = max(1, int(np.sqrt(live)))
+        centroids = kmeans(np.asarray(vectors[np.sort(sample)], dtype=np.float32), num_clusters)
+
+        lists = np.lib.format.open_memmap(
+            self.path / 'lists.npy.tmp', mode='w+', dtype=np.int32, shape=(meta['capacity'],)
+        )
+        for start in range(0, size, SCAN_CHUNK_ROWS):
+            block = np.asarray(vectors[start:min(start + SCAN_CHUNK_ROWS, size)], dtype=np.float32)
+            lists[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        lists.flush()
+        del lists
+        np.save(self.path / 'centroids.npy', centroids)
+        os.replace(self.path / 'lists.npy.tmp', self.path / 'lists.npy')
+        meta['ivf_size'] = live
+        logger.info(f"Trained {num_clusters} IVF clusters for {self.path} ({live} vectors)")
+        return meta
+
+    # Reads
+
+    def __len__(self):
+        meta = self._meta()
+        if meta is None:
+            return 0
+        _, ids, _ = self._open(meta)
+        return int((ids[:meta['size']] >= 0).sum())
+
+    def search(self, query, top_k=10, probes=None):
+        """
+        Find the most similar vectors.
+
+        Args:
+            query (array): Query vector
+            top_k (int): Number of results
+            probes (int): IVF clusters to scan (default AI_SEMANTIC_IVF_PROBES)
+
+        Returns:
+            list: (note_id, score) pairs, best first
+        """
+        meta = self._meta()
+        if meta is None or not meta['size'] or top_k <= 0:
+            return []
+        query = normalize(query).ravel()
+        vectors, ids, lists = self._open(meta)
+        size = meta['size']
+
+        if lists is not None:
+            probes = probes or getattr(settings, 'AI_SEMANTIC_IVF_PROBES', 8)
+            centroids = self._centroids()
+            nearest = np.argsort(-(centroids @ query))[:probes]
+            rows = np.flatnonzero(np.isin(lists[:size], nearest) & (ids[:size] >= 0))
+            scores = np.asarray(vectors[rows], dtype=np.float32) @ query
+        else:
+            scores = np.empty(size, dtype=np.float32)
+            for start in range(0, size, SCAN_CHUNK_ROWS):
+                block = np.asarray(vectors[start:min(start + SCAN_CHUNK_ROWS, size)], dtype=np.float32)
+                scores[start:start + len(block)] = block @ query
+            rows = np.flatnonzero(ids[:size] >= 0)
+            scores = scores[rows]
+
+        if not len(rows):
+            return []
+        top_k = min(top_k, len(rows))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [(int(ids[rows[index]]), float(scores[index])) for index in best]
+
+
+class _FileLock:
+    """Exclusive advisory lock on a file (flock)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, 'a')
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+
+def get_user_index(user_id):
+    """Index of one user's notes under AI_SEMANTIC_INDEX_DIR."""
+    return VectorIndex(Path(getattr(settings, 'AI_SEMANTIC_INDEX_DIR', 'semantic_index')) / f"user-{user_id}")
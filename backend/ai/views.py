@@ -1,22 +1,49 @@
-from rest_framework.decorators import api_view, permission_classes, throttle_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, renderer_classes, throttle_classes
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from rest_framework.response import Response
 from rest_framework.throttling import UserRateThrottle
 from rest_framework import status
-from study.models import AIRequestLog
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from study.models import StudyNote
 from .ai_utils import (
+    KEY_POINT_METHODS,
     summarize_text,
     generate_study_plan_text,
     generate_flashcard_questions,
     generate_study_advice,
     extract_key_points,
     answer_question,
+    answer_questions,
     analyze_study_sentiment,
+    analyze_sentiments,
     extract_keywords,
-    generate_quiz_questions
+    generate_quiz_questions,
+    stream_summary,
+    summarize_texts
 )
+from .analysis import ANALYSES, run_analyses
+from .artifacts import NUM_KEY_POINTS, NUM_KEYWORDS, artifact_function, fresh_artifacts, get_artifact, store_artifact
+from .cache import get_result_cache
+from .document import Document
+from .jobs import JobInputError, submit_job, wait_for_job
+from .metrics import instrument_view, render_prometheus, request_context
+from .models import AIJob, NoteArtifact
+from .registry import model_registry
+from .request_log import log_ai_request
+from .semantic_search import search_notes
+from .singleflight import get_single_flight
+from .warmup import readiness
 import os
+import json
 import logging
+import math
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +52,64 @@ class AIRequestThrottle(UserRateThrottle):
     rate = '10/minute'
 
 
+class AIBatchThrottle(AIRequestThrottle):
+    """
+    Rate limit for batch endpoints, sharing the AI request budget.
+    
+    A batch is charged as one request per AI_BATCH_ITEMS_PER_CHARGE items
+    (rounded up), so batching saves overhead without bypassing the limit.
+    A batch costing more than the whole rate is always refused.
+    """
+    
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        
+        data = request.data if isinstance(request.data, dict) else {}
+        items = data.get('note_ids') or data.get('contents')
+        per_charge = max(getattr(settings, 'AI_BATCH_ITEMS_PER_CHARGE', 4), 1)
+        cost = math.ceil(len(items) / per_charge) if isinstance(items, list) else 1
+        self.cost = max(cost, 1)
+        
+        self.history = self.cache.get(self.key, [])
+        self.now = self.timer()
+        while self.history and self.history[-1] <= self.now - self.duration:
+            self.history.pop()
+        if len(self.history) + self.cost > self.num_requests:
+            return self.throttle_failure()
+        return self.throttle_success()
+    
+    def throttle_success(self):
+        self.history[:0] = [self.now] * self.cost
+        self.cache.set(self.key, self.history, self.duration)
+        return True
+    
+    def wait(self):
+        # Waiting never helps a batch larger than the rate allows
+        if self.cost > self.num_requests:
+            return None
+        return super().wait()
+
+
+class AIJobPollThrottle(UserRateThrottle):
+    scope = 'ai_job_poll'
+    rate = '120/minute'
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets clients send Accept: text/event-stream; errors become an 'error' event."""
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return _sse_event('error', data)
+
+
+@instrument_view('generate_study_plan')
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @throttle_classes([AIRequestThrottle])
@@ -81,10 +166,10 @@ def generate_study_plan(request):
         }
         
         # Log the AI request
-        AIRequestLog.objects.create(
+        log_ai_request(
             user=request.user,
             prompt=prompt,
-            response=str(ai_response)[:1000]
+            response=ai_response
         )
         
         return Response(ai_response, status=status.HTTP_200_OK)
@@ -97,16 +182,73 @@ def generate_study_plan(request):
         )
 
 
+def _get_user_note(request):
+    """
+    The request user's note named by "note_id", if one was given.
+
+    Returns:
+        tuple: (note or None, error Response or None)
+    """
+    note_id = request.data.get('note_id')
+    if note_id is None:
+        return None, None
+    try:
+        return StudyNote.objects.get(id=note_id, user=request.user), None
+    except (StudyNote.DoesNotExist, ValueError, TypeError):
+        return None, Response(
+            {'error': 'Note not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+
+def _note_artifact(note, kind, compute, *args, **kwargs):
+    """
+    A note's stored artifact of this kind, recomputed inline and stored only if stale.
+
+    Without a note, or if a stale artifact cannot be computed (e.g. the model
+    is unavailable), returns compute(*args, **kwargs), the public function
+    that reports failures in its result; that result is not stored.
+    """
+    if note is not None:
+        try:
+            return get_artifact(note, kind)
+        except Exception as e:
+            logger.error(f"Note artifact error: {e}")
+    return compute(*args, **kwargs)
+
+
+def _summary_response(document, summary_text, key_points_method=None, key_points=None):
+    """Build the summary payload shared by the regular and streaming endpoints."""
+    if key_points is None:
+        key_points = extract_key_points(document, num_points=3, method=key_points_method)
+    return {
+        'summary': summary_text,
+        'key_points': key_points,
+        'word_count': document.word_count,
+        'summary_word_count': len(summary_text.split()),
+        'compression_ratio': f"{(len(summary_text) / len(document) * 100):.1f}%"
+    }
+
+
+@instrument_view('generate_summary')
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @throttle_classes([AIRequestThrottle])
 def generate_summary(request):
     """
     Generate a summary of study notes or content using AI.
-    Expected input: { "content": "..." } or { "text": "..." }
+    Expected input: { "content": "..." }, { "text": "..." } or { "note_id": 1 },
+    plus optional "key_points_method": "heuristic" or "textrank"
     """
     # Handle both 'content' and 'text' field names
     content = request.data.get('content') or request.data.get('text', '')
+    key_points_method = request.data.get('key_points_method')
+    
+    note, error = _get_user_note(request)
+    if error:
+        return error
+    if note is not None:
+        content = note.content
     
     if not content:
         return Response(
@@ -114,6 +256,12 @@ def generate_summary(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
+    if key_points_method is not None and key_points_method not in KEY_POINT_METHODS:
+        return Response(
+            {'error': f"key_points_method must be one of: {', '.join(KEY_POINT_METHODS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
     # Handle if content is a dict
     if isinstance(content, dict):
         content = str(content)
@@ -127,23 +275,23 @@ def generate_summary(request):
     try:
         prompt = f"Summarize the following content: {str(content)[:200]}..."
         
-        # Use AI to generate summary
-        summary_text = summarize_text(str(content), max_length=150, min_length=50)
-        key_points = extract_key_points(str(content), num_points=3)
+        # Use AI to generate summary, or the note's precomputed one
+        summary_text = _note_artifact(
+            note, NoteArtifact.SUMMARY, summarize_text, str(content), max_length=150, min_length=50
+        )
         
-        ai_response = {
-            'summary': summary_text,
-            'key_points': key_points,
-            'word_count': len(str(content).split()),
-            'summary_word_count': len(summary_text.split()),
-            'compression_ratio': f"{(len(summary_text) / len(str(content)) * 100):.1f}%"
-        }
+        document = Document(content)
+        key_points = None
+        if key_points_method in (None, getattr(settings, 'AI_KEY_POINTS_METHOD', 'heuristic')):
+            key_points = _note_artifact(note, NoteArtifact.KEY_POINTS, extract_key_points, document, num_points=3)
+        
+        ai_response = _summary_response(document, summary_text, key_points_method, key_points)
         
         # Log the AI request
-        AIRequestLog.objects.create(
+        log_ai_request(
             user=request.user,
             prompt=prompt,
-            response=str(ai_response)[:1000]
+            response=ai_response
         )
         
         return Response(ai_response, status=status.HTTP_200_OK)
@@ -156,6 +304,114 @@ def generate_summary(request):
         )
 
 
+def _sse_event(event, data):
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _summary_events(content, completed):
+    """
+    Yield SSE events for a streamed summary.
+    
+    Emits a 'token' event per generated piece, then a 'done' event with the
+    full summary, key points and stats (or an 'error' event). The final
+    response is appended to `completed` so the caller can log it.
+    """
+    start = time.perf_counter()
+    pieces = []
+    try:
+        for piece in stream_summary(content, max_length=150, min_length=50):
+            if not pieces:
+                first_token_ms = round((time.perf_counter() - start) * 1000, 1)
+            pieces.append(piece)
+            yield _sse_event('token', {'text': piece})
+        
+        summary_text = ''.join(pieces).strip()
+        ai_response = _summary_response(Document(content), summary_text)
+        ai_response['time_to_first_token_ms'] = first_token_ms if pieces else None
+        ai_response['total_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        completed.append(ai_response)
+        yield _sse_event('done', ai_response)
+    
+    except Exception as e:
+        logger.error(f"Streaming summarization error: {e}")
+        yield _sse_event('error', {'error': 'Failed to generate summary', 'details': str(e)})
+
+
+async def _async_events(events, on_complete):
+    """Drive a blocking event generator from the ASGI event loop."""
+    # Each step blocks on the model, so run it off the event loop
+    next_event = sync_to_async(next, thread_sensitive=False)
+    while True:
+        event = await next_event(events, None)
+        if event is None:
+            break
+        yield event
+    await sync_to_async(on_complete)()
+
+
+@instrument_view('generate_summary_stream')
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([AIRequestThrottle])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+def generate_summary_stream(request):
+    """
+    Stream a summary of study content as Server-Sent Events.
+    Expected input: { "content": "..." } or { "text": "..." }
+    Events: 'token' ({"text": ...}) while generating, then 'done' with the
+    same fields as generate_summary, or 'error'.
+    """
+    content = request.data.get('content') or request.data.get('text', '')
+    
+    if not content:
+        return Response(
+            {'error': 'Content or text is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # Handle if content is a dict
+    if isinstance(content, dict):
+        content = str(content)
+    
+    if len(str(content).strip()) < 100:
+        return Response(
+            {'error': 'Content too short. Please provide at least 100 characters for meaningful summarization.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    content = str(content)
+    user = request.user
+    completed = []
+    # The stream finishes after the view returns; measure up to the last event
+    context = request_context()
+    
+    def log_request():
+        if completed:
+            log_ai_request(
+                user=user,
+                context=context,
+                prompt=f"Summarize the following content (streamed): {content[:200]}...",
+                response=completed[0]
+            )
+    
+    events = _summary_events(content, completed)
+    if isinstance(request._request, ASGIRequest):
+        # Under ASGI a synchronous iterator would be buffered completely
+        stream = _async_events(events, log_request)
+    else:
+        def stream():
+            yield from events
+            log_request()
+        stream = stream()
+    
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
+
+
+@instrument_view('generate_flashcards')
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @throttle_classes([AIRequestThrottle])
@@ -217,10 +473,10 @@ def generate_flashcards(request):
         }
         
         # Log the AI request
-        AIRequestLog.objects.create(
+        log_ai_request(
             user=request.user,
             prompt=prompt,
-            response=str(ai_response)[:1000]
+            response=ai_response
         )
         
         return Response(ai_response, status=status.HTTP_200_OK)
@@ -233,6 +489,7 @@ def generate_flashcards(request):
         )
 
 
+@instrument_view('get_study_advice')
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @throttle_classes([AIRequestThrottle])
@@ -275,10 +532,10 @@ def get_study_advice(request):
         }
         
         # Log the AI request
-        AIRequestLog.objects.create(
+        log_ai_request(
             user=request.user,
             prompt=prompt,
-            response=str(ai_response)[:1000]
+            response=ai_response
         )
         
         return Response(ai_response, status=status.HTTP_200_OK)
@@ -291,6 +548,7 @@ def get_study_advice(request):
         )
 
 
+@instrument_view('answer_study_question')
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @throttle_classes([AIRequestThrottle])
@@ -322,14 +580,15 @@ def answer_study_question(request):
             'question': question,
             'answer': result['answer'],
             'confidence': result['confidence'],
-            'context_used': str(context)[result.get('start', 0):result.get('end', 100)]
+            'context_used': str(context)[result.get('start', 0):result.get('end', 100)],
+            'window': result.get('window')
         }
         
         # Log the AI request
-        AIRequestLog.objects.create(
+        log_ai_request(
             user=request.user,
             prompt=prompt,
-            response=str(ai_response)[:1000]
+            response=ai_response
         )
         
         return Response(ai_response, status=status.HTTP_200_OK)
@@ -342,16 +601,103 @@ def answer_study_question(request):
         )
 
 
+@instrument_view('answer_study_questions')
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([AIRequestThrottle])
+def answer_study_questions(request):
+    """
+    Answer several questions about the same study context in one batch.
+    Expected input: { "questions": ["...", "..."], "context": "..." }
+    """
+    questions = request.data.get('questions', [])
+    context = request.data.get('context') or request.data.get('content', '')
+    max_questions = getattr(settings, 'AI_QA_MAX_QUESTIONS', 20)
+    
+    if not isinstance(questions, list) or not all(isinstance(q, str) and q.strip() for q in questions):
+        return Response(
+            {'error': 'questions must be a list of non-empty strings'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    if not questions or not context:
+        return Response(
+            {'error': 'Both questions and context are required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    if len(questions) > max_questions:
+        return Response(
+            {'error': f'At most {max_questions} questions per request'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # Handle if context is a dict
+    if isinstance(context, dict):
+        context = str(context)
+    context = str(context)
+    
+    try:
+        prompt = f"Questions: {'; '.join(questions)}. Context: {context[:200]}..."
+        
+        # Use AI to answer all questions in one batch
+        results = answer_questions(questions, context)
+        
+        ai_response = {
+            'answers': [
+                {
+                    'question': question,
+                    'answer': result['answer'],
+                    'confidence': result['confidence'],
+                    'context_used': context[result.get('start', 0):result.get('end', 100)],
+                    'window': result.get('window')
+                }
+                for question, result in zip(questions, results)
+            ]
+        }
+        
+        # Log the AI request
+        log_ai_request(
+            user=request.user,
+            prompt=prompt,
+            response=ai_response
+        )
+        
+        return Response(ai_response, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        logger.error(f"Question answering error: {e}")
+        return Response(
+            {'error': 'Failed to answer questions', 'details': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+# Interpretation shown for each sentiment
+SENTIMENT_INTERPRETATIONS = {
+    'positive': 'Your study notes show positive engagement and enthusiasm!',
+    'negative': 'Your notes suggest some frustration. Consider taking breaks or trying different study methods.',
+    'neutral': 'Your notes are objective and factual.'
+}
+
+
+@instrument_view('analyze_sentiment')
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @throttle_classes([AIRequestThrottle])
 def analyze_sentiment(request):
     """
     Analyze sentiment of study notes or reflections.
-    Expected input: { "text": "..." } or { "content": "..." }
+    Expected input: { "text": "..." }, { "content": "..." } or { "note_id": 1 }
     """
     text = request.data.get('text') or request.data.get('content', '')
     
+    note, error = _get_user_note(request)
+    if error:
+        return error
+    if note is not None:
+        text = note.content
+    
     if not text:
         return Response(
             {'error': 'Text or content is required'},
@@ -365,29 +711,22 @@ def analyze_sentiment(request):
     try:
         prompt = f"Analyze sentiment of: {str(text)[:100]}..."
         
-        # Use AI to analyze sentiment
-        result = analyze_study_sentiment(str(text))
-        
-        # Provide interpretation
-        interpretation = {
-            'positive': 'Your study notes show positive engagement and enthusiasm!',
-            'negative': 'Your notes suggest some frustration. Consider taking breaks or trying different study methods.',
-            'neutral': 'Your notes are objective and factual.'
-        }
+        # Use AI to analyze sentiment, or the note's precomputed result
+        result = _note_artifact(note, NoteArtifact.SENTIMENT, analyze_study_sentiment, str(text))
         
         ai_response = {
             'sentiment': result['sentiment'],
             'confidence': result['confidence'],
             'label': result['label'],
-            'interpretation': interpretation.get(result['sentiment'], 'Unable to determine sentiment.'),
+            'interpretation': SENTIMENT_INTERPRETATIONS.get(result['sentiment'], 'Unable to determine sentiment.'),
             'text_length': len(str(text).split())
         }
         
         # Log the AI request
-        AIRequestLog.objects.create(
+        log_ai_request(
             user=request.user,
             prompt=prompt,
-            response=str(ai_response)[:1000]
+            response=ai_response
         )
         
         return Response(ai_response, status=status.HTTP_200_OK)
@@ -400,17 +739,24 @@ def analyze_sentiment(request):
         )
 
 
+@instrument_view('extract_study_keywords')
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @throttle_classes([AIRequestThrottle])
 def extract_study_keywords(request):
     """
     Extract important keywords from study content.
-    Expected input: { "text": "...", "num_keywords": 10 }
+    Expected input: { "text": "...", "num_keywords": 10 } or { "note_id": 1, "num_keywords": 10 }
     """
     text = request.data.get('text') or request.data.get('content', '')
     num_keywords = request.data.get('num_keywords', 10)
     
+    note, error = _get_user_note(request)
+    if error:
+        return error
+    if note is not None:
+        text = note.content
+    
     if not text:
         return Response(
             {'error': 'Text or content is required'},
@@ -429,8 +775,12 @@ def extract_study_keywords(request):
     try:
         prompt = f"Extract keywords from: {str(text)[:100]}..."
         
-        # Extract keywords
-        keywords = extract_keywords(str(text), num_keywords)
+        # Extract keywords; the note's precomputed ones serve any smaller count
+        if 0 < num_keywords <= NUM_KEYWORDS:
+            keywords = _note_artifact(note, NoteArtifact.KEYWORDS, extract_keywords, str(text), num_keywords)
+            keywords = keywords[:num_keywords]
+        else:
+            keywords = extract_keywords(str(text), num_keywords)
         
         ai_response = {
             'keywords': keywords,
@@ -439,10 +789,10 @@ def extract_study_keywords(request):
         }
         
         # Log the AI request
-        AIRequestLog.objects.create(
+        log_ai_request(
             user=request.user,
             prompt=prompt,
-            response=str(ai_response)[:1000]
+            response=ai_response
         )
         
         return Response(ai_response, status=status.HTTP_200_OK)
@@ -455,6 +805,7 @@ def extract_study_keywords(request):
         )
 
 
+@instrument_view('generate_quiz')
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @throttle_classes([AIRequestThrottle])
@@ -494,10 +845,10 @@ def generate_quiz(request):
         }
         
         # Log the AI request
-        AIRequestLog.objects.create(
+        log_ai_request(
             user=request.user,
             prompt=prompt,
-            response=str(ai_response)[:1000]
+            response=ai_response
         )
         
         return Response(ai_response, status=status.HTTP_200_OK)
@@ -509,3 +860,486 @@ def generate_quiz(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+
+
+# Integer options of /api/ai/analyze/ -> (default, minimum, maximum)
+ANALYZE_OPTIONS = {
+    'num_points': (3, 1, 10),
+    'num_keywords': (10, 1, 50),
+    'num_cards': (5, 1, 20),
+    'num_questions': (5, 1, 50),
+}
+
+
+def _artifact_analyses(note, analyses, options):
+    """
+    Split the requested analyses the note's artifacts can serve.
+
+    Returns:
+        tuple: (stored results of current artifacts, functions computing the
+            stale ones for run_analyses; their results are stored afterwards)
+    """
+    usable = [name for name in analyses if name in (NoteArtifact.SUMMARY, NoteArtifact.SENTIMENT)]
+    if NoteArtifact.KEY_POINTS in analyses and options['num_points'] == NUM_KEY_POINTS:
+        usable.append(NoteArtifact.KEY_POINTS)
+    if NoteArtifact.KEYWORDS in analyses and options['num_keywords'] <= NUM_KEYWORDS:
+        usable.append(NoteArtifact.KEYWORDS)
+    if not usable:
+        return {}, {}
+    
+    stored = fresh_artifacts(note, usable)
+    stale = {kind: artifact_function(note, kind) for kind in usable if kind not in stored}
+    return stored, stale
+
+
+@instrument_view('analyze_note')
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([AIRequestThrottle])
+def analyze_note(request):
+    """
+    Run several AI features over one note in a single request.
+    Expected input: { "note_id": 1 } or { "content": "..." }, plus optional
+    "analyses": ["summary", "key_points", "keywords", "sentiment", "flashcards", "quiz"]
+    (default: all) and options such as "num_cards" or "num_keywords". With a
+    note_id, results the note's precomputed artifacts hold are served from them.
+    """
+    note_id = request.data.get('note_id')
+    content = request.data.get('content') or request.data.get('text', '')
+    analyses = request.data.get('analyses') or list(ANALYSES)
+    
+    note, error = _get_user_note(request)
+    if error:
+        return error
+    if note is not None:
+        content = note.content
+    
+    if not content:
+        return Response(
+            {'error': 'note_id or content is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    if not isinstance(analyses, list) or not set(analyses) <= set(ANALYSES):
+        return Response(
+            {'error': f"analyses must be a list of: {', '.join(ANALYSES)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    analyses = list(dict.fromkeys(analyses))
+    
+    options = {}
+    for name, (default, minimum, maximum) in ANALYZE_OPTIONS.items():
+        try:
+            value = int(request.data.get(name, default))
+        except (ValueError, TypeError):
+            value = default
+        options[name] = min(max(value, minimum), maximum)
+    
+    try:
+        start = time.perf_counter()
+        document = Document(content)
+        stored, stale = _artifact_analyses(note, analyses, options) if note is not None else ({}, {})
+        results, timings, errors = run_analyses(
+            document, [name for name in analyses if name not in stored], options, functions=stale
+        )
+        # Stale artifacts were just computed with the artifact parameters; keep them
+        for kind in stale:
+            if kind in results:
+                store_artifact(note, kind, results[kind])
+        results.update(stored)
+        timings.update((name, 0.0) for name in stored)
+        if NoteArtifact.KEYWORDS in results:
+            results[NoteArtifact.KEYWORDS] = results[NoteArtifact.KEYWORDS][:options['num_keywords']]
+        
+        ai_response = {
+            'note_id': note_id,
+            'results': results,
+            'timings_ms': timings,
+            'errors': errors,
+            'precomputed': list(stored),
+            'total_ms': round((time.perf_counter() - start) * 1000, 1),
+            'word_count': document.word_count
+        }
+        
+        # Log the AI request once for all features
+        log_ai_request(
+            user=request.user,
+            prompt=f"Analyze ({', '.join(analyses)}): {document.text[:200]}...",
+            response=ai_response
+        )
+        
+        return Response(ai_response, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        logger.error(f"Note analysis error: {e}")
+        return Response(
+            {'error': 'Failed to analyze note', 'details': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+# Integer options of /api/ai/batch/<feature>/ -> (default, minimum, maximum)
+BATCH_OPTIONS = {
+    'max_length': (150, 20, 512),
+    'min_length': (50, 5, 256),
+    'num_cards': (5, 1, 20),
+    'num_questions': (5, 1, 50),
+}
+
+
+def _batch_summaries(texts, documents, options):
+    summaries = summarize_texts(
+        texts,
+        max_length=options['max_length'],
+        min_length=min(options['min_length'], options['max_length'])
+    )
+    return [
+        summary if isinstance(summary, Exception) else _summary_response(document, summary)
+        for document, summary in zip(documents, summaries)
+    ]
+
+
+def _batch_sentiments(texts, documents, options):
+    return [
+        result if isinstance(result, Exception) else {
+            **result,
+            'interpretation': SENTIMENT_INTERPRETATIONS.get(result['sentiment'], 'Unable to determine sentiment.'),
+            'text_length': document.word_count
+        }
+        for document, result in zip(documents, analyze_sentiments(texts))
+    ]
+
+
+def _batch_flashcards(texts, documents, options):
+    return [
+        {'flashcards': generate_flashcard_questions(document, options['num_cards'])}
+        for document in documents
+    ]
+
+
+def _batch_quiz(texts, documents, options):
+    return [
+        {'quiz': generate_quiz_questions(document, options['num_questions'])}
+        for document in documents
+    ]
+
+
+# Feature -> function of (texts, documents, options) returning one result
+# (or exception) per text. The transformer features hand the whole list to
+# the model as one batch.
+BATCH_FEATURES = {
+    'summary': _batch_summaries,
+    'sentiment': _batch_sentiments,
+    'flashcards': _batch_flashcards,
+    'quiz': _batch_quiz,
+}
+
+
+@instrument_view('batch_generate')
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([AIBatchThrottle])
+def batch_generate(request, feature):
+    """
+    Run one AI feature over many notes in a single request.
+    Expected input: { "note_ids": [1, 2, ...] } or { "contents": ["...", ...] },
+    plus "max_length"/"min_length" (summary), "num_cards" (flashcards) or
+    "num_questions" (quiz). Results come back in input order; an item that
+    fails has an "error" instead of a "result".
+    """
+    if feature not in BATCH_FEATURES:
+        return Response(
+            {'error': f"Unknown batch feature. Choose from: {', '.join(BATCH_FEATURES)}"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    if not isinstance(request.data, dict):
+        return Response(
+            {'error': 'Expected a JSON object with note_ids or contents'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    note_ids = request.data.get('note_ids')
+    items = note_ids if note_ids is not None else request.data.get('contents')
+    
+    if not isinstance(items, list) or not items:
+        return Response(
+            {'error': 'note_ids or contents must be a non-empty list'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    max_items = getattr(settings, 'AI_BATCH_MAX_ITEMS', 32)
+    if len(items) > max_items:
+        return Response(
+            {'error': f'At most {max_items} items can be processed per batch'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    options = {}
+    for name, (default, minimum, maximum) in BATCH_OPTIONS.items():
+        try:
+            value = int(request.data.get(name, default))
+        except (ValueError, TypeError):
+            value = default
+        options[name] = min(max(value, minimum), maximum)
+    
+    # Item index -> text, or error message for items that cannot be processed
+    texts, errors = {}, {}
+    if note_ids is not None:
+        ids = {}
+        for index, note_id in enumerate(note_ids):
+            try:
+                ids[index] = int(note_id)
+            except (ValueError, TypeError):
+                errors[index] = 'Invalid note id'
+        notes = dict(
+            StudyNote.objects
+            .filter(user=request.user, id__in=set(ids.values()))
+            .values_list('id', 'content')
+        )
+        for index, note_id in ids.items():
+            if notes.get(note_id):
+                texts[index] = notes[note_id]
+            else:
+                errors[index] = 'Note not found'
+    else:
+        for index, content in enumerate(items):
+            if isinstance(content, str) and content.strip():
+                texts[index] = content
+            else:
+                errors[index] = 'Content is required'
+    
+    try:
+        start = time.perf_counter()
+        indexes = sorted(texts)
+        documents = [Document(texts[index]) for index in indexes]
+        outputs = BATCH_FEATURES[feature]([texts[index] for index in indexes], documents, options)
+        
+        results = []
+        for index, output in zip(indexes, outputs):
+            if isinstance(output, Exception):
+                errors[index] = str(output)
+            else:
+                results.append({'index': index, 'result': output})
+        results.extend({'index': index, 'error': error} for index, error in errors.items())
+        results.sort(key=lambda item: item['index'])
+        if note_ids is not None:
+            for item in results:
+                item['note_id'] = note_ids[item['index']]
+        
+        ai_response = {
+            'feature': feature,
+            'results': results,
+            'total': len(items),
+            'failed': len(errors),
+            'total_ms': round((time.perf_counter() - start) * 1000, 1)
+        }
+        
+        # Log the AI request once for the whole batch
+        log_ai_request(
+            user=request.user,
+            prompt=f"Batch {feature} ({len(items)} items): {str(items)[:200]}...",
+            response=ai_response
+        )
+        
+        return Response(ai_response, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        logger.error(f"Batch {feature} error: {e}")
+        return Response(
+            {'error': f'Failed to run batch {feature}', 'details': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@instrument_view('semantic_search')
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([AIRequestThrottle])
+def semantic_search(request):
+    """
+    Search the user's notes by meaning rather than exact words.
+    Expected input: { "query": "...", "top_k": 10 }
+    """
+    query = request.data.get('query') or request.data.get('q', '')
+    
+    if not isinstance(query, str) or not query.strip():
+        return Response(
+            {'error': 'Query is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        top_k = int(request.data.get('top_k', 10))
+    except (ValueError, TypeError):
+        top_k = 10
+    top_k = min(max(top_k, 1), getattr(settings, 'AI_SEMANTIC_MAX_RESULTS', 50))
+    
+    try:
+        start = time.perf_counter()
+        matches = search_notes(request.user.id, query.strip(), top_k)
+        notes = StudyNote.objects.filter(user=request.user, id__in=[note_id for note_id, _ in matches]).in_bulk()
+        
+        results = [
+            {
+                'note_id': note_id,
+                'title': notes[note_id].title,
+                'related_topic': notes[note_id].related_topic,
+                'snippet': notes[note_id].content[:200],
+                'score': round(score, 4),
+                'created_at': notes[note_id].created_at,
+            }
+            for note_id, score in matches
+            if note_id in notes
+        ]
+        
+        return Response({
+            'query': query,
+            'results': results,
+            'total_ms': round((time.perf_counter() - start) * 1000, 1)
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        logger.error(f"Semantic search error: {e}")
+        return Response(
+            {'error': 'Failed to search notes', 'details': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+def _job_response(job):
+    """Serialize an AI job for the client."""
+    return {
+        'id': job.id,
+        'type': job.job_type,
+        'status': job.status,
+        'priority': job.priority,
+        'attempts': job.attempts,
+        'result': job.result,
+        'error': job.error or None,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+    }
+
+
+@instrument_view('submit_ai_job')
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([AIRequestThrottle])
+def submit_ai_job(request):
+    """
+    Queue an AI request to run in the background.
+    Expected input: { "type": "summary", "payload": { "content": "..." } }
+    The payload takes the same fields as the matching synchronous endpoint.
+    Returns the job id immediately; poll GET /api/ai/jobs/<id>/ for the result.
+    """
+    job_type = request.data.get('type', '')
+    payload = request.data.get('payload', {})
+    
+    try:
+        job = submit_job(request.user, job_type, payload)
+    except JobInputError as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    return Response(_job_response(job), status=status.HTTP_202_ACCEPTED)
+
+
+@instrument_view('ai_job_detail')
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([AIJobPollThrottle])
+def ai_job_detail(request, job_id):
+    """
+    Get the status and result of an AI job.
+    Pass ?wait=<seconds> to long-poll until the job finishes (capped at AI_JOB_MAX_WAIT).
+    """
+    try:
+        job = AIJob.objects.get(id=job_id, user=request.user)
+    except AIJob.DoesNotExist:
+        return Response(
+            {'error': 'Job not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    try:
+        wait = float(request.query_params.get('wait', 0))
+    except ValueError:
+        wait = 0
+    wait = min(max(wait, 0), getattr(settings, 'AI_JOB_MAX_WAIT', 30))
+    
+    if wait and not job.finished:
+        job = wait_for_job(job, wait)
+    
+    return Response(_job_response(job), status=status.HTTP_200_OK)
+
+
+@instrument_view('cache_stats')
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    """
+    Report hit/miss counters for the AI result cache of this worker, and
+    how many calls shared an identical call already in flight.
+    """
+    stats = get_result_cache().stats()
+    stats['single_flight'] = get_single_flight().stats()
+    return Response(stats, status=status.HTTP_200_OK)
+
+
+@instrument_view('model_status')
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def model_status(request):
+    """
+    Report load state, load time and memory residency of each AI model in this worker.
+    """
+    return Response({
+        'models': model_registry.status(),
+        'resident_memory_mb': model_registry.resident_memory_mb(),
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+@throttle_classes([])
+def health(request):
+    """
+    Readiness probe for load balancers.
+    Returns 200 once every preloaded model is loaded and warm, 503 otherwise.
+    """
+    ready, models = readiness()
+    return Response(
+        {'status': 'ready' if ready else 'not_ready', 'models': models},
+        status=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
+
+def _is_staff_request(request):
+    """True if the request carries a staff user's JWT or session."""
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    user = authenticated[0] if authenticated else getattr(request, 'user', None)
+    return bool(user is not None and user.is_staff)
+
+
+def prometheus_metrics(request):
+    """
+    AI latency and throughput metrics of all worker processes in Prometheus text format.
+    Scrapers must send AI_METRICS_TOKEN as a Bearer token; while it is unset,
+    only staff users can read the metrics.
+    """
+    token = getattr(settings, 'AI_METRICS_TOKEN', '')
+    if token:
+        allowed = request.headers.get('Authorization') == f'Bearer {token}'
+    else:
+        allowed = _is_staff_request(request)
+    if not allowed:
+        return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
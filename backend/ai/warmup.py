@@ -0,0 +1,141 @@
+"""
+Model preloading and warm-up.
+
+Loads the configured pipelines and runs one small inference through each,
+so the first real request does not pay for weight loading or lazy
+initialization. Used by `manage.py warm_models`, the WSGI/ASGI startup hook
+and the inference server.
+"""
+from django.conf import settings
+import logging
+import threading
+import time
+
+from .inference_client import SERVED_MODELS, is_remote, remote_call
+from .registry import FAILED, model_registry
+
+logger = logging.getLogger(__name__)
+
+WARMUP_TEXT = (
+    "Machine learning is a subset of artificial intelligence that focuses on "
+    "algorithms that improve their performance on a task through experience. "
+    "Common applications include image recognition and natural language processing."
+)
+
+# Registry name -> one small inference through the loaded pipeline
+WARMUP_INFERENCES = {
+    'summarization': lambda model: model(WARMUP_TEXT, max_length=30, min_length=5, do_sample=False),
+    'text-generation': lambda model: model("Study tips:", max_new_tokens=5, num_return_sequences=1),
+    'question-answering': lambda model: model(question="What is machine learning?", context=WARMUP_TEXT),
+    'sentiment-analysis': lambda model: model("I enjoy studying for this course."),
+    'embedding': lambda model: model(WARMUP_TEXT),
+}
+
+
+def get_preload_models():
+    """Registry names configured for preloading (the models AI endpoints use if none are set)."""
+    return list(getattr(settings, 'AI_PRELOAD_MODELS', None) or SERVED_MODELS)
+
+
+def warm_model(name):
+    """
+    Load one model and run its warm-up inference.
+
+    Args:
+        name (str): Registry name
+
+    Returns:
+        dict: status ('ready' or 'failed'), timings and error if any
+    """
+    start = time.perf_counter()
+    model = model_registry.get(name)
+    if model is None:
+        return {
+            'status': 'failed',
+            'error': model_registry.status()[name]['error'] or 'Model failed to load',
+        }
+    load_seconds = time.perf_counter() - start
+
+    warmup = WARMUP_INFERENCES.get(name)
+    start = time.perf_counter()
+    try:
+        if warmup is not None:
+            warmup(model)
+    except Exception as e:
+        logger.error(f"Warm-up inference for {name} failed: {e}")
+        return {'status': 'failed', 'load_seconds': round(load_seconds, 3), 'error': str(e)}
+    warmup_seconds = time.perf_counter() - start
+    model_registry.record_warmup(name, warmup_seconds)
+
+    logger.info(f"{name} model warm (load {load_seconds:.1f}s, warm-up {warmup_seconds:.1f}s)")
+    return {
+        'status': 'ready',
+        'load_seconds': round(load_seconds, 3),
+        'warmup_seconds': round(warmup_seconds, 3),
+    }
+
+
+def warm_models(names=None):
+    """
+    Load and warm several models.
+
+    Args:
+        names (list): Registry names (defaults to AI_PRELOAD_MODELS)
+
+    Returns:
+        dict: Registry name -> result of warm_model
+    """
+    return {name: warm_model(name) for name in (names or get_preload_models())}
+
+
+def warm_on_startup():
+    """
+    Warm the configured models when a web server process starts.
+
+    Called from core/wsgi.py and core/asgi.py. Does nothing unless
+    AI_WARMUP_ON_STARTUP is set, and nothing in remote inference mode where
+    the inference server holds the models. By default this blocks until the
+    models are warm so the process accepts traffic only afterwards; with
+    AI_WARMUP_IN_BACKGROUND it returns immediately and /api/ai/health/
+    reports readiness.
+    """
+    if not getattr(settings, 'AI_WARMUP_ON_STARTUP', False):
+        return
+    if is_remote():
+        return
+
+    if getattr(settings, 'AI_WARMUP_IN_BACKGROUND', False):
+        threading.Thread(target=warm_models, name='ai-warmup', daemon=True).start()
+    else:
+        warm_models()
+
+
+def readiness():
+    """
+    Report whether every preloaded model is loaded and warm.
+
+    Without AI_WARMUP_ON_STARTUP nothing is preloaded and models load on
+    first use, so the process is ready unless one of them failed to load.
+    In remote inference mode the inference server's models are checked.
+
+    Returns:
+        tuple: (ready, per-model status dict)
+    """
+    if is_remote():
+        # The inference server holds the models, so its status is what matters
+        try:
+            status = remote_call('model_status')
+        except Exception as e:
+            return False, {'inference_server': {'status': 'unreachable', 'error': str(e)}}
+        required = SERVED_MODELS
+    else:
+        status = model_registry.status()
+        required = get_preload_models()
+    # A misspelled AI_PRELOAD_MODELS entry makes the process not ready rather than fail the probe
+    models = {
+        name: status.get(name) or {'status': FAILED, 'warm': False, 'error': f"Unknown model '{name}'"}
+        for name in required
+    }
+    if not is_remote() and not getattr(settings, 'AI_WARMUP_ON_STARTUP', False):
+        return all(model['status'] != FAILED for model in models.values()), models
+    return all(model['warm'] for model in models.values()), models
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from analytics.rollups import rebuild_ai_usage_rollups, update_ai_usage_rollups
+
+
+class Command(BaseCommand):
+    help = 'Fold new AI request logs into the per-user, per-endpoint, per-day usage rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Recount all rollups from the logs in the table')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Logs folded in per transaction')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            rebuild_ai_usage_rollups()
+        total = 0
+        while True:
+            count = update_ai_usage_rollups(options['chunk_size'])
+            if not count:
+                break
+            total += count
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {total} AI request logs"))
@@ -1,3 +1,43 @@
 from django.db import models
+from django.conf import settings
 
-# Create your models here.
+
+class AIUsageRollup(models.Model):
+    """
+    AI request totals of one user and endpoint on one day (see analytics/rollups.py).
+
+    latency_histogram holds request counts per bucket of rollups.LATENCY_BUCKETS_MS,
+    with a final overflow bucket, so percentiles can be merged across rows.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='ai_usage', null=True)
+    endpoint = models.CharField(max_length=100)
+    day = models.DateField()
+    requests = models.PositiveIntegerField(default=0)
+    errors = models.PositiveIntegerField(default=0)
+    cache_lookups = models.PositiveIntegerField(default=0)
+    cache_hits = models.PositiveIntegerField(default=0)
+    timed_requests = models.PositiveIntegerField(default=0)
+    latency_total_ms = models.FloatField(default=0)
+    latency_histogram = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'endpoint', 'day'], name='ai_usage_user_endpoint_day_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'day'], name='ai_usage_user_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.endpoint} usage of {self.user} on {self.day}"
+
+
+class AIUsageRollupCursor(models.Model):
+    """Last AIRequestLog id counted in the rollups."""
+    name = models.CharField(max_length=50, unique=True)
+    last_log_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} rolled up to log {self.last_log_id}"
@@ -0,0 +1,163 @@
+"""
+Incrementally maintained AI usage rollups.
+
+AIUsageRollup keeps one row of totals per (user, endpoint, day): requests,
+errors, cache hits and a latency histogram. update_ai_usage_rollups() folds
+the AIRequestLog rows added since the last run into those rows, so usage
+reports read a handful of rollup rows instead of scanning the log table.
+
+It is called by the AI request log writer after it flushes and by
+`manage.py rollup_ai_usage`. Each run claims the id range it folds in by
+advancing a cursor row with a compare-and-set UPDATE inside the same
+transaction, so concurrent runs in different processes never count a log
+twice. Logs newer than AI_USAGE_ROLLUP_LAG seconds are left for the next
+run, giving concurrent inserts with lower ids time to commit.
+"""
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from datetime import timedelta
+
+from study.models import AIRequestLog
+from .models import AIUsageRollup, AIUsageRollupCursor
+
+CURSOR_NAME = 'ai_request_log'
+
+# Upper bounds of the latency histogram buckets; one more bucket counts slower
+# requests. Stored histograms use these, so rebuild the rollups after changing them.
+LATENCY_BUCKETS_MS = (
+    10, 25, 50, 75, 100, 150, 200, 300, 400, 500, 750,
+    1000, 1500, 2000, 3000, 5000, 7500, 10000, 20000, 30000, 60000,
+)
+
+
+def _bucket_filters():
+    lower = None
+    for upper in LATENCY_BUCKETS_MS:
+        condition = Q(latency_ms__lte=upper)
+        if lower is not None:
+            condition &= Q(latency_ms__gt=lower)
+        yield condition
+        lower = upper
+    yield Q(latency_ms__gt=lower)
+
+
+def _aggregate(logs):
+    """Totals of logs per (user, endpoint, day), computed by the database."""
+    buckets = {f'bucket_{index}': Count('id', filter=condition) for index, condition in enumerate(_bucket_filters())}
+    return (
+        logs.annotate(day=TruncDate('created_at'))
+        .values('user_id', 'endpoint', 'day')
+        .annotate(
+            requests=Count('id'),
+            errors=Count('id', filter=Q(status__gte=400)),
+            cache_lookups=Count('id', filter=Q(cache_hit__isnull=False)),
+            cache_hits=Count('id', filter=Q(cache_hit=True)),
+            timed_requests=Count('latency_ms'),
+            latency_total_ms=Sum('latency_ms'),
+            **buckets
+        )
+        .order_by()
+    )
+
+
+def _apply(total):
+    histogram = [total[f'bucket_{index}'] for index in range(len(LATENCY_BUCKETS_MS) + 1)]
+    key = {'user_id': total['user_id'], 'endpoint': total['endpoint'], 'day': total['day']}
+    increments = {
+        name: total[name] or 0
+        for name in ('requests', 'errors', 'cache_lookups', 'cache_hits', 'timed_requests', 'latency_total_ms')
+    }
+    rollup = AIUsageRollup.objects.select_for_update().filter(**key).first()
+    if rollup is None:
+        try:
+            with transaction.atomic():
+                AIUsageRollup.objects.create(latency_histogram=histogram, **key, **increments)
+            return
+        except IntegrityError:
+            rollup = AIUsageRollup.objects.select_for_update().get(**key)
+
+    # Runs are serialized by the cursor, so reading and rewriting the histogram is safe
+    current = rollup.latency_histogram or [0] * len(histogram)
+    rollup.latency_histogram = [old + new for old, new in zip(current, histogram)]
+    AIUsageRollup.objects.filter(id=rollup.id).update(
+        latency_histogram=rollup.latency_histogram,
+        updated_at=timezone.now(),
+        **{name: F(name) + value for name, value in increments.items()}
+    )
+
+
+def update_ai_usage_rollups(max_logs=None):
+    """
+    Fold AIRequestLog rows added since the last run into the rollups.
+
+    Args:
+        max_logs (int): Most logs to fold in (default AI_USAGE_ROLLUP_CHUNK);
+            call again while it returns a full chunk
+
+    Returns:
+        int: Number of logs folded in (0 if another process got there first)
+    """
+    max_logs = max_logs or getattr(settings, 'AI_USAGE_ROLLUP_CHUNK', 10000)
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'AI_USAGE_ROLLUP_LAG', 10))
+    cursor, _ = AIUsageRollupCursor.objects.get_or_create(name=CURSOR_NAME)
+    start = cursor.last_log_id
+
+    pending = AIRequestLog.objects.filter(id__gt=start, created_at__lt=cutoff).order_by('id')
+    end = pending[:max_logs].aggregate(end=Max('id'))['end']
+    if end is None:
+        return 0
+
+    with transaction.atomic():
+        claimed = AIUsageRollupCursor.objects.filter(name=CURSOR_NAME, last_log_id=start).update(
+            last_log_id=end,
+            updated_at=timezone.now()
+        )
+        if not claimed:
+            return 0
+        logs = AIRequestLog.objects.filter(id__gt=start, id__lte=end)
+        count = 0
+        for total in _aggregate(logs):
+            _apply(total)
+            count += total['requests']
+    return count
+
+
+def rebuild_ai_usage_rollups():
+    """Drop all rollups and recount them from the logs still in AIRequestLog."""
+    with transaction.atomic():
+        AIUsageRollup.objects.all().delete()
+        AIUsageRollupCursor.objects.update_or_create(name=CURSOR_NAME, defaults={'last_log_id': 0})
+
+
+def percentile(histogram, fraction):
+    """
+    Estimate a latency percentile from histogram counts.
+
+    Interpolates linearly inside the bucket holding the percentile; the
+    overflow bucket reports its lower bound.
+
+    Args:
+        histogram (list): Counts per LATENCY_BUCKETS_MS bucket, plus overflow
+        fraction (float): Percentile as a fraction, e.g. 0.95
+
+    Returns:
+        float or None: Latency in milliseconds
+    """
+    total = sum(histogram)
+    if not total:
+        return None
+    rank = fraction * total
+    seen = 0
+    lower = 0
+    for index, count in enumerate(histogram):
+        if index >= len(LATENCY_BUCKETS_MS):
+            return float(lower)
+        upper = LATENCY_BUCKETS_MS[index]
+        if count and seen + count >= rank:
+            return round(lower + (upper - lower) * (rank - seen) / count, 1)
+        seen += count
+        lower = upper
+    return float(lower)
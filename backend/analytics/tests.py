@@ -1,3 +1,70 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from study.models import AIRequestLog
+from .models import AIUsageRollup
+from .rollups import update_ai_usage_rollups
+
+
+@override_settings(AI_USAGE_ROLLUP_LAG=10)
+class UpdateAIUsageRollupsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pass')
+
+    def log(self, endpoint='summarize', age=60, **kwargs):
+        return AIRequestLog.objects.create(
+            user=self.user,
+            endpoint=endpoint,
+            prompt='Prompt',
+            created_at=timezone.now() - timedelta(seconds=age),
+            **kwargs
+        )
+
+    def rollup(self, endpoint='summarize'):
+        # Logs straddling midnight land in two rows; merge them like a report would
+        rows = list(AIUsageRollup.objects.filter(user=self.user, endpoint=endpoint))
+        merged = rows[0]
+        for row in rows[1:]:
+            for name in ('requests', 'errors', 'cache_lookups', 'cache_hits', 'timed_requests', 'latency_total_ms'):
+                setattr(merged, name, getattr(merged, name) + getattr(row, name))
+            merged.latency_histogram = [a + b for a, b in zip(merged.latency_histogram, row.latency_histogram)]
+        return merged
+
+    def test_running_twice_counts_each_log_once(self):
+        self.log(latency_ms=20, cache_hit=True)
+        self.log(latency_ms=400, cache_hit=False)
+        self.log(status=500, latency_ms=5)
+        self.log(endpoint='sentiment')
+
+        self.assertEqual(update_ai_usage_rollups(), 4)
+        self.assertEqual(update_ai_usage_rollups(), 0)
+
+        rollup = self.rollup()
+        self.assertEqual(rollup.requests, 3)
+        self.assertEqual(rollup.errors, 1)
+        self.assertEqual(rollup.cache_lookups, 2)
+        self.assertEqual(rollup.cache_hits, 1)
+        self.assertEqual(rollup.timed_requests, 3)
+        self.assertEqual(rollup.latency_total_ms, 425)
+        self.assertEqual(sum(rollup.latency_histogram), 3)
+        self.assertEqual(self.rollup('sentiment').requests, 1)
+
+    def test_new_logs_are_added_to_existing_rollups(self):
+        self.log(latency_ms=20)
+        update_ai_usage_rollups()
+        self.log(latency_ms=30)
+        recent = self.log(latency_ms=40, age=0)
+
+        self.assertEqual(update_ai_usage_rollups(), 1)
+
+        rollup = self.rollup()
+        self.assertEqual(rollup.requests, 2)
+        self.assertEqual(rollup.latency_total_ms, 50)
+
+        # Logs younger than AI_USAGE_ROLLUP_LAG wait for a later run
+        AIRequestLog.objects.filter(id=recent.id).update(created_at=timezone.now() - timedelta(seconds=60))
+        self.assertEqual(update_ai_usage_rollups(), 1)
+        self.assertEqual(self.rollup().requests, 3)
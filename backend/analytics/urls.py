@@ -6,4 +6,5 @@ urlpatterns = [
     path('weekly/', views.get_weekly_progress, name='weekly_progress'),
     path('topics/', views.get_topic_performance, name='topic_performance'),
     path('recommendations/', views.get_recommendations, name='recommendations'),
+    path('ai-usage/', views.get_ai_usage, name='ai_usage'),
 ]
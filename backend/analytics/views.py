@@ -3,6 +3,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from study.models import StudySession, StudyNote
+from .models import AIUsageRollup
+from .rollups import LATENCY_BUCKETS_MS, percentile
 from django.db.models import Sum, Count, Avg, Q
 from datetime import datetime, timedelta
 from django.utils import timezone
@@ -199,3 +201,81 @@ def get_recommendations(request):
     })
     
     return Response({'recommendations': recommendations}, status=status.HTTP_200_OK)
+
+
+def _usage_summary(rows):
+    """Merge rollup rows into totals with rates and latency percentiles."""
+    requests = sum(row['requests'] for row in rows)
+    errors = sum(row['errors'] for row in rows)
+    cache_lookups = sum(row['cache_lookups'] for row in rows)
+    cache_hits = sum(row['cache_hits'] for row in rows)
+    timed_requests = sum(row['timed_requests'] for row in rows)
+    latency_total = sum(row['latency_total_ms'] for row in rows)
+    histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    for row in rows:
+        for index, count in enumerate(row['latency_histogram'] or []):
+            histogram[index] += count
+    
+    return {
+        'requests': requests,
+        'errors': errors,
+        'error_rate': round(errors / requests * 100, 2) if requests else 0.0,
+        'cache_hit_ratio': round(cache_hits / cache_lookups, 4) if cache_lookups else None,
+        'average_latency_ms': round(latency_total / timed_requests, 1) if timed_requests else None,
+        'p50_latency_ms': percentile(histogram, 0.5),
+        'p95_latency_ms': percentile(histogram, 0.95),
+        'p99_latency_ms': percentile(histogram, 0.99)
+    }
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_ai_usage(request):
+    """
+    Get AI usage of the authenticated user from the daily rollups.
+    Optional query parameters: "days" (default 30, at most 365) and "endpoint".
+    Returns totals, per-endpoint and per-day request counts, error rates,
+    cache-hit ratios and latency percentiles.
+    """
+    try:
+        days = min(max(int(request.query_params.get('days', 30)), 1), 365)
+    except (ValueError, TypeError):
+        days = 30
+    endpoint = request.query_params.get('endpoint')
+    
+    # Rollups cover whole days; include today
+    end_date = timezone.now().date()
+    start_date = end_date - timedelta(days=days - 1)
+    
+    # At most one row per endpoint and day, however many requests were logged
+    rollups = AIUsageRollup.objects.filter(user=request.user, day__gte=start_date, day__lte=end_date)
+    if endpoint:
+        rollups = rollups.filter(endpoint=endpoint)
+    rows = list(rollups.values(
+        'endpoint', 'day', 'requests', 'errors', 'cache_lookups', 'cache_hits',
+        'timed_requests', 'latency_total_ms', 'latency_histogram'
+    ))
+    
+    # Group by endpoint and by day
+    by_endpoint, by_day = {}, {}
+    for row in rows:
+        by_endpoint.setdefault(row['endpoint'], []).append(row)
+        by_day.setdefault(row['day'], []).append(row)
+    
+    usage = {
+        'period': {
+            'start': start_date.strftime('%Y-%m-%d'),
+            'end': end_date.strftime('%Y-%m-%d')
+        },
+        'totals': _usage_summary(rows),
+        'endpoints': [
+            {'endpoint': name, **_usage_summary(endpoint_rows)}
+            for name, endpoint_rows in sorted(by_endpoint.items())
+        ],
+        'daily_breakdown': [
+            {'date': day.strftime('%Y-%m-%d'), **_usage_summary(day_rows)}
+            for day, day_rows in sorted(by_day.items())
+        ]
+    }
+    
+    return Response(usage, status=status.HTTP_200_OK)
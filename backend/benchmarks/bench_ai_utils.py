@@ -0,0 +1,292 @@
+"""
+Benchmark every public ai_utils function over small, medium and very large notes.
+
+Each function runs a fixed number of times per corpus size (after one
+untimed warm-up call) and the benchmark reports p50/p95/p99 latency,
+throughput and the process's peak RSS. The result cache is disabled so every
+call does the full work.
+
+By default deterministic fake pipelines stand in for the transformer models,
+so a run takes seconds and measures the code around the models (chunking,
+batching, heuristics). Pass --real to load the configured models instead.
+
+Results can be saved as JSON and compared against a stored baseline.
+
+Usage:
+    python benchmarks/bench_ai_utils.py
+    python benchmarks/bench_ai_utils.py --output results.json
+    python benchmarks/bench_ai_utils.py --baseline results.json --fail-on-regression
+    python benchmarks/bench_ai_utils.py --real --functions summarize_text answer_question
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import resource
+import statistics
+import sys
+import time
+import zlib
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import django
+
+django.setup()
+
+import numpy as np
+from django.conf import settings
+from ai import ai_utils, qa
+from ai.registry import model_registry
+
+SENTENCES = [
+    "Machine learning is a subset of artificial intelligence that learns patterns from data.",
+    "Supervised learning trains a model on labeled examples to predict outcomes.",
+    "Photosynthesis converts sunlight, water and carbon dioxide into glucose and oxygen.",
+    "The mitochondria produce most of the chemical energy needed by the cell.",
+    "Newton's second law states that force equals mass times acceleration.",
+    "An important principle of thermodynamics is that energy is always conserved.",
+    "The French Revolution began in 1789 and reshaped European politics.",
+    "Derivatives measure how a function changes as its input changes.",
+    "Key concepts in economics include supply, demand and opportunity cost.",
+    "Neural networks are composed of layers of interconnected artificial neurons.",
+    "Spaced repetition improves long-term retention of vocabulary and facts.",
+    "The Pythagorean theorem relates the sides of a right triangle.",
+]
+
+# Words per note for each corpus size
+CORPUS_SIZES = {'small': 60, 'medium': 600, 'large': 20000}
+
+
+def build_note(words):
+    """Deterministic study note of roughly `words` words."""
+    parts, count, index = [], 0, 0
+    while count < words:
+        sentence = SENTENCES[index % len(SENTENCES)]
+        if index >= len(SENTENCES):
+            # Vary repeated sentences so heuristics see a realistic vocabulary
+            sentence = sentence.replace('.', f" in lesson {index // len(SENTENCES)}.")
+        parts.append(sentence)
+        count += len(sentence.split())
+        index += 1
+    return ' '.join(parts)
+
+
+# Function name -> call with a note of the given size
+FUNCTIONS = {
+    'summarize_text': lambda note, size: ai_utils.summarize_text(note, max_length=150, min_length=50),
+    'answer_question': lambda note, size: ai_utils.answer_question("What is machine learning?", note),
+    'analyze_study_sentiment': lambda note, size: ai_utils.analyze_study_sentiment(note),
+    'extract_keywords': lambda note, size: ai_utils.extract_keywords(note, 10),
+    'generate_quiz_questions': lambda note, size: ai_utils.generate_quiz_questions(note, 5),
+    'generate_flashcard_questions': lambda note, size: ai_utils.generate_flashcard_questions(note, 5),
+    'extract_key_points': lambda note, size: ai_utils.extract_key_points(note, 3),
+    'generate_study_plan_text': lambda note, size: ai_utils.generate_study_plan_text(
+        'Machine Learning', {'small': 7, 'medium': 30, 'large': 365}[size], 'intermediate'
+    ),
+}
+
+
+class FakeTokenizer:
+    """Whitespace tokenizer with the parts of the tokenizer API ai_utils and ai/qa.py use."""
+    model_max_length = 1024
+    name_or_path = 'fake-whitespace'
+    pad_token_id = 0
+    cls_token_id = 101
+    sep_token_id = 102
+
+    def encode(self, text, add_special_tokens=True):
+        return text.split()
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 3 if pair else 2
+
+    def __call__(self, text, add_special_tokens=True, return_offsets_mapping=False):
+        words = list(re.finditer(r'\S+', text))
+        encoding = {'input_ids': [1000 + zlib.crc32(word.group().encode('utf-8')) % 30000 for word in words]}
+        if return_offsets_mapping:
+            encoding['offset_mapping'] = [word.span() for word in words]
+        return encoding
+
+    def build_inputs_with_special_tokens(self, first, second=None):
+        ids = [self.cls_token_id] + list(first) + [self.sep_token_id]
+        if second is not None:
+            ids += list(second) + [self.sep_token_id]
+        return ids
+
+
+class FakeSummarizer:
+    """Deterministic summarizer: keeps the first half of max_length words."""
+    tokenizer = FakeTokenizer()
+
+    def __call__(self, inputs, max_length=150, **kwargs):
+        batch = inputs if isinstance(inputs, list) else [inputs]
+        return [{'summary_text': ' '.join(text.split()[:max(1, max_length // 2)])} for text in batch]
+
+
+class FakeQuestionAnswerer:
+    """
+    Deterministic QA.
+
+    The sliding-window path (the default) tokenizes with the fake tokenizer
+    and gets its logits from fake_qa_logits; the pipeline call, used when
+    AI_QA_SLIDING_WINDOW is off, answers with the first sentence.
+    """
+    tokenizer = FakeTokenizer()
+
+    def __call__(self, question, context, **kwargs):
+        end = context.find('.') + 1 or len(context)
+        return {'answer': context[:end], 'score': 0.5, 'start': 0, 'end': end}
+
+
+class FakeSentiment:
+    """Deterministic sentiment from a checksum of the input."""
+
+    def __call__(self, text, **kwargs):
+        label = 'POSITIVE' if zlib.crc32(text.encode('utf-8')) % 2 else 'NEGATIVE'
+        return [{'label': label, 'score': 0.75}]
+
+
+def fake_qa_logits(model, input_ids, batch_size):
+    """
+    Stand-in for the QA forward pass (qa._run_model), which needs torch.
+
+    Windowing, context caching and span selection still run as in production;
+    the logits are derived from the padded token ids.
+    """
+    length = max(len(ids) for ids in input_ids)
+    ids = np.array([list(ids) + [0] * (length - len(ids)) for ids in input_ids], dtype=np.float32)
+    return np.sin(ids), np.cos(ids)
+
+
+def install_fakes():
+    model_registry.set('summarization', FakeSummarizer())
+    model_registry.set('question-answering', FakeQuestionAnswerer())
+    model_registry.set('sentiment-analysis', FakeSentiment())
+    qa._run_model = fake_qa_logits
+
+
+def peak_rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def measure(name, note, size, iterations):
+    """Time one function over one note."""
+    function = FUNCTIONS[name]
+    function(note, size)  # warm-up (model loads, lazy initialization)
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call_start = time.perf_counter()
+        function(note, size)
+        latencies.append((time.perf_counter() - call_start) * 1000)
+    elapsed = time.perf_counter() - start
+
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    return {
+        'iterations': iterations,
+        'p50_ms': round(cuts[49], 3),
+        'p95_ms': round(cuts[94], 3),
+        'p99_ms': round(cuts[98], 3),
+        'mean_ms': round(statistics.mean(latencies), 3),
+        'throughput_per_s': round(iterations / elapsed, 2) if elapsed else None,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """
+    Print p50/p95 changes against a baseline.
+
+    Returns:
+        list: (function, size) pairs whose p95 regressed by more than threshold
+        percent and by at least min_delta_ms (sub-millisecond timings are noisy)
+    """
+    regressions = []
+    print()
+    print(f"Compared with baseline ({baseline['meta'].get('mode')} mode, {baseline['meta'].get('timestamp')}):")
+    print(f"{'function':<30} {'size':<7} {'p50 change':>11} {'p95 change':>11}")
+    for name, sizes in results['results'].items():
+        for size, current in sizes.items():
+            previous = baseline['results'].get(name, {}).get(size)
+            if not previous:
+                continue
+            changes = []
+            for metric in ('p50_ms', 'p95_ms'):
+                before = previous[metric]
+                changes.append((current[metric] - before) / before * 100 if before else 0.0)
+            flag = ''
+            if changes[1] > threshold and current['p95_ms'] - previous['p95_ms'] >= min_delta_ms:
+                regressions.append((name, size))
+                flag = '  REGRESSION'
+            print(f"{name:<30} {size:<7} {changes[0]:>+10.1f}% {changes[1]:>+10.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--real', action='store_true', help='Use the configured models instead of fakes')
+    parser.add_argument('--functions', nargs='+', default=list(FUNCTIONS), choices=list(FUNCTIONS))
+    parser.add_argument('--sizes', nargs='+', default=list(CORPUS_SIZES), choices=list(CORPUS_SIZES))
+    parser.add_argument('--iterations', type=int, default=20, help='Timed calls per function and size')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--baseline', help='Compare with results saved by an earlier run')
+    parser.add_argument('--threshold', type=float, default=20.0,
+                        help='p95 slowdown in percent that counts as a regression (default 20)')
+    parser.add_argument('--min-delta-ms', type=float, default=0.5,
+                        help='Smallest p95 slowdown in ms that counts as a regression (default 0.5)')
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help='Exit with status 1 if any function regressed')
+    args = parser.parse_args()
+
+    # Identical inputs would otherwise be served from the result cache
+    settings.AI_RESULT_CACHE_ENABLED = False
+    if not args.real:
+        install_fakes()
+
+    notes = {size: build_note(CORPUS_SIZES[size]) for size in args.sizes}
+    results = {
+        'meta': {
+            'mode': 'real' if args.real else 'fake',
+            'iterations': args.iterations,
+            'corpus_words': {size: len(notes[size].split()) for size in args.sizes},
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': {},
+    }
+
+    print(f"Mode: {results['meta']['mode']}, iterations: {args.iterations}, "
+          f"corpus words: {results['meta']['corpus_words']}")
+    print(f"{'function':<30} {'size':<7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'calls/s':>9} {'peak RSS MB':>12}")
+    for name in args.functions:
+        results['results'][name] = {}
+        for size in args.sizes:
+            result = measure(name, notes[size], size, args.iterations)
+            results['results'][name][size] = result
+            print(f"{name:<30} {size:<7} {result['p50_ms']:>9} {result['p95_ms']:>9} {result['p99_ms']:>9} "
+                  f"{result['throughput_per_s']:>9} {result['peak_rss_mb']:>12}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['meta'].get('mode') != results['meta']['mode']:
+            print(f"\nWarning: baseline was recorded in {baseline['meta'].get('mode')} mode")
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+Compare inference backends (torch fp32, torch dynamic int8, ONNX Runtime).
+
+Each backend runs in its own subprocess so resident memory is measured in
+isolation. For every model the benchmark reports load time, peak RSS, mean
+and p50 latency over a fixed corpus, and how often the outputs agree with
+the torch fp32 reference.
+
+Usage:
+    python benchmarks/bench_backends.py
+    python benchmarks/bench_backends.py --models sentiment-analysis --backends torch onnx
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+# Add the backend directory to Python path
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+SENTIMENT_CORPUS = [
+    "I finally understand recursion and it feels great!",
+    "This chapter on thermodynamics is confusing and frustrating.",
+    "The lecture covered the basics of linear algebra.",
+    "I keep forgetting the formulas no matter how often I review them.",
+    "Working through the practice problems with friends was really fun.",
+    "My exam is tomorrow and I am not prepared at all.",
+    "Spaced repetition has made memorizing vocabulary much easier.",
+    "The textbook explanation of entropy is clear and well written.",
+]
+
+QA_CONTEXT = (
+    "Photosynthesis is the process by which green plants use sunlight to synthesize "
+    "food from carbon dioxide and water. It takes place mainly in the chloroplasts of "
+    "leaf cells, which contain the pigment chlorophyll. The process releases oxygen as "
+    "a by-product. The light-dependent reactions occur in the thylakoid membranes, while "
+    "the Calvin cycle takes place in the stroma."
+)
+
+QA_CORPUS = [
+    ("What do plants use to synthesize food?", QA_CONTEXT),
+    ("Where does photosynthesis mainly take place?", QA_CONTEXT),
+    ("What pigment do chloroplasts contain?", QA_CONTEXT),
+    ("What is released as a by-product?", QA_CONTEXT),
+    ("Where does the Calvin cycle take place?", QA_CONTEXT),
+]
+
+SUMMARY_CORPUS = [
+    QA_CONTEXT * 2,
+    (
+        "Machine learning is a subset of artificial intelligence that focuses on the "
+        "development of algorithms and statistical models that enable computers to "
+        "improve their performance on a specific task through experience. It involves "
+        "training models on data to make predictions or decisions without being explicitly "
+        "programmed to perform the task. Common applications include image recognition, "
+        "natural language processing, and recommendation systems. "
+    ) * 2,
+]
+
+CORPORA = {
+    'sentiment-analysis': SENTIMENT_CORPUS,
+    'question-answering': QA_CORPUS,
+    'summarization': SUMMARY_CORPUS,
+}
+
+
+def run_inference(name, model, item):
+    """Run one corpus item and return a comparable output."""
+    if name == 'sentiment-analysis':
+        return model(item)[0]['label']
+    if name == 'question-answering':
+        question, context = item
+        return model(question=question, context=context)['answer']
+    return model(item, max_length=60, min_length=20, do_sample=False)[0]['summary_text']
+
+
+def measure(name, backend):
+    """Load one model on one backend and time it over its corpus (runs in a subprocess)."""
+    import django
+    django.setup()
+    from ai.backends import load_pipeline
+    from ai.registry import DEFAULT_MODELS
+
+    start = time.perf_counter()
+    model = load_pipeline(name, DEFAULT_MODELS[name], backend=backend)
+    load_seconds = time.perf_counter() - start
+
+    corpus = CORPORA[name]
+    run_inference(name, model, corpus[0])  # warm-up
+    latencies, outputs = [], []
+    for item in corpus:
+        start = time.perf_counter()
+        outputs.append(run_inference(name, model, item))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'load_seconds': round(load_seconds, 2),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'mean_ms': round(statistics.mean(latencies), 1),
+        'p50_ms': round(statistics.median(latencies), 1),
+        'outputs': outputs,
+    }
+
+
+def token_f1(reference, candidate):
+    """Unigram overlap F1 between two texts."""
+    ref, cand = reference.lower().split(), candidate.lower().split()
+    common = sum(min(ref.count(w), cand.count(w)) for w in set(cand))
+    if not common:
+        return 0.0
+    precision, recall = common / len(cand), common / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+
+def agreement(name, reference, outputs):
+    """Percentage agreement of outputs with the fp32 reference."""
+    if name == 'summarization':
+        scores = [token_f1(r, o) for r, o in zip(reference, outputs)]
+    else:
+        scores = [1.0 if r.strip() == o.strip() else 0.0 for r, o in zip(reference, outputs)]
+    return round(statistics.mean(scores) * 100, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--models', nargs='+', default=list(CORPORA), choices=list(CORPORA))
+    parser.add_argument('--backends', nargs='+', default=['torch', 'torch-int8', 'onnx'])
+    parser.add_argument('--worker', nargs=2, metavar=('MODEL', 'BACKEND'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(*args.worker)))
+        return
+
+    backends = ['torch'] + [b for b in args.backends if b != 'torch']
+    print(f"{'model':<20} {'backend':<11} {'load s':>7} {'peak RSS MB':>12} "
+          f"{'mean ms':>8} {'p50 ms':>7} {'agreement':>10}")
+    for name in args.models:
+        reference = None
+        for backend in backends:
+            completed = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--worker', name, backend],
+                capture_output=True, text=True, cwd=BACKEND_DIR
+            )
+            if completed.returncode != 0:
+                error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'unknown error'
+                print(f"{name:<20} {backend:<11} failed: {error}")
+                continue
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            if backend == 'torch':
+                reference = result['outputs']
+            agree = f"{agreement(name, reference, result['outputs']):.1f}%" if reference else 'n/a'
+            print(f"{name:<20} {backend:<11} {result['load_seconds']:>7} {result['peak_rss_mb']:>12} "
+                  f"{result['mean_ms']:>8} {result['p50_ms']:>7} {agree:>10}")
+
+
+if __name__ == '__main__':
+    main()
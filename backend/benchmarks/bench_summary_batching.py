@@ -0,0 +1,118 @@
+"""
+Benchmark summarization throughput with and without micro-batching.
+
+Runs summarize_text from 1, 4, 16 and 64 concurrent callers and reports
+requests per second. By default a fake summarizer simulates the cost profile
+of a CPU model (fixed per-call overhead plus a smaller per-item cost); pass
+--real to load facebook/bart-large-cnn instead.
+
+Usage:
+    python benchmarks/bench_summary_batching.py [--real] [--requests 128]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from ai import ai_utils
+from ai.registry import model_registry
+
+CONCURRENCY_LEVELS = [1, 4, 16, 64]
+
+SAMPLE_TEXT = (
+    "Machine learning is a subset of artificial intelligence that focuses on "
+    "the development of algorithms and statistical models that enable computers "
+    "to improve their performance on a specific task through experience. It involves "
+    "training models on data to make predictions or decisions without being explicitly "
+    "programmed to perform the task. Common applications include image recognition, "
+    "natural language processing, and recommendation systems. "
+) * 3
+
+
+class FakeTokenizer:
+    """Whitespace tokenizer with the parts of the tokenizer API ai_utils uses."""
+    model_max_length = 1024
+
+    def encode(self, text, add_special_tokens=True):
+        return text.split()
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 2
+
+
+class FakeSummarizer:
+    """
+    Stand-in for the summarization pipeline.
+
+    A single lock models the CPU being saturated by one forward pass at a
+    time; a batch costs the call overhead once plus a per-item cost.
+    """
+    tokenizer = FakeTokenizer()
+
+    def __init__(self, call_overhead=0.050, per_item=0.010):
+        self.call_overhead = call_overhead
+        self.per_item = per_item
+        self._lock = threading.Lock()
+
+    def __call__(self, inputs, **kwargs):
+        batch = inputs if isinstance(inputs, list) else [inputs]
+        with self._lock:
+            time.sleep(self.call_overhead + self.per_item * len(batch))
+        return [{'summary_text': text[:100]} for text in batch]
+
+
+def run_level(concurrency, total_requests):
+    """Issue total_requests calls from `concurrency` threads and time them."""
+    def call(_):
+        return ai_utils.summarize_text(SAMPLE_TEXT, max_length=60, min_length=20)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, range(total_requests)))
+    elapsed = time.perf_counter() - start
+    return total_requests / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--real', action='store_true', help='Use the real BART model')
+    parser.add_argument('--requests', type=int, default=128, help='Requests per concurrency level')
+    args = parser.parse_args()
+
+    # Identical inputs would otherwise be served from the result cache or
+    # coalesced into one in-flight call
+    settings.AI_RESULT_CACHE_ENABLED = False
+    settings.AI_SINGLEFLIGHT_ENABLED = False
+
+    if args.real:
+        ai_utils.get_summarization_model()
+    else:
+        model_registry.set('summarization', FakeSummarizer())
+
+    print(f"Window: {settings.AI_SUMMARY_BATCH_WINDOW_MS} ms, "
+          f"max batch size: {settings.AI_SUMMARY_MAX_BATCH_SIZE}, "
+          f"model: {'bart-large-cnn' if args.real else 'fake'}")
+    print(f"{'callers':>8} {'unbatched req/s':>16} {'batched req/s':>14} {'speedup':>8}")
+
+    for concurrency in CONCURRENCY_LEVELS:
+        total = max(args.requests, concurrency)
+        settings.AI_SUMMARY_BATCHING = False
+        unbatched = run_level(concurrency, total)
+        settings.AI_SUMMARY_BATCHING = True
+        batched = run_level(concurrency, total)
+        print(f"{concurrency:>8} {unbatched:>16.2f} {batched:>14.2f} {batched / unbatched:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
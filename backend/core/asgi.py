@@ -14,3 +14,15 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+# Load and warm the AI models before this process serves traffic
+# (only when AI_WARMUP_ON_STARTUP is enabled)
+from ai.warmup import warm_on_startup
+
+warm_on_startup()
+
+# Run AI jobs in this process (only when AI_JOB_EMBEDDED_WORKERS is set;
+# otherwise run `manage.py run_ai_worker` separately)
+from ai.jobs import start_embedded_workers
+
+start_embedded_workers()
@@ -135,6 +135,24 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Optional persistent tier for AI inference results
+    'ai_results': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'ai_cache',
+        'TIMEOUT': 86400,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -178,4 +196,147 @@ SIMPLE_JWT = {
 }
 
 # OpenAI API Key (optional - for AI features)
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
\ No newline at end of file
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
+
+# AI inference settings
+# Concurrent summary requests arriving within the window are run as one batch
+AI_SUMMARY_BATCHING = os.getenv('AI_SUMMARY_BATCHING', 'True') == 'True'
+AI_SUMMARY_BATCH_WINDOW_MS = int(os.getenv('AI_SUMMARY_BATCH_WINDOW_MS', '10'))
+AI_SUMMARY_MAX_BATCH_SIZE = int(os.getenv('AI_SUMMARY_MAX_BATCH_SIZE', '8'))
+
+# Shared inference server: 'local' loads models in every worker, 'remote'
+# sends summarize/QA/sentiment calls to `manage.py run_inference_server`.
+# The address is "host:port" or a Unix socket path.
+AI_INFERENCE_MODE = os.getenv('AI_INFERENCE_MODE', 'local')
+AI_INFERENCE_ADDRESS = os.getenv('AI_INFERENCE_ADDRESS', 'localhost:8765')
+AI_INFERENCE_AUTHKEY = os.getenv('AI_INFERENCE_AUTHKEY', SECRET_KEY)
+AI_INFERENCE_TIMEOUT = int(os.getenv('AI_INFERENCE_TIMEOUT', '120'))
+
+# Result cache for summaries, answers and sentiment. Set
+# AI_RESULT_CACHE_PERSISTENT_ALIAS to a CACHES alias (e.g. 'ai_results') to
+# keep results across restarts and share them between workers.
+AI_RESULT_CACHE_ENABLED = os.getenv('AI_RESULT_CACHE_ENABLED', 'True') == 'True'
+AI_RESULT_CACHE_MAX_ENTRIES = int(os.getenv('AI_RESULT_CACHE_MAX_ENTRIES', '1024'))
+AI_RESULT_CACHE_MAX_BYTES = int(os.getenv('AI_RESULT_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+AI_RESULT_CACHE_TTL = int(os.getenv('AI_RESULT_CACHE_TTL', '86400'))
+AI_RESULT_CACHE_PERSISTENT_ALIAS = os.getenv('AI_RESULT_CACHE_PERSISTENT_ALIAS', '')
+
+# Identical AI calls running at the same time share one computation, whether
+# or not the result cache is enabled. Set AI_SINGLEFLIGHT_LOCK_DIR to also
+# coalesce across processes on one host; results are shared through the
+# persistent cache tier, so this needs AI_RESULT_CACHE_PERSISTENT_ALIAS.
+AI_SINGLEFLIGHT_ENABLED = os.getenv('AI_SINGLEFLIGHT_ENABLED', 'True') == 'True'
+AI_SINGLEFLIGHT_LOCK_DIR = os.getenv('AI_SINGLEFLIGHT_LOCK_DIR', '')
+AI_SINGLEFLIGHT_WAIT_TIMEOUT = int(os.getenv('AI_SINGLEFLIGHT_WAIT_TIMEOUT', '120'))
+
+# Summaries of documents longer than the model input are built by summarizing
+# token-exact chunks and then summarizing the partial summaries
+AI_SUMMARY_LONG_DOCUMENTS = os.getenv('AI_SUMMARY_LONG_DOCUMENTS', 'True') == 'True'
+AI_SUMMARY_MAX_INPUT_TOKENS = int(os.getenv('AI_SUMMARY_MAX_INPUT_TOKENS', '1024'))
+AI_SUMMARY_CHUNK_BATCH_SIZE = int(os.getenv('AI_SUMMARY_CHUNK_BATCH_SIZE', '4'))
+
+# Model memory management. When loaded models exceed the budget, the ones
+# idle the longest are unloaded; 0 disables the limit.
+AI_MODEL_MEMORY_BUDGET_MB = int(os.getenv('AI_MODEL_MEMORY_BUDGET_MB', '0'))
+AI_MODEL_IDLE_TIMEOUT = int(os.getenv('AI_MODEL_IDLE_TIMEOUT', '0'))
+
+# Preloading: models listed here (comma-separated registry names, default the
+# models AI endpoints use) are loaded and warmed by `manage.py warm_models`
+# and, with AI_WARMUP_ON_STARTUP, when the WSGI/ASGI application starts.
+AI_PRELOAD_MODELS = [name for name in os.getenv('AI_PRELOAD_MODELS', '').split(',') if name]
+AI_WARMUP_ON_STARTUP = os.getenv('AI_WARMUP_ON_STARTUP', 'False') == 'True'
+AI_WARMUP_IN_BACKGROUND = os.getenv('AI_WARMUP_IN_BACKGROUND', 'False') == 'True'
+
+# Inference backend per model: 'torch' (fp32), 'torch-int8' (dynamic
+# quantization) or 'onnx' (needs optimum[onnxruntime]). Format:
+# AI_MODEL_BACKENDS=sentiment-analysis=onnx,question-answering=torch-int8
+AI_MODEL_BACKENDS = dict(
+    item.split('=', 1) for item in os.getenv('AI_MODEL_BACKENDS', '').split(',') if '=' in item
+)
+AI_MODEL_ARTIFACTS_DIR = BASE_DIR / 'model_artifacts'
+
+# Question answering over long contexts: the context is tokenized once and
+# overlapping windows (AI_QA_DOC_STRIDE tokens shared) run as one batch
+AI_QA_SLIDING_WINDOW = os.getenv('AI_QA_SLIDING_WINDOW', 'True') == 'True'
+AI_QA_MAX_SEQ_LEN = int(os.getenv('AI_QA_MAX_SEQ_LEN', '384'))
+AI_QA_DOC_STRIDE = int(os.getenv('AI_QA_DOC_STRIDE', '128'))
+AI_QA_MAX_ANSWER_LEN = int(os.getenv('AI_QA_MAX_ANSWER_LEN', '30'))
+AI_QA_WINDOW_BATCH_SIZE = int(os.getenv('AI_QA_WINDOW_BATCH_SIZE', '32'))
+# Tokenized QA contexts kept for follow-up questions, and the most questions
+# accepted by /api/ai/answer-questions/
+AI_QA_CONTEXT_CACHE_SIZE = int(os.getenv('AI_QA_CONTEXT_CACHE_SIZE', '64'))
+AI_QA_MAX_QUESTIONS = int(os.getenv('AI_QA_MAX_QUESTIONS', '20'))
+
+# Asynchronous AI jobs (POST /api/ai/jobs/), run by `manage.py run_ai_worker`
+# or by AI_JOB_EMBEDDED_WORKERS threads inside each web process
+AI_JOB_WORKER_CONCURRENCY = int(os.getenv('AI_JOB_WORKER_CONCURRENCY', '2'))
+AI_JOB_EMBEDDED_WORKERS = int(os.getenv('AI_JOB_EMBEDDED_WORKERS', '0'))
+AI_JOB_POLL_INTERVAL = float(os.getenv('AI_JOB_POLL_INTERVAL', '0.5'))
+AI_JOB_USER_CONCURRENCY = int(os.getenv('AI_JOB_USER_CONCURRENCY', '2'))
+AI_JOB_MAX_ATTEMPTS = int(os.getenv('AI_JOB_MAX_ATTEMPTS', '3'))
+AI_JOB_RETRY_DELAY = int(os.getenv('AI_JOB_RETRY_DELAY', '2'))
+AI_JOB_TIMEOUT = int(os.getenv('AI_JOB_TIMEOUT', '600'))
+AI_JOB_MAX_WAIT = int(os.getenv('AI_JOB_MAX_WAIT', '30'))
+
+# Metrics at /metrics. Each process writes its counters to AI_METRICS_DIR so
+# the endpoint can report totals across all workers on the host; leave it
+# empty for a single process. Scrapers send AI_METRICS_TOKEN as
+# "Authorization: Bearer <token>"; while it is unset only staff users can read it.
+AI_METRICS_DIR = os.getenv('AI_METRICS_DIR', '')
+AI_METRICS_FLUSH_INTERVAL = int(os.getenv('AI_METRICS_FLUSH_INTERVAL', '5'))
+AI_METRICS_TOKEN = os.getenv('AI_METRICS_TOKEN', '')
+
+# Threads that run the features of /api/ai/analyze/ concurrently
+AI_ANALYZE_MAX_WORKERS = int(os.getenv('AI_ANALYZE_MAX_WORKERS', '4'))
+
+# Batch endpoints (/api/ai/batch/<feature>/): most items per call, and how
+# many items count as one request against the AI rate limit
+AI_BATCH_MAX_ITEMS = int(os.getenv('AI_BATCH_MAX_ITEMS', '32'))
+AI_BATCH_ITEMS_PER_CHARGE = int(os.getenv('AI_BATCH_ITEMS_PER_CHARGE', '4'))
+AI_SENTIMENT_BATCH_SIZE = int(os.getenv('AI_SENTIMENT_BATCH_SIZE', '16'))
+
+# Default way to pick summary key points: 'heuristic' (long sentences with
+# emphasis words) or 'textrank' (most central sentences)
+AI_KEY_POINTS_METHOD = os.getenv('AI_KEY_POINTS_METHOD', 'heuristic')
+
+# Semantic note search: per-user embedding indexes are kept in this
+# directory. Indexes with at least AI_SEMANTIC_IVF_THRESHOLD notes are
+# clustered and a query scans AI_SEMANTIC_IVF_PROBES clusters (0 disables).
+# Saved notes are embedded on save by default only in remote inference mode,
+# where the inference server holds the model; in local mode it would load the
+# embedding model into every web process.
+AI_SEMANTIC_INDEX_DIR = Path(os.getenv('AI_SEMANTIC_INDEX_DIR', BASE_DIR / 'semantic_index'))
+AI_SEMANTIC_INDEX_ON_SAVE = os.getenv('AI_SEMANTIC_INDEX_ON_SAVE', str(AI_INFERENCE_MODE == 'remote')) == 'True'
+AI_SEMANTIC_IVF_THRESHOLD = int(os.getenv('AI_SEMANTIC_IVF_THRESHOLD', '20000'))
+AI_SEMANTIC_IVF_PROBES = int(os.getenv('AI_SEMANTIC_IVF_PROBES', '8'))
+AI_SEMANTIC_MAX_RESULTS = int(os.getenv('AI_SEMANTIC_MAX_RESULTS', '50'))
+AI_EMBEDDING_BATCH_SIZE = int(os.getenv('AI_EMBEDDING_BATCH_SIZE', '32'))
+
+# Compute each saved note's summary, key points, keywords and sentiment in a
+# background job ('note-artifacts'), so endpoints given a note_id can serve
+# them without recomputing. Only enable it where `manage.py run_ai_worker` or
+# AI_JOB_EMBEDDED_WORKERS runs the jobs; otherwise they pile up unclaimed.
+# Embeddings follow AI_SEMANTIC_INDEX_ON_SAVE.
+AI_NOTE_ARTIFACTS_ON_SAVE = os.getenv('AI_NOTE_ARTIFACTS_ON_SAVE', 'False') == 'True'
+
+# AI request logs are queued in memory and inserted in batches by a
+# background thread; records beyond AI_LOG_QUEUE_SIZE are dropped and counted
+AI_LOG_BUFFERED = os.getenv('AI_LOG_BUFFERED', 'True') == 'True'
+AI_LOG_QUEUE_SIZE = int(os.getenv('AI_LOG_QUEUE_SIZE', '10000'))
+AI_LOG_BATCH_SIZE = int(os.getenv('AI_LOG_BATCH_SIZE', '100'))
+AI_LOG_FLUSH_INTERVAL = float(os.getenv('AI_LOG_FLUSH_INTERVAL', '2'))
+AI_LOG_RESPONSE_MAX_BYTES = int(os.getenv('AI_LOG_RESPONSE_MAX_BYTES', str(64 * 1024)))
+
+# `manage.py archive_ai_logs` moves logs older than AI_LOG_RETENTION_DAYS to
+# gzipped JSONL files in AI_LOG_ARCHIVE_DIR
+AI_LOG_RETENTION_DAYS = int(os.getenv('AI_LOG_RETENTION_DAYS', '90'))
+AI_LOG_ARCHIVE_DIR = Path(os.getenv('AI_LOG_ARCHIVE_DIR', BASE_DIR / 'ai_log_archive'))
+
+# Per-user, per-endpoint, per-day AI usage rollups (/api/analytics/ai-usage/),
+# updated from the log writer every AI_USAGE_ROLLUP_INTERVAL seconds and by
+# `manage.py rollup_ai_usage`. Logs younger than AI_USAGE_ROLLUP_LAG seconds
+# wait for the next run.
+AI_USAGE_ROLLUP_ON_FLUSH = os.getenv('AI_USAGE_ROLLUP_ON_FLUSH', 'True') == 'True'
+AI_USAGE_ROLLUP_INTERVAL = int(os.getenv('AI_USAGE_ROLLUP_INTERVAL', '30'))
+AI_USAGE_ROLLUP_LAG = int(os.getenv('AI_USAGE_ROLLUP_LAG', '10'))
+AI_USAGE_ROLLUP_CHUNK = int(os.getenv('AI_USAGE_ROLLUP_CHUNK', '10000'))
@@ -20,6 +20,7 @@ from django.shortcuts import redirect
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
+from ai.views import prometheus_metrics
 
 # Root view that redirects to API documentation
 def root_view(request):
@@ -57,6 +58,9 @@ urlpatterns = [
     # Analytics endpoints
     path('api/analytics/', include('analytics.urls')),
     
+    # Prometheus metrics for the AI endpoints
+    path('metrics', prometheus_metrics, name='metrics'),
+    
     # API Documentation
     re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema_view.without_ui(cache_timeout=0), name='schema-json'),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
@@ -0,0 +1,55 @@
+import json
+import zlib
+
+from django.db import models
+
+
+class CompressedJSONField(models.BinaryField):
+    """
+    A JSON value stored as zlib-compressed bytes.
+
+    Reads and writes Python values like JSONField, but takes a fraction of
+    the space for the repetitive text of AI responses. The value cannot be
+    filtered on in queries.
+    """
+    description = 'Compressed JSON'
+
+    def __init__(self, *args, level=6, **kwargs):
+        self.level = level
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.level != 6:
+            kwargs['level'] = self.level
+        return name, path, args, kwargs
+
+    @staticmethod
+    def compress(value, level=6):
+        data = json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=str)
+        return zlib.compress(data.encode('utf-8'), level)
+
+    @staticmethod
+    def decompress(data):
+        return json.loads(zlib.decompress(bytes(data)).decode('utf-8'))
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        if isinstance(value, bytes):
+            # Already compressed (JSON values are never bytes)
+            return value
+        return self.compress(value, self.level)
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return self.decompress(value)
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return self.decompress(value)
+        return value
+
+    def value_to_string(self, obj):
+        return json.dumps(self.value_from_object(obj), default=str)
@@ -0,0 +1,85 @@
+from django.db import migrations
+import logging
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'study_note_fts'
+NOTE_TABLE = 'study_studynote'
+COLUMNS = 'title, content, related_topic'
+
+SQLITE_FORWARD = [
+    # External-content table: the text lives in study_studynote only
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    f"{COLUMNS}, content='{NOTE_TABLE}', content_rowid='id', "
+    f"tokenize='porter unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON {NOTE_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, {COLUMNS}) VALUES (new.id, new.title, new.content, new.related_topic); "
+    f"END",
+    f"CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON {NOTE_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS}) "
+    f"VALUES ('delete', old.id, old.title, old.content, old.related_topic); "
+    f"END",
+    f"CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE ON {NOTE_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS}) "
+    f"VALUES ('delete', old.id, old.title, old.content, old.related_topic); "
+    f"INSERT INTO {FTS_TABLE}(rowid, {COLUMNS}) VALUES (new.id, new.title, new.content, new.related_topic); "
+    f"END",
+    # Backfill existing notes
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+# Must match PostgresSearchBackend.document_sql; the index covers existing rows
+POSTGRES_FORWARD = [
+    f"CREATE INDEX study_note_search_idx ON {NOTE_TABLE} USING GIN ("
+    f"to_tsvector('english', coalesce({NOTE_TABLE}.title, '') || ' ' || "
+    f"coalesce({NOTE_TABLE}.related_topic, '') || ' ' || coalesce({NOTE_TABLE}.content, '')))",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS study_note_search_idx",
+]
+
+
+def _run(schema_editor, statements):
+    with schema_editor.connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            if not cursor.fetchone()[0]:
+                logger.warning("SQLite was built without FTS5; note search will use LIKE queries")
+                return
+        _run(schema_editor, SQLITE_FORWARD)
+    elif vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _run(schema_editor, SQLITE_BACKWARD)
+    elif vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
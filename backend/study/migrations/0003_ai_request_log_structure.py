@@ -0,0 +1,115 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:41
+
+import django.utils.timezone
+import json
+import study.fields
+from django.conf import settings
+from django.db import migrations, models
+
+
+def compress_responses(apps, schema_editor):
+    # Old responses are free text (often a stringified dict); keep them as JSON strings
+    AIRequestLog = apps.get_model('study', 'AIRequestLog')
+    logs = AIRequestLog.objects.exclude(response=None).only('id', 'response')
+    batch = []
+    for log in logs.iterator(chunk_size=1000):
+        log.response_data = log.response
+        batch.append(log)
+        if len(batch) >= 1000:
+            AIRequestLog.objects.bulk_update(batch, ['response_data'])
+            batch = []
+    AIRequestLog.objects.bulk_update(batch, ['response_data'])
+
+
+def expand_responses(apps, schema_editor):
+    AIRequestLog = apps.get_model('study', 'AIRequestLog')
+    logs = AIRequestLog.objects.exclude(response_data=None).only('id', 'response_data')
+    batch = []
+    for log in logs.iterator(chunk_size=1000):
+        value = log.response_data
+        log.response = value if isinstance(value, str) else json.dumps(value)
+        batch.append(log)
+        if len(batch) >= 1000:
+            AIRequestLog.objects.bulk_update(batch, ['response'])
+            batch = []
+    AIRequestLog.objects.bulk_update(batch, ['response'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0002_note_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='airequestlog',
+            name='cache_hit',
+            field=models.BooleanField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='airequestlog',
+            name='endpoint',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='airequestlog',
+            name='input_size',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='airequestlog',
+            name='latency_ms',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='airequestlog',
+            name='model',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='airequestlog',
+            name='output_size',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='airequestlog',
+            name='status',
+            field=models.PositiveSmallIntegerField(default=200),
+        ),
+        migrations.AlterField(
+            model_name='airequestlog',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        # Text responses become compressed JSON: copy them into a new column,
+        # since a text column cannot be cast to binary on every database
+        migrations.AddField(
+            model_name='airequestlog',
+            name='response_data',
+            field=study.fields.CompressedJSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(compress_responses, expand_responses),
+        migrations.RemoveField(
+            model_name='airequestlog',
+            name='response',
+        ),
+        migrations.RenameField(
+            model_name='airequestlog',
+            old_name='response_data',
+            new_name='response',
+        ),
+        migrations.AddIndex(
+            model_name='airequestlog',
+            index=models.Index(fields=['user', '-created_at'], name='ai_log_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='airequestlog',
+            index=models.Index(fields=['endpoint', 'created_at'], name='ai_log_endpoint_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='airequestlog',
+            index=models.Index(fields=['created_at'], name='ai_log_created_idx'),
+        ),
+    ]
@@ -1,5 +1,8 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
+
+from .fields import CompressedJSONField
 
 class StudySession(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='sessions')
@@ -14,6 +17,17 @@ class StudySession(models.Model):
 
 
 class StudyNote(models.Model):
+    """
+    A user's study note.
+
+    On SQLite, triggers created by migration 0002_note_search_index keep the
+    study_note_fts search index in sync with this table. Django's SQLite
+    schema editor rebuilds the table for most AddField/AlterField/RemoveField
+    operations, which silently drops those triggers. A migration that changes
+    this model must therefore end by recreating them and rebuilding the index,
+    e.g. with migrations.RunPython running 0002's drop_search_index and then
+    create_search_index.
+    """
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notes')
     title = models.CharField(max_length=255)
     content = models.TextField()
@@ -25,10 +39,28 @@ class StudyNote(models.Model):
 
 
 class AIRequestLog(models.Model):
+    """
+    One AI request. AI endpoints record these through ai/request_log.py;
+    `manage.py archive_ai_logs` moves old rows to compressed files.
+    """
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='ai_logs', null=True)
+    endpoint = models.CharField(max_length=100, blank=True, default='')
+    model = models.CharField(max_length=255, blank=True, default='')
     prompt = models.TextField()
-    response = models.TextField(blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    response = CompressedJSONField(blank=True, null=True)
+    status = models.PositiveSmallIntegerField(default=200)
+    latency_ms = models.FloatField(blank=True, null=True)
+    input_size = models.PositiveIntegerField(blank=True, null=True)
+    output_size = models.PositiveIntegerField(blank=True, null=True)
+    cache_hit = models.BooleanField(blank=True, null=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='ai_log_user_created_idx'),
+            models.Index(fields=['endpoint', 'created_at'], name='ai_log_endpoint_created_idx'),
+            models.Index(fields=['created_at'], name='ai_log_created_idx'),
+        ]
 
     def __str__(self):
         return f"AILog {self.id} by {self.user}"
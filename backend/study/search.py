@@ -0,0 +1,166 @@
+"""
+Full-text search for study notes.
+
+On SQLite, notes are indexed in an FTS5 table (study_note_fts) that triggers
+keep in sync with study_studynote. On PostgreSQL, a GIN index over the notes'
+tsvector serves the same queries. Both backends rank results (BM25 /
+ts_rank_cd, with title matches weighted highest), match word prefixes and
+return a highlighted snippet. Other databases fall back to LIKE queries.
+
+The tables and indexes are created by migration 0002_note_search_index.
+Later migrations that alter study_studynote on SQLite must recreate its
+triggers (see StudyNote).
+"""
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, TextField
+from django.db.models.expressions import RawSQL
+import re
+
+FTS_TABLE = 'study_note_fts'
+
+# Text search configuration used by the PostgreSQL index and queries
+POSTGRES_CONFIG = 'english'
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_END = '</mark>'
+
+# A quoted phrase or a single word
+_QUERY_PART = re.compile(r'"([^"]*)"|(\w+)')
+
+
+def parse_query(value):
+    """
+    Split a search string into phrases and words.
+
+    Returns:
+        list: (is_phrase, [words]) pairs; punctuation and operators are dropped
+    """
+    parts = []
+    for phrase, word in _QUERY_PART.findall(value):
+        words = re.findall(r'\w+', phrase) if phrase else [word]
+        if words:
+            parts.append((bool(phrase), words))
+    return parts
+
+
+class LikeSearchBackend:
+    """Unranked substring search for databases without a full-text index."""
+
+    def search(self, queryset, value):
+        return queryset.filter(
+            Q(title__icontains=value) |
+            Q(content__icontains=value) |
+            Q(related_topic__icontains=value)
+        )
+
+
+class SQLiteSearchBackend:
+    """FTS5 search with BM25 ranking, prefix matching and snippets."""
+
+    # bm25() column weights: title, content, related_topic
+    RANK_SQL = f"bm25({FTS_TABLE}, 10.0, 1.0, 5.0)"
+    SNIPPET_SQL = f"snippet({FTS_TABLE}, -1, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}', '…', 16)"
+
+    def build_query(self, value):
+        """Words match as prefixes, quoted phrases exactly; all parts are required."""
+        return ' '.join(
+            '"' + ' '.join(words) + '"' + ('' if is_phrase else '*')
+            for is_phrase, words in parse_query(value)
+        )
+
+    def search(self, queryset, value):
+        query = self.build_query(value)
+        if not query:
+            return queryset.none()
+        table = connection.ops.quote_name(queryset.model._meta.db_table)
+        matched = f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id"
+        return queryset.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [query])
+        ).annotate(
+            search_rank=RawSQL(f"SELECT {self.RANK_SQL} {matched}", [query], output_field=FloatField()),
+            search_snippet=RawSQL(f"SELECT {self.SNIPPET_SQL} {matched}", [query], output_field=TextField()),
+        )
+
+
+class PostgresSearchBackend:
+    """tsvector search with ts_rank_cd ranking, prefix matching and ts_headline snippets."""
+
+    @staticmethod
+    def document_sql(table):
+        # Must match the indexed expression in migration 0002
+        return (
+            f"to_tsvector('{POSTGRES_CONFIG}', coalesce({table}.title, '') || ' ' || "
+            f"coalesce({table}.related_topic, '') || ' ' || coalesce({table}.content, ''))"
+        )
+
+    @staticmethod
+    def weighted_document_sql(table):
+        return (
+            f"setweight(to_tsvector('{POSTGRES_CONFIG}', coalesce({table}.title, '')), 'A') || "
+            f"setweight(to_tsvector('{POSTGRES_CONFIG}', coalesce({table}.related_topic, '')), 'B') || "
+            f"setweight(to_tsvector('{POSTGRES_CONFIG}', coalesce({table}.content, '')), 'C')"
+        )
+
+    def build_query(self, value):
+        """Words match as prefixes, quoted phrases as adjacent words; all parts are required."""
+        return ' & '.join(
+            '(' + ' <-> '.join(words) + ')' if is_phrase else f"{words[0]}:*"
+            for is_phrase, words in parse_query(value)
+        )
+
+    def search(self, queryset, value):
+        query = self.build_query(value)
+        if not query:
+            return queryset.none()
+        table = connection.ops.quote_name(queryset.model._meta.db_table)
+        tsquery = f"to_tsquery('{POSTGRES_CONFIG}', %s)"
+        headline_options = f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxWords=24, MinWords=8"
+        return queryset.filter(
+            # Compared directly (not via an annotation) so the GIN index is used
+            RawSQL(f"{self.document_sql(table)} @@ {tsquery}", [query], output_field=BooleanField())
+        ).annotate(
+            # Negated so that, as with BM25, lower ranks are better
+            search_rank=RawSQL(
+                f"-ts_rank_cd({self.weighted_document_sql(table)}, {tsquery})", [query], output_field=FloatField()
+            ),
+            search_snippet=RawSQL(
+                f"ts_headline('{POSTGRES_CONFIG}', {table}.content, {tsquery}, '{headline_options}')",
+                [query],
+                output_field=TextField()
+            ),
+        )
+
+
+_fts_available = {}
+
+
+def _sqlite_fts_available():
+    # Only a positive answer is cached, so the table is found once migrated
+    alias = connection.alias
+    if not _fts_available.get(alias):
+        _fts_available[alias] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_available[alias]
+
+
+def get_search_backend():
+    """Search backend for the default database."""
+    if connection.vendor == 'sqlite' and _sqlite_fts_available():
+        return SQLiteSearchBackend()
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return LikeSearchBackend()
+
+
+def search_notes(queryset, value):
+    """
+    Filter notes to those matching a search string.
+
+    On full-text backends the notes are annotated with `search_rank` (lower
+    is better) and `search_snippet` (matching text with <mark> highlights).
+    """
+    return get_search_backend().search(queryset, value)
+
+
+def is_ranked(queryset):
+    """True if the queryset carries full-text search annotations."""
+    return 'search_rank' in queryset.query.annotations
@@ -55,6 +55,14 @@ class StudyNoteSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('user', 'created_at')
     
+    def to_representation(self, instance):
+        """Include the highlighted match when the note comes from a full-text search"""
+        data = super().to_representation(instance)
+        snippet = getattr(instance, 'search_snippet', None)
+        if snippet is not None:
+            data['search_snippet'] = snippet
+        return data
+    
     def validate_title(self, value):
         """Ensure title is not empty"""
         if not value or not value.strip():
@@ -79,10 +87,15 @@ class StudyNoteSerializer(serializers.ModelSerializer):
 
 
 class AIRequestLogSerializer(serializers.ModelSerializer):
+    response = serializers.JSONField(required=False, allow_null=True)
+
     class Meta:
         model = AIRequestLog
         fields = '__all__'
-        read_only_fields = ('user', 'created_at')
+        read_only_fields = (
+            'user', 'endpoint', 'model', 'status', 'latency_ms',
+            'input_size', 'output_size', 'cache_hit', 'created_at'
+        )
     
     def validate_prompt(self, value):
         """Ensure prompt is not empty"""
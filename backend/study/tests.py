@@ -1,3 +1,78 @@
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
 
-# Create your tests here.
+from .fields import CompressedJSONField
+from .models import AIRequestLog, StudyNote
+from .search import is_ranked, search_notes
+
+
+class CompressedJSONFieldTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pass')
+
+    def test_values_round_trip(self):
+        values = [
+            {'summary': 'Photosynthesis ' * 200, 'scores': [0.5, 1, None], 'nested': {'ok': True}},
+            [{'question': 'Q?', 'answer': 'A'}],
+            'Zusammenfassung: Größe — 光合作用',
+            42,
+            None,
+        ]
+        for value in values:
+            with self.subTest(value=str(value)[:30]):
+                log = AIRequestLog.objects.create(user=self.user, prompt='Prompt', response=value)
+                self.assertEqual(AIRequestLog.objects.get(id=log.id).response, value)
+
+    def test_stored_compressed(self):
+        response = {'summary': 'Photosynthesis ' * 200}
+        log = AIRequestLog.objects.create(user=self.user, prompt='Prompt', response=response)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT response FROM {AIRequestLog._meta.db_table} WHERE id = %s', [log.id])
+            stored = bytes(cursor.fetchone()[0])
+        self.assertLess(len(stored), len('Photosynthesis ' * 200) // 10)
+        self.assertEqual(CompressedJSONField.decompress(stored), response)
+
+
+class SearchNotesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pass')
+        self.photo = self.note('Photosynthesis', 'Plants turn light energy into chemical energy.', 'Biology')
+        self.cells = self.note('Cell division', 'Mitosis produces two identical cells.', 'Biology')
+        self.war = self.note('World War I', 'The war began in 1914 after an assassination.', 'History')
+
+    def note(self, title, content, topic):
+        return StudyNote.objects.create(user=self.user, title=title, content=content, related_topic=topic)
+
+    def search(self, value):
+        return search_notes(StudyNote.objects.filter(user=self.user), value)
+
+    def test_words_match_as_prefixes(self):
+        results = self.search('photo')
+        self.assertEqual(list(results), [self.photo])
+        self.assertTrue(is_ranked(results))
+        self.assertIn('<mark>', results[0].search_snippet)
+        self.assertEqual(set(self.search('biol')), {self.photo, self.cells})
+
+    def test_all_words_are_required(self):
+        self.assertEqual(list(self.search('biology mitosis')), [self.cells])
+
+    def test_phrases_match_adjacent_words(self):
+        self.assertEqual(list(self.search('"light energy"')), [self.photo])
+        self.assertEqual(list(self.search('"energy light"')), [])
+        # Phrase words are not prefixes
+        self.assertEqual(list(self.search('"light ener"')), [])
+
+    def test_operators_are_treated_as_text(self):
+        self.assertEqual(list(self.search('"*" - ( ) : ^')), [])
+        self.assertEqual(list(self.search('war)* ^1914')), [self.war])
+        self.assertEqual(list(self.search('war OR mitosis')), [])
+
+    def test_index_follows_note_changes(self):
+        self.war.content = 'The treaty of Versailles ended it.'
+        self.war.save()
+        self.assertEqual(list(self.search('versailles')), [self.war])
+        self.assertEqual(list(self.search('assassination')), [])
+
+        self.photo.delete()
+        self.assertEqual(list(self.search('photosynthesis')), [])
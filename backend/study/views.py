@@ -1,9 +1,9 @@
 from rest_framework import viewsets, permissions, filters
 from .models import StudySession, StudyNote, AIRequestLog
 from .serializers import StudySessionSerializer, StudyNoteSerializer, AIRequestLogSerializer
+from .search import is_ranked, search_notes
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend, FilterSet, CharFilter, BooleanFilter, NumberFilter
-from django.db.models import Q
 
 
 class StudySessionFilter(FilterSet):
@@ -34,12 +34,8 @@ class StudyNoteFilter(FilterSet):
     search = CharFilter(method='filter_search')
     
     def filter_search(self, queryset, name, value):
-        """Search across title, content, and related_topic"""
-        return queryset.filter(
-            Q(title__icontains=value) | 
-            Q(content__icontains=value) | 
-            Q(related_topic__icontains=value)
-        )
+        """Full-text search across title, content, and related_topic"""
+        return search_notes(queryset, value)
     
     class Meta:
         model = StudyNote
@@ -60,12 +56,21 @@ class StudySessionViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 
+class SearchRankOrderingFilter(filters.OrderingFilter):
+    """Order full-text search results by relevance unless ?ordering= is given"""
+    
+    def get_ordering(self, request, queryset, view):
+        if is_ranked(queryset) and not request.query_params.get(self.ordering_param):
+            return ['search_rank', '-created_at']
+        return super().get_ordering(request, queryset, view)
+
+
 class StudyNoteViewSet(viewsets.ModelViewSet):
     serializer_class = StudyNoteSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # ?search= is handled by StudyNoteFilter with the full-text index
+    filter_backends = [DjangoFilterBackend, SearchRankOrderingFilter]
     filterset_class = StudyNoteFilter
-    search_fields = ['title', 'content', 'related_topic']
     ordering_fields = ['created_at', 'title']
     ordering = ['-created_at']
 